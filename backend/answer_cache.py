@@ -0,0 +1,147 @@
+"""
+backend/answer_cache.py
+
+Semantic answer cache for /chat.
+
+Many chat questions are near-duplicates ("what is the return policy",
+"return policy?"). Before running retrieval + Gemini, the query embedding
+is compared (cosine similarity) with the embeddings of recently answered
+queries. If one is within the threshold and was answered on the same
+index/catalog version, its answer and sources are returned as they are.
+
+- The query embedding comes from the shared, cached embeddings client, so
+  a miss costs no extra API call: retrieval reuses the same vector.
+- Entries are held in a preallocated matrix of unit vectors; one lookup is
+  a single matrix-vector product.
+- Bounded LRU (least recently hit entry is evicted), per-entry TTL, and the
+  whole cache is dropped as soon as a new index version is served.
+- stats() reports hits/misses/hit_rate; they are exposed through
+  GET /admin/index.
+
+Config (env):
+  ANSWER_CACHE_SIZE       max cached answers (default 1024, 0 disables)
+  ANSWER_CACHE_TTL        entry lifetime in seconds (default 3600)
+  ANSWER_CACHE_THRESHOLD  min cosine similarity for a hit (default 0.95)
+"""
+
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+
+
+class SemanticAnswerCache:
+    """Thread-safe embedding-similarity cache of chat answers."""
+
+    def __init__(self, max_size: int = CACHE_SIZE, ttl: float = CACHE_TTL, threshold: float = THRESHOLD):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self._lock = Lock()
+        self._vectors: Optional[np.ndarray] = None   # (max_size, dim) unit vectors, allocated on first put
+        self._live = np.zeros(max(max_size, 0), dtype=bool)
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()  # slot -> entry, LRU order
+        self._version: Any = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _unit(self, embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version: Any) -> None:
+        # A rebuilt index / catalog can change any answer, so drop everything
+        if version != self._version:
+            self._entries.clear()
+            self._live[:] = False
+            self._version = version
+
+    def _free(self, slot: int) -> None:
+        del self._entries[slot]
+        self._live[slot] = False
+
+    def get(self, embedding: Sequence[float], version: Any) -> Optional[Any]:
+        """The cached value for the most similar live query above the threshold, else None."""
+        if not self.enabled:
+            return None
+        query = self._unit(embedding)
+        now = time.time()
+        with self._lock:
+            self._check_version(version)
+            if self._vectors is None or not self._entries or len(query) != self._vectors.shape[1]:
+                self.misses += 1
+                return None
+            slots = np.flatnonzero(self._live)
+            sims = self._vectors[slots] @ query
+            for i in np.argsort(-sims):
+                if sims[i] < self.threshold:
+                    break
+                slot = int(slots[i])
+                entry = self._entries[slot]
+                if self.ttl and now - entry["created"] > self.ttl:
+                    self._free(slot)
+                    continue
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                return entry["value"]
+            self.misses += 1
+            return None
+
+    def put(self, embedding: Sequence[float], version: Any, value: Any) -> None:
+        if not self.enabled:
+            return
+        vector = self._unit(embedding)
+        with self._lock:
+            # Only get() moves the cache to a new version. An answer computed on a
+            # version that is no longer current (hot reload mid-chain) is dropped.
+            if version != self._version:
+                return
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self.max_size, len(vector)), dtype=np.float32)
+                self._entries.clear()
+                self._live[:] = False
+            if len(self._entries) >= self.max_size:
+                slot, _ = self._entries.popitem(last=False)
+                self._live[slot] = False
+                self.evictions += 1
+            else:
+                slot = int(np.flatnonzero(~self._live)[0])
+            self._vectors[slot] = vector
+            self._live[slot] = True
+            self._entries[slot] = {"created": time.time(), "value": value}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._live[:] = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+answer_cache = SemanticAnswerCache()
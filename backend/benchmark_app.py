@@ -0,0 +1,528 @@
+"""
+backend/benchmark_app.py
+
+Offline load benchmark of the FastAPI app (no Gemini calls).
+
+The real app from main.py is driven in-process through httpx's ASGI
+transport, with the Gemini clients swapped for the deterministic stand-ins
+in fakes.py (configurable synthetic latency). For each catalog size a
+synthetic products.json is generated and indexed with the normal ingestion
+pipeline (FAISS build, memory-mapped export, neighbour table), then every
+scenario is run under a fixed concurrency:
+
+  search                    POST /search (hybrid)
+  search_filtered           POST /search with category / max_price filters
+  recommendations           GET  /recommendations/{product_id}
+  recommendations_by_query  GET  /recommendations/by-query
+  products                  GET  /products (a page of 50, projected)
+  cart                      POST /cart/add, /cart/update, /cart/remove, GET /cart/{user_id}[?hydrate=true]
+  cart_batch                POST /cart/batch (a 10-operation guest-cart sync)
+  chat                      POST /chat
+
+Each scenario reports throughput and p50/p95/p99 latency. The request mix
+is generated from `--seed`, and generated datasets are kept in `--workdir`
+(keyed by size, dimension, seed and index type), so two runs with the same
+flags replay the same requests against the same data. Save a run with
+--output and compare a later commit against it with --compare, which exits
+with status 1 if any scenario got slower than --threshold.
+
+  python -m backend.benchmark_app                                 # 1k products, all scenarios
+  python -m backend.benchmark_app --sizes 1k,100k,1m --concurrency 64
+  python -m backend.benchmark_app --scenarios search,cart --output baseline.json
+  python -m backend.benchmark_app --compare baseline.json
+
+The neighbour table is an exact all-pairs search, so it is only built up to
+--neighbors-max products; larger catalogs exercise the embedding fallback of
+/recommendations/{product_id}.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from backend.fakes import EMBEDDING_DIM, FakeChatModel, FakeEmbeddings
+
+INDEX_NAME = "index"
+DEFAULT_WORKDIR = Path(tempfile.gettempdir()) / "shopping-assistant-bench"
+
+
+# ---------------- Synthetic catalog ----------------
+
+BRANDS = ["boAt", "Samsung", "Mi", "OnePlus", "Sony", "JBL", "Logitech", "Portronics", "Ambrane", "HP",
+          "Noise", "realme", "Zebronics", "pTron", "Lenovo", "Philips", "AmazonBasics", "Wayona", "Pigeon", "Havells"]
+
+# (category path, product nouns, price range in rupees)
+PRODUCT_TYPES = [
+    ("Electronics|Headphones,Earbuds&Accessories|Headphones|In-Ear", ["earbuds", "headphones", "neckband"], (499, 9999)),
+    ("Computers&Accessories|Accessories&Peripherals|Cables&Accessories|Cables|USBCables",
+     ["usb cable", "type c cable", "lightning cable", "micro usb cable"], (99, 1499)),
+    ("Electronics|Mobiles&Accessories|MobileAccessories|Chargers", ["charger", "power bank", "car charger"], (299, 3999)),
+    ("Electronics|Mobiles&Accessories|Smartphones&BasicMobiles|Smartphones", ["smartphone", "5g phone"], (6999, 79999)),
+    ("Computers&Accessories|Accessories&Peripherals|Keyboards,Mice&InputDevices", ["mouse", "keyboard", "combo"],
+     (249, 4999)),
+    ("Electronics|HomeTheater,TV&Video|Televisions|SmartTelevisions", ["smart tv", "led tv"], (9999, 99999)),
+    ("Electronics|WearableTechnology|SmartWatches", ["smartwatch", "fitness band"], (999, 24999)),
+    ("Home&Kitchen|Kitchen&HomeAppliances|SmallKitchenAppliances", ["electric kettle", "mixer grinder", "toaster"],
+     (599, 7999)),
+    ("Home&Kitchen|Heating,Cooling&AirQuality|Fans", ["ceiling fan", "table fan", "room heater"], (999, 5999)),
+    ("Electronics|Cameras&Photography|Accessories", ["tripod", "memory card", "camera bag"], (199, 3999)),
+]
+
+FEATURES = ["wireless", "bluetooth 5.3", "fast charging", "noise cancelling", "braided", "waterproof", "ergonomic",
+            "4k", "compact", "rgb", "long battery life", "dual pairing", "metal body", "energy efficient",
+            "lightweight", "premium", "hd", "voice assistant", "touch control", "1 year warranty"]
+
+
+def synthetic_product(i: int, rng: random.Random) -> Dict[str, Any]:
+    """One product in the products.json schema (same fields as the real catalog)."""
+    category, nouns, (low, high) = rng.choice(PRODUCT_TYPES)
+    brand = rng.choice(BRANDS)
+    noun = rng.choice(nouns)
+    features = rng.sample(FEATURES, 3)
+    actual = rng.randint(low, high)
+    discount = rng.randint(5, 75)
+    price = max(1, round(actual * (100 - discount) / 100))
+    product_id = f"B{i:09d}"
+    return {
+        "product_id": product_id,
+        "product_name": f"{brand} {features[0].title()} {noun.title()} {rng.randint(100, 999)}",
+        "category": category,
+        "discounted_price": f"₹{price:,}",
+        "actual_price": f"₹{actual:,}",
+        "discount_percentage": f"{discount}%",
+        "rating": f"{rng.uniform(2.5, 5.0):.1f}",
+        "rating_count": f"{rng.randint(1, 500000):,}",
+        "about_product": " | ".join(f"{f.capitalize()} {noun} from {brand}" for f in features),
+        "img_link": f"https://example.com/images/{product_id}.jpg",
+        "product_link": f"https://example.com/dp/{product_id}",
+    }
+
+
+def synthetic_products(n: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for i in range(n):
+        yield synthetic_product(i, rng)
+
+
+def write_products(products: Iterator[Dict[str, Any]], path: Path) -> int:
+    """Stream products into a JSON array file; returns how many were written."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for product in products:
+            if count:
+                f.write(",\n")
+            f.write(json.dumps(product, ensure_ascii=False))
+            count += 1
+        f.write("\n]\n")
+    return count
+
+
+def synthetic_queries(n: int, seed: int = 0) -> List[str]:
+    """Shopper-style queries over the synthetic vocabulary, with some typos for the fuzzy path."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        _, nouns, (low, high) = rng.choice(PRODUCT_TYPES)
+        noun = rng.choice(nouns)
+        kind = rng.random()
+        if kind < 0.3:
+            query = f"{rng.choice(FEATURES)} {noun}"
+        elif kind < 0.55:
+            query = f"{rng.choice(BRANDS)} {noun}"
+        elif kind < 0.75:
+            query = f"best {noun} under {rng.randint(low, high) // 100 * 100}"
+        elif kind < 0.9:
+            query = f"which {noun} has {rng.choice(FEATURES)}"
+        else:
+            pos = rng.randrange(len(noun))
+            query = noun[:pos] + noun[pos + 1:]  # misspelt
+        queries.append(query)
+    return queries
+
+
+def parse_size(text: str) -> int:
+    """'1k' -> 1000, '1m' -> 1000000, '2500' -> 2500."""
+    text = text.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if multiplier > 1 else text) * multiplier)
+
+
+# ---------------- Datasets ----------------
+
+def prepare_dataset(n: int, workdir: Path, dim: int = EMBEDDING_DIM, seed: int = 0, index_type: str = "flat",
+                    neighbors_max: int = 200_000, rebuild: bool = False) -> Path:
+    """
+    Generate and index a synthetic catalog of `n` products (reused if it
+    already exists). Returns the dataset folder: products.json (+ its
+    columnar copy) and vectorstore/.
+    """
+    from backend.index_config import make_config
+    from backend.ingestion import build_vectorstore, source_signature
+    from backend.neighbors import build_neighbor_table
+    from backend.rebuild_vectorstore import build_catalog_columns, iter_product_docs
+
+    folder = Path(workdir) / f"catalog-{n}-d{dim}-s{seed}-{index_type}"
+    manifest = folder / "dataset.json"
+    if manifest.exists() and not rebuild:
+        return folder
+
+    shutil.rmtree(folder, ignore_errors=True)
+    folder.mkdir(parents=True)
+    started = time.perf_counter()
+    data_file = folder / "products.json"
+    write_products(synthetic_products(n, seed), data_file)
+    logging.info(f"Generated {n} products in {time.perf_counter() - started:.1f}s")
+    build_catalog_columns(data_file)
+
+    vectorstore = build_vectorstore(
+        iter_product_docs(data_file),
+        FakeEmbeddings(dim, seed=seed),
+        folder=folder / "vectorstore",
+        index_name=INDEX_NAME,
+        signature=source_signature(data_file, model="fake", dim=dim, seed=seed),
+        batch_size=1000,
+        id_key="product_id",
+        index_config=make_config(index_type),
+    )
+    with_neighbors = n <= neighbors_max
+    if with_neighbors:
+        build_neighbor_table(vectorstore, folder / "vectorstore", INDEX_NAME)
+    del vectorstore
+    gc.collect()
+
+    manifest.write_text(json.dumps({
+        "products": n, "dim": dim, "seed": seed, "index_type": index_type, "neighbor_table": with_neighbors,
+        "build_seconds": round(time.perf_counter() - started, 2),
+    }, indent=2), encoding="utf-8")
+    return folder
+
+
+# ---------------- Scenarios ----------------
+
+@dataclass
+class Context:
+    """What the request generators draw from for one dataset."""
+    product_ids: List[str]
+    categories: List[str]
+    queries: List[str]
+    users: int = 100
+
+
+Request = Dict[str, Any]  # method, url and optional params / json
+
+
+def _search(rng: random.Random, ctx: Context) -> Request:
+    return {"method": "POST", "url": "/search", "params": {"query": rng.choice(ctx.queries), "top_k": 5}}
+
+
+def _search_filtered(rng: random.Random, ctx: Context) -> Request:
+    params = {"query": rng.choice(ctx.queries), "top_k": 5, "category": rng.choice(ctx.categories)}
+    if rng.random() < 0.5:
+        params["max_price"] = rng.choice([500, 1000, 2000, 5000, 20000])
+    return {"method": "POST", "url": "/search", "params": params}
+
+
+def _recommendations(rng: random.Random, ctx: Context) -> Request:
+    return {"method": "GET", "url": f"/recommendations/{rng.choice(ctx.product_ids)}", "params": {"top_k": 5}}
+
+
+def _recommendations_by_query(rng: random.Random, ctx: Context) -> Request:
+    return {"method": "GET", "url": "/recommendations/by-query", "params": {"query": rng.choice(ctx.queries), "top_k": 6}}
+
+
+def _products(rng: random.Random, ctx: Context) -> Request:
+    params = {"offset": rng.randrange(0, len(ctx.product_ids), 50), "limit": 50,
+              "fields": "product_id,product_name,discounted_price,rating"}
+    if rng.random() < 0.3:
+        params["category"] = rng.choice(ctx.categories)
+    return {"method": "GET", "url": "/products", "params": params, "headers": {"Accept-Encoding": "gzip"}}
+
+
+def _cart(rng: random.Random, ctx: Context) -> Request:
+    user_id = f"bench-user-{rng.randrange(ctx.users)}"
+    product_id = rng.choice(ctx.product_ids[:1000])  # small hot set, so updates/removes hit existing lines
+    kind = rng.random()
+    if kind < 0.4:
+        return {"method": "POST", "url": "/cart/add",
+                "params": {"user_id": user_id, "product_id": product_id, "quantity": rng.randint(1, 3)}}
+    if kind < 0.7:
+        return {"method": "GET", "url": f"/cart/{user_id}", "params": {"hydrate": rng.random() < 0.5}}
+    if kind < 0.85:
+        return {"method": "POST", "url": "/cart/update",
+                "params": {"user_id": user_id, "product_id": product_id, "quantity": rng.randint(1, 5)}}
+    return {"method": "POST", "url": "/cart/remove", "params": {"user_id": user_id, "product_id": product_id}}
+
+
+def _cart_batch(rng: random.Random, ctx: Context) -> Request:
+    operations = [{"op": rng.choice(["add", "add", "set", "remove"]), "product_id": rng.choice(ctx.product_ids[:1000]),
+                   "quantity": rng.randint(1, 3)} for _ in range(10)]
+    return {"method": "POST", "url": "/cart/batch",
+            "json": {"user_id": f"bench-user-{rng.randrange(ctx.users)}", "operations": operations}}
+
+
+def _chat(rng: random.Random, ctx: Context) -> Request:
+    return {"method": "POST", "url": "/chat", "json": {"query": rng.choice(ctx.queries)}}
+
+
+SCENARIOS: Dict[str, Callable[[random.Random, Context], Request]] = {
+    "search": _search,
+    "search_filtered": _search_filtered,
+    "recommendations": _recommendations,
+    "recommendations_by_query": _recommendations_by_query,
+    "products": _products,
+    "cart": _cart,
+    "cart_batch": _cart_batch,
+    "chat": _chat,
+}
+
+
+# ---------------- Load driver ----------------
+
+@dataclass
+class ScenarioResult:
+    latencies: List[float] = field(default_factory=list)  # seconds, successful requests only
+    errors: int = 0
+    wall: float = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        ms = np.asarray(self.latencies) * 1000
+        done = len(self.latencies)
+        stats = {
+            "requests": done + self.errors,
+            "errors": self.errors,
+            "throughput_rps": round(done / self.wall, 1) if self.wall else 0.0,
+        }
+        if done:
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            stats.update(mean_ms=round(float(ms.mean()), 2), p50_ms=round(float(p50), 2),
+                         p95_ms=round(float(p95), 2), p99_ms=round(float(p99), 2), max_ms=round(float(ms.max()), 2))
+        return stats
+
+
+def _failed(response) -> bool:
+    if response.status_code != 200:
+        return True
+    body = response.json()
+    return isinstance(body, dict) and body.get("status") == "error"
+
+
+async def run_scenario(app, requests: List[Request], concurrency: int,
+                       warmup: Sequence[Request] = ()) -> ScenarioResult:
+    """Replay `requests` through `concurrency` concurrent clients (closed loop), after `warmup` ones."""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for request in warmup:
+            await client.request(**request)
+
+        result = ScenarioResult()
+        pending = iter(requests)
+
+        async def worker():
+            for request in pending:
+                started = time.perf_counter()
+                response = await client.request(**request)
+                elapsed = time.perf_counter() - started
+                if _failed(response):
+                    result.errors += 1
+                else:
+                    result.latencies.append(elapsed)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        result.wall = time.perf_counter() - started
+    return result
+
+
+def configure_app(workdir: Path, args):
+    """Import main.py against a scratch cart store, with the fake Gemini clients installed."""
+    os.environ["INDEX_WATCH_INTERVAL"] = "0"
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    import backend.cart_storage as cs
+
+    cart_dir = Path(workdir) / "cart"
+    shutil.rmtree(cart_dir, ignore_errors=True)
+    cart_dir.mkdir(parents=True)
+    cs.CART_FILE = cart_dir / "cart.json"
+    cs.WISHLIST_FILE = cart_dir / "wishlist.json"
+    os.environ["CART_DB_PATH"] = str(cart_dir / "cart.db")
+
+    from backend import main
+    from backend.resources import resources
+
+    resources._llm = FakeChatModel(
+        answer_tokens=args.llm_tokens, first_token_latency=args.llm_first_token,
+        token_latency=args.llm_token_latency, jitter=args.llm_jitter, seed=args.seed,
+    )
+    return main.app, resources
+
+
+def use_dataset(resources, folder: Path, args) -> Dict[str, float]:
+    """Serve `folder` with fresh caches; returns the index load times."""
+    from backend.answer_cache import answer_cache
+    from backend.embedding_cache import cached_embeddings
+
+    resources._embeddings = cached_embeddings(
+        FakeEmbeddings(args.dim, latency=args.embed_latency, jitter=args.embed_jitter, seed=args.seed),
+        model="fake",
+    )
+    resources.index.vectorstore_path = folder / "vectorstore"
+    resources.index.catalog_path = folder / "products.json"
+    resources.index.reload(force=True)
+    resources.warm_up(("qa_chain",))
+    answer_cache.clear()
+    return {k: round(v, 3) for k, v in resources.index.load_times.items()}
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    workdir = Path(args.workdir)
+    app, resources = configure_app(workdir, args)
+    queries = synthetic_queries(500, args.seed)
+
+    results: Dict[str, Any] = {}
+    for size in [parse_size(s) for s in args.sizes.split(",")]:
+        folder = prepare_dataset(size, workdir, args.dim, args.seed, args.index_type, args.neighbors_max, args.rebuild)
+        load_times = use_dataset(resources, folder, args)
+        catalog = resources.index.current.catalog
+        ctx = Context(product_ids=list(catalog.by_id), queries=queries, users=args.cart_users,
+                      categories=sorted({p["category"] for p in catalog.by_id.values()}))
+
+        size_results: Dict[str, Any] = {"load_seconds": load_times}
+        for name in args.scenarios.split(","):
+            count = args.chat_requests if name == "chat" else args.requests
+            rng = random.Random(f"{args.seed}:{name}")
+            plan = [SCENARIOS[name](rng, ctx) for _ in range(count + args.warmup)]
+            result = asyncio.run(run_scenario(app, plan[args.warmup:], args.concurrency, plan[:args.warmup]))
+            size_results[name] = result.summary()
+            print(_format_row(size, name, size_results[name]), flush=True)
+        results[str(size)] = size_results
+    return results
+
+
+# ---------------- Reporting ----------------
+
+HEADER = f"{'products':>9}  {'scenario':<25}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+
+
+def _format_row(size: int, name: str, stats: Dict[str, Any]) -> str:
+    return (f"{size:>9}  {name:<25}{stats['throughput_rps']:>9}{stats.get('p50_ms', '-'):>10}"
+            f"{stats.get('p95_ms', '-'):>10}{stats.get('p99_ms', '-'):>10}{stats['errors']:>8}")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, cwd=Path(__file__).parent).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Flags that change what is measured; runs are only comparable when these match
+COMPARABLE_SETTINGS = ("dim", "seed", "index_type", "requests", "chat_requests", "concurrency", "warmup",
+                       "embed_latency", "embed_jitter", "llm_first_token", "llm_token_latency", "llm_tokens",
+                       "llm_jitter", "cart_users", "neighbors_max")
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print the change of every scenario in both runs; returns the regressions."""
+    settings = [k for k in COMPARABLE_SETTINGS if k != "chat_requests" or "chat" in current["settings"]["scenarios"]]
+    changed = [k for k in settings if baseline["settings"].get(k) != current["settings"].get(k)]
+    if changed:
+        print(f"⚠️  Settings differ from the baseline ({', '.join(changed)}); numbers may not be comparable.")
+    print(f"\nvs {baseline.get('commit') or 'baseline'}:")
+    regressions = []
+    for size, scenarios in current["results"].items():
+        for name, stats in scenarios.items():
+            old = baseline["results"].get(size, {}).get(name)
+            if name == "load_seconds" or not old or "p95_ms" not in old or "p95_ms" not in stats:
+                continue
+            p95 = stats["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+            rps = stats["throughput_rps"] / old["throughput_rps"] - 1 if old["throughput_rps"] else 0.0
+            slower = p95 > threshold or rps < -threshold
+            print(f"{size:>9}  {name:<25} p95 {p95:+7.1%}  req/s {rps:+7.1%}{'  ❌ regression' if slower else ''}")
+            if slower:
+                regressions.append(f"{size}/{name}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the API with fake Gemini backends and synthetic catalogs")
+    parser.add_argument("--sizes", default="1k", help="comma-separated catalog sizes, e.g. 1k,100k,1m")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=1000, help="measured requests per scenario")
+    parser.add_argument("--chat-requests", type=int, default=100, help="measured requests for the chat scenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each scenario")
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM, help="fake embedding dimension")
+    parser.add_argument("--index-type", default="flat", help="serving index type (see index_config.py)")
+    parser.add_argument("--embed-latency", type=float, default=0.03, help="seconds per embedding request")
+    parser.add_argument("--embed-jitter", type=float, default=0.01)
+    parser.add_argument("--llm-first-token", type=float, default=0.3, help="seconds to the first LLM token")
+    parser.add_argument("--llm-token-latency", type=float, default=0.005, help="seconds per further LLM token")
+    parser.add_argument("--llm-tokens", type=int, default=40, help="tokens per LLM answer")
+    parser.add_argument("--llm-jitter", type=float, default=0.05)
+    parser.add_argument("--cart-users", type=int, default=100, help="distinct users in the cart scenario")
+    parser.add_argument("--neighbors-max", type=int, default=200_000,
+                        help="largest catalog to build the (exact, all-pairs) neighbour table for")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=str(DEFAULT_WORKDIR), help="where generated datasets are kept")
+    parser.add_argument("--rebuild", action="store_true", help="regenerate datasets even if they exist")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="relative p95 / throughput change counted as a regression (default 0.20)")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_args(argv)
+    print(HEADER, flush=True)
+    run = {
+        "commit": _git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "rebuild", "workdir")},
+        "results": run_benchmark(args),
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(run, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(baseline, run, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# backend/benchmark_index.py
+"""
+Recall / latency / memory benchmark of the FAISS index types in index_config.py.
+
+Every config is built from the same vectors and compared with an exact flat
+scan: recall@k is the fraction of the true k nearest neighbours found, QPS
+is measured with single-query searches (how the API queries), and memory is
+the serialized index size.
+
+  python -m backend.benchmark_index                      # vectors of backend/vectorstore/index.faiss
+  python -m backend.benchmark_index --synthetic 200000   # random clustered vectors (no index needed)
+  python -m backend.benchmark_index --configs ivf_pq,hnsw --nprobe 4,16,64 --ef-search 32,128
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from backend.index_config import INDEX_TYPES, build_index, factory_string, make_config
+
+VECTORSTORE_PATH = Path(__file__).parent / "vectorstore"
+
+
+def load_vectors(folder: Path, index_name: str = "index") -> np.ndarray:
+    index = faiss.read_index(str(folder / f"{index_name}.faiss"))
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def synthetic_vectors(n: int, d: int, clusters: int = 100, seed: int = 0) -> np.ndarray:
+    """Gaussian blobs: closer to real embedding distributions than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, d)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    return centers[labels] + 0.3 * rng.normal(size=(n, d)).astype(np.float32)
+
+
+def make_queries(vectors: np.ndarray, n: int, seed: int = 1) -> np.ndarray:
+    """Perturbed catalog vectors, so each query has a realistic neighbourhood."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), size=min(n, len(vectors)), replace=False)
+    noise = 0.1 * vectors.std() * rng.normal(size=(len(rows), vectors.shape[1]))
+    return (vectors[rows] + noise).astype(np.float32)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found.tolist(), truth.tolist()))
+    return hits / (len(truth) * k)
+
+
+def run(index: faiss.Index, queries: np.ndarray, k: int):
+    started = time.perf_counter()
+    found = np.vstack([index.search(q[None, :], k)[1] for q in queries])
+    return found, len(queries) / (time.perf_counter() - started)
+
+
+def benchmark(vectors: np.ndarray, queries: np.ndarray, configs, k: int, nprobes, ef_searches):
+    n, d = vectors.shape
+    flat = faiss.IndexFlatL2(d)
+    flat.add(vectors)
+    truth, _ = run(flat, queries, k)
+
+    rows = []
+    for index_type in configs:
+        config = make_config(index_type)
+        started = time.perf_counter()
+        index = build_index(vectors, config)
+        build_s = time.perf_counter() - started
+        memory_mb = faiss.serialize_index(index).nbytes / 1e6
+
+        if isinstance(index, faiss.IndexIVF):
+            settings = [("nprobe", p) for p in nprobes if p <= index.nlist] or [("nprobe", index.nlist)]
+        elif isinstance(index, faiss.IndexHNSW):
+            settings = [("efSearch", e) for e in ef_searches]
+        else:
+            settings = [(None, None)]
+
+        for name, value in settings:
+            if name:
+                faiss.ParameterSpace().set_index_parameter(index, name, value)
+            found, qps = run(index, queries, k)
+            rows.append({
+                "config": factory_string(config, d, n),
+                "param": f"{name}={value}" if name else "-",
+                f"recall@{k}": recall_at_k(found, truth),
+                "qps": qps,
+                "memory_mb": memory_mb,
+                "build_s": build_s,
+            })
+    return rows
+
+
+def print_table(rows, k: int):
+    header = f"{'config':<22} {'param':<14} {'recall@' + str(k):>9} {'QPS':>10} {'memory MB':>10} {'build s':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['config']:<22} {row['param']:<14} {row[f'recall@{k}']:>9.3f} {row['qps']:>10.0f} "
+              f"{row['memory_mb']:>10.1f} {row['build_s']:>8.2f}")
+
+
+def _ints(value: str):
+    return [int(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index configs against a flat scan")
+    parser.add_argument("--synthetic", type=int, help="use N synthetic vectors instead of the built index")
+    parser.add_argument("--dim", type=int, default=768, help="dimension of synthetic vectors")
+    parser.add_argument("--folder", default=str(VECTORSTORE_PATH))
+    parser.add_argument("--configs", default=",".join(INDEX_TYPES), help="comma-separated index types")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", default="1,8,32", help="IVF nprobe values to sweep")
+    parser.add_argument("--ef-search", default="32,64,128", help="HNSW efSearch values to sweep")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_vectors(args.synthetic, args.dim)
+    else:
+        vectors = load_vectors(Path(args.folder))
+    queries = make_queries(vectors, args.queries)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, "
+          f"{faiss.omp_get_max_threads()} threads\n")
+    configs = [c for c in args.configs.split(",") if c]
+    print_table(benchmark(vectors, queries, configs, args.k, _ints(args.nprobe), _ints(args.ef_search)), args.k)
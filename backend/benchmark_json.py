@@ -0,0 +1,72 @@
+# backend/benchmark_json.py
+"""
+Micro-benchmark of response serialization for catalog payloads.
+
+Compares, on a success_response envelope holding N synthetic products:
+  fastapi   jsonable_encoder + JSONResponse (what a route returning a dict costs)
+  stdlib    JSONResponse without jsonable_encoder
+  orjson    FastJSONResponse (serialization.fast_response)
+and checks that every path produces the same JSON.
+
+  python -m backend.benchmark_json
+  python -m backend.benchmark_json --sizes 100,10000 --repeat 50
+"""
+
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.benchmark_app import synthetic_products
+from backend.serialization import FAST_JSON, FastJSONResponse
+
+
+def payload(n: int):
+    return {"status": "success", "message": "Product list fetched", "data": list(synthetic_products(n))}
+
+
+PATHS = {
+    "fastapi": lambda content: JSONResponse(jsonable_encoder(content)).body,
+    "stdlib": lambda content: JSONResponse(content).body,
+    "orjson": lambda content: FastJSONResponse(content).body,
+}
+
+
+def timeit(render, content, repeat: int) -> float:
+    """Best-of-`repeat` seconds per render (the minimum is the least noisy estimate)."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render(content)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JSON rendering of product payloads")
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="comma-separated product counts")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if not FAST_JSON:
+        print("⚠️  orjson is not installed (or FAST_JSON=0): the orjson row measures the stdlib fallback.")
+    print(f"{'products':>9}  {'path':<9}{'ms/op':>10}{'MB/s':>9}{'speedup':>9}")
+    for n in [int(s) for s in args.sizes.split(",")]:
+        content = payload(n)
+        bodies = {name: render(content) for name, render in PATHS.items()}
+        reference = json.loads(bodies["fastapi"])
+        for name, body in bodies.items():
+            assert json.loads(body) == reference, f"{name} output differs from the fastapi path"
+
+        baseline = None
+        for name, render in PATHS.items():
+            seconds = timeit(render, content, args.repeat)
+            baseline = baseline or seconds
+            mb_per_s = len(bodies[name]) / seconds / 1e6
+            print(f"{n:>9}  {name:<9}{seconds * 1000:>10.3f}{mb_per_s:>9.1f}{baseline / seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
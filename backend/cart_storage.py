@@ -0,0 +1,356 @@
+"""
+backend/cart_storage.py
+
+Storage backends for carts and wishlists (used by cart_wishlist.py).
+
+Every backend stores, per user:
+  cart:     [ {"product_id": "...", "quantity": 2}, ... ]   (insertion order kept)
+  wishlist: [ "product_id1", "product_id2", ... ]
+
+Changes go through `store.transaction(user_id)`, which yields a CartTxn
+holding that user's cart and wishlist; whatever the block reads/changes is
+written back atomically when it exits, and concurrent transactions from
+other threads *and* other processes (uvicorn workers) wait their turn.
+
+Backends:
+  - SQLiteCartStore (default): one row per (user, product) in an SQLite
+    database in WAL mode, so a mutation only touches that user's rows.
+  - JSONCartStore (legacy): the original cart.json / wishlist.json files,
+    rewritten in full on every change (via temp file + rename, guarded by
+    a lock file).
+
+Config (env):
+  CART_STORAGE  "sqlite" (default) or "json"
+  CART_DB_PATH  SQLite file (default backend/data/cart.db)
+
+Migrate existing JSON data with:
+  python -m backend.cart_storage migrate [--cart cart.json] [--wishlist wishlist.json] [--db cart.db]
+(A new SQLite database is seeded from the JSON files automatically, once:
+the import is recorded in the database's PRAGMA user_version.)
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BASE = Path(__file__).parent
+CART_FILE = BASE / "data" / "cart.json"
+WISHLIST_FILE = BASE / "data" / "wishlist.json"
+DB_FILE = BASE / "data" / "cart.db"
+
+
+class CartTxn:
+    """
+    One user's cart and wishlist inside a storage transaction.
+    Each part is loaded on first access; every part that was accessed is
+    written back on commit (in-place edits and reassignment both work).
+    """
+
+    def __init__(self, user_id: str,
+                 load_cart: Callable[[], List[Dict[str, Any]]],
+                 load_wishlist: Callable[[], List[str]]):
+        self.user_id = user_id
+        self._load_cart = load_cart
+        self._load_wishlist = load_wishlist
+        self._cart: Optional[List[Dict[str, Any]]] = None
+        self._wishlist: Optional[List[str]] = None
+
+    @property
+    def cart(self) -> List[Dict[str, Any]]:
+        if self._cart is None:
+            self._cart = self._load_cart()
+        return self._cart
+
+    @cart.setter
+    def cart(self, items: List[Dict[str, Any]]) -> None:
+        self._cart = list(items)
+
+    @property
+    def wishlist(self) -> List[str]:
+        if self._wishlist is None:
+            self._wishlist = self._load_wishlist()
+        return self._wishlist
+
+    @wishlist.setter
+    def wishlist(self, product_ids: List[str]) -> None:
+        self._wishlist = list(product_ids)
+
+    @property
+    def touched_cart(self) -> Optional[List[Dict[str, Any]]]:
+        return self._cart
+
+    @property
+    def touched_wishlist(self) -> Optional[List[str]]:
+        return self._wishlist
+
+
+class CartStore:
+    """Interface every cart/wishlist backend implements."""
+
+    def transaction(self, user_id: str) -> Iterator[CartTxn]:
+        """Context manager: exclusive, atomic read-modify-write of one user's data."""
+        raise NotImplementedError
+
+    def get_cart(self, user_id: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def get_wishlist(self, user_id: str) -> List[str]:
+        raise NotImplementedError
+
+    def set_cart(self, user_id: str, items: List[Dict[str, Any]]) -> None:
+        with self.transaction(user_id) as txn:
+            txn.cart = items
+
+    def set_wishlist(self, user_id: str, product_ids: List[str]) -> None:
+        with self.transaction(user_id) as txn:
+            txn.wishlist = product_ids
+
+
+# ---------------- Legacy JSON backend ----------------
+
+@contextmanager
+def _file_lock(path: Path):
+    """Exclusive advisory lock on `path` (held across processes)."""
+    with open(path, "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _atomic_write_json(path: Path, data) -> None:
+    """Write JSON to a temp file next to `path`, then rename it into place."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class JSONCartStore(CartStore):
+    """Original whole-file JSON storage (cart.json / wishlist.json)."""
+
+    def __init__(self, cart_file: Path = None, wishlist_file: Path = None):
+        self.cart_file = Path(cart_file or CART_FILE)
+        self.wishlist_file = Path(wishlist_file or WISHLIST_FILE)
+        self.lock_file = self.cart_file.with_name(".cart_wishlist.lock")
+        self._lock = threading.Lock()
+        self._ensure_files()
+
+    def _ensure_files(self):
+        """Create the data folder and empty JSON files if missing."""
+        for path in (self.cart_file, self.wishlist_file):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if not path.exists():
+                path.write_text(json.dumps({}, ensure_ascii=False), encoding="utf-8")
+
+    def read_all_carts(self) -> Dict[str, List[Dict[str, Any]]]:
+        return _read_json(self.cart_file)
+
+    def read_all_wishlists(self) -> Dict[str, List[str]]:
+        return _read_json(self.wishlist_file)
+
+    def get_cart(self, user_id: str) -> List[Dict[str, Any]]:
+        return self.read_all_carts().get(user_id, [])
+
+    def get_wishlist(self, user_id: str) -> List[str]:
+        return self.read_all_wishlists().get(user_id, [])
+
+    @contextmanager
+    def transaction(self, user_id: str) -> Iterator[CartTxn]:
+        # Whole-file storage: every transaction takes the same (thread + file) lock
+        with self._lock, _file_lock(self.lock_file):
+            carts: Dict[str, Any] = {}
+            wishes: Dict[str, Any] = {}
+
+            def load_cart():
+                carts.update(self.read_all_carts())
+                return carts.get(user_id, [])
+
+            def load_wishlist():
+                wishes.update(self.read_all_wishlists())
+                return wishes.get(user_id, [])
+
+            txn = CartTxn(user_id, load_cart, load_wishlist)
+            yield txn
+
+            if txn.touched_cart is not None:
+                if not carts:
+                    carts.update(self.read_all_carts())
+                carts[user_id] = txn.touched_cart
+                _atomic_write_json(self.cart_file, carts)
+            if txn.touched_wishlist is not None:
+                if not wishes:
+                    wishes.update(self.read_all_wishlists())
+                wishes[user_id] = txn.touched_wishlist
+                _atomic_write_json(self.wishlist_file, wishes)
+
+
+# ---------------- SQLite backend ----------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cart_items (
+    user_id    TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    quantity   INTEGER NOT NULL,
+    position   INTEGER NOT NULL,
+    PRIMARY KEY (user_id, product_id)
+);
+CREATE TABLE IF NOT EXISTS wishlist_items (
+    user_id    TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    position   INTEGER NOT NULL,
+    PRIMARY KEY (user_id, product_id)
+);
+"""
+LEGACY_IMPORTED = 1  # PRAGMA user_version once the legacy JSON files have been imported
+
+
+class SQLiteCartStore(CartStore):
+    """Per-user row storage in SQLite (WAL mode, one connection per thread)."""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or DB_FILE)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly in transaction()
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_cart(self, user_id: str) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT product_id, quantity FROM cart_items WHERE user_id = ? ORDER BY position",
+            (user_id,),
+        ).fetchall()
+        return [{"product_id": pid, "quantity": qty} for pid, qty in rows]
+
+    def get_wishlist(self, user_id: str) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT product_id FROM wishlist_items WHERE user_id = ? ORDER BY position",
+            (user_id,),
+        ).fetchall()
+        return [pid for (pid,) in rows]
+
+    @contextmanager
+    def transaction(self, user_id: str) -> Iterator[CartTxn]:
+        conn = self._conn()
+        # BEGIN IMMEDIATE takes SQLite's write lock up front, so the read below
+        # cannot be interleaved with another thread's or worker's write
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            txn = CartTxn(user_id, lambda: self.get_cart(user_id), lambda: self.get_wishlist(user_id))
+            yield txn
+
+            if txn.touched_cart is not None:
+                conn.execute("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cart_items (user_id, product_id, quantity, position) VALUES (?, ?, ?, ?)",
+                    [(user_id, item["product_id"], item["quantity"], pos)
+                     for pos, item in enumerate(txn.touched_cart)],
+                )
+            if txn.touched_wishlist is not None:
+                conn.execute("DELETE FROM wishlist_items WHERE user_id = ?", (user_id,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO wishlist_items (user_id, product_id, position) VALUES (?, ?, ?)",
+                    [(user_id, pid, pos) for pos, pid in enumerate(txn.touched_wishlist)],
+                )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def is_empty(self) -> bool:
+        conn = self._conn()
+        return not (conn.execute("SELECT 1 FROM cart_items LIMIT 1").fetchone()
+                    or conn.execute("SELECT 1 FROM wishlist_items LIMIT 1").fetchone())
+
+    def legacy_imported(self) -> bool:
+        return self._conn().execute("PRAGMA user_version").fetchone()[0] >= LEGACY_IMPORTED
+
+    def mark_legacy_imported(self) -> None:
+        self._conn().execute(f"PRAGMA user_version = {LEGACY_IMPORTED}")
+
+
+# ---------------- Migration ----------------
+
+def migrate_json_to_sqlite(cart_file: Path = None, wishlist_file: Path = None,
+                           db_path: Path = None) -> Dict[str, int]:
+    """Copy every user's cart and wishlist from the JSON files into the SQLite store."""
+    source = JSONCartStore(cart_file, wishlist_file)
+    target = SQLiteCartStore(db_path or DB_FILE)
+    carts = source.read_all_carts()
+    wishes = source.read_all_wishlists()
+    for user_id, items in carts.items():
+        target.set_cart(user_id, items)
+    for user_id, product_ids in wishes.items():
+        target.set_wishlist(user_id, product_ids)
+    target.mark_legacy_imported()
+    return {"carts": len(carts), "wishlists": len(wishes)}
+
+
+def create_store() -> CartStore:
+    """Build the backend selected by CART_STORAGE / CART_DB_PATH."""
+    kind = os.getenv("CART_STORAGE", "sqlite").lower()
+    if kind == "json":
+        return JSONCartStore()
+    if kind != "sqlite":
+        raise ValueError(f"Unknown CART_STORAGE: {kind}")
+
+    db_path = Path(os.getenv("CART_DB_PATH", DB_FILE))
+    store = SQLiteCartStore(db_path)
+    # Seed a fresh database from the legacy JSON files so no carts are lost on switch-over.
+    # One-shot: afterwards an empty database just means every cart was emptied.
+    if not store.legacy_imported():
+        # A database that already holds data was seeded before the marker existed
+        if store.is_empty() and (CART_FILE.exists() or WISHLIST_FILE.exists()):
+            migrate_json_to_sqlite(CART_FILE, WISHLIST_FILE, db_path)
+        store.mark_legacy_imported()
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cart/wishlist storage tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Import cart.json / wishlist.json into SQLite")
+    migrate.add_argument("--cart", default=str(CART_FILE))
+    migrate.add_argument("--wishlist", default=str(WISHLIST_FILE))
+    migrate.add_argument("--db", default=os.getenv("CART_DB_PATH", str(DB_FILE)))
+    args = parser.parse_args()
+
+    counts = migrate_json_to_sqlite(Path(args.cart), Path(args.wishlist), Path(args.db))
+    print(f"✅ Migrated {counts['carts']} carts and {counts['wishlists']} wishlists into {args.db}")
@@ -1,85 +1,54 @@
 """
 backend/cart_wishlist.py
 
-Simple, file-backed (JSON) cart & wishlist utilities + FastAPI helper endpoints.
-- Uses a Lock to avoid concurrent writes corrupting the JSON files.
-- Data layout:
-  cart.json: { "<user_id>": [ {"product_id": "...", "quantity": 2}, ... ], ... }
-  wishlist.json: { "<user_id>": [ "product_id1", "product_id2", ... ], ... }
-
-Note: This is intentionally simple for a student project / prototype.
-You can later replace JSON storage with a proper DB (Postgres/Mongo).
+Cart & wishlist utilities used by the FastAPI endpoints in main.py.
+- Storage is pluggable (see cart_storage.py): SQLite with per-user rows by
+  default, or the legacy whole-file JSON backend (CART_STORAGE=json).
+- hydrate_cart() adds product records, line totals and cart totals from the
+  catalog's precomputed price arrays (GET /cart/{user_id}?hydrate=true).
+- Batch functions (apply_cart_batch / apply_wishlist_batch /
+  move_all_wishlist_to_cart) apply many changes in one transaction.
+- Data layout (per user):
+  cart: [ {"product_id": "...", "quantity": 2}, ... ]
+  wishlist: [ "product_id1", "product_id2", ... ]
 """
 
-import json
-from pathlib import Path
+from contextlib import contextmanager
 from threading import Lock
-from typing import List, Dict, Any
-
-# File paths relative to this module
-BASE = Path(__file__).parent
-CART_FILE = BASE / "data" / "cart.json"
-WISHLIST_FILE = BASE / "data" / "wishlist.json"
-
-# Locks to prevent concurrent read/write corruption
-_cart_lock = Lock()
-_wishlist_lock = Lock()
-
-# Helper: ensure data directory & files exist (called on import)
-def _ensure_files():
-    """
-    Make sure the data folder and JSON files exist.
-    If files don't exist, create them with empty JSON objects.
-    """
-    data_dir = BASE / "data"
-    data_dir.mkdir(parents=True, exist_ok=True)
-    if not CART_FILE.exists():
-        CART_FILE.write_text(json.dumps({}, ensure_ascii=False), encoding="utf-8")
-    if not WISHLIST_FILE.exists():
-        WISHLIST_FILE.write_text(json.dumps({}, ensure_ascii=False), encoding="utf-8")
-
-# Read-cart (thread-safe)
-def _read_cart() -> Dict[str, List[Dict[str, Any]]]:
-    """Return the whole cart JSON as dict (user_id -> list of items)."""
-    with _cart_lock:
-        with open(CART_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-
-# Write-cart (thread-safe)
-def _write_cart(data: Dict[str, List[Dict[str, Any]]]) -> None:
-    """Overwrite the cart JSON file atomically (under a lock)."""
-    with _cart_lock:
-        with open(CART_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-
-# Read-wishlist (thread-safe)
-def _read_wishlist() -> Dict[str, List[str]]:
-    """Return the whole wishlist JSON as dict (user_id -> list of product_ids)."""
-    with _wishlist_lock:
-        with open(WISHLIST_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-
-# Write-wishlist (thread-safe)
-def _write_wishlist(data: Dict[str, List[str]]) -> None:
-    """Overwrite the wishlist JSON file atomically (under a lock)."""
-    with _wishlist_lock:
-        with open(WISHLIST_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+from typing import Dict, Any, Iterator, List
 
-# Utility: add item to cart
-def add_to_cart(user_id: str, product_id: str, quantity: int = 1) -> Dict[str, Any]:
-    """
-    Add product to user's cart with given quantity.
-    If product exists, increment quantity.
-    Returns the new cart for the user.
+import numpy as np
+
+from backend.cart_storage import CartStore, CartTxn, create_store
+from backend.metrics import span
+
+# Active storage backend (created on import)
+store: CartStore = create_store()
+
+# Striped per-user locks: requests for the same user queue up, different
+# users (almost always) land on different stripes and run in parallel.
+# The store's own transaction covers other processes (uvicorn workers).
+_LOCK_STRIPES = 64
+_user_locks = [Lock() for _ in range(_LOCK_STRIPES)]
+
+@contextmanager
+def cart_txn(user_id: str) -> Iterator[CartTxn]:
     """
-    if quantity <= 0:
-        raise ValueError("Quantity must be >= 1")
+    Atomic read-modify-write of one user's cart + wishlist:
+
+        with cart_txn(user_id) as txn:
+            txn.cart.append({...})
+            txn.wishlist.remove(pid)
 
-    carts = _read_cart()
-    user_cart = carts.get(user_id, [])
+    Changes are committed together when the block exits (or discarded on error).
+    """
+    # Timed as the "cart_txn" stage on /metrics: lock wait + storage read/write
+    with span("cart_txn"), _user_locks[hash(user_id) % _LOCK_STRIPES]:
+        with store.transaction(user_id) as txn:
+            yield txn
 
-    # Find existing item
+def _add_item(user_cart: List[Dict[str, Any]], product_id: str, quantity: int) -> None:
+    """Increment an existing line or append a new one (in place)."""
     for item in user_cart:
         if item["product_id"] == product_id:
             item["quantity"] += quantity
@@ -88,9 +57,19 @@ def add_to_cart(user_id: str, product_id: str, quantity: int = 1) -> Dict[str, A
         # not found -> append new item
         user_cart.append({"product_id": product_id, "quantity": quantity})
 
-    carts[user_id] = user_cart
-    _write_cart(carts)
-    return {"user_id": user_id, "cart": user_cart}
+# Utility: add item to cart
+def add_to_cart(user_id: str, product_id: str, quantity: int = 1) -> Dict[str, Any]:
+    """
+    Add product to user's cart with given quantity.
+    If product exists, increment quantity.
+    Returns the new cart for the user.
+    """
+    if quantity <= 0:
+        raise ValueError("Quantity must be >= 1")
+
+    with cart_txn(user_id) as txn:
+        _add_item(txn.cart, product_id, quantity)
+        return {"user_id": user_id, "cart": txn.cart}
 
 # Utility: remove item from cart (entirely)
 def remove_from_cart(user_id: str, product_id: str) -> Dict[str, Any]:
@@ -98,12 +77,9 @@ def remove_from_cart(user_id: str, product_id: str) -> Dict[str, Any]:
     Remove a product from the user's cart completely.
     Returns the updated cart.
     """
-    carts = _read_cart()
-    user_cart = carts.get(user_id, [])
-    new_cart = [item for item in user_cart if item["product_id"] != product_id]
-    carts[user_id] = new_cart
-    _write_cart(carts)
-    return {"user_id": user_id, "cart": new_cart}
+    with cart_txn(user_id) as txn:
+        txn.cart = [item for item in txn.cart if item["product_id"] != product_id]
+        return {"user_id": user_id, "cart": txn.cart}
 
 # Utility: update quantity (set exact quantity; if 0 -> remove)
 def update_cart_quantity(user_id: str, product_id: str, quantity: int) -> Dict[str, Any]:
@@ -113,41 +89,82 @@ def update_cart_quantity(user_id: str, product_id: str, quantity: int) -> Dict[s
     if quantity < 0:
         raise ValueError("Quantity must be >= 0")
 
-    carts = _read_cart()
-    user_cart = carts.get(user_id, [])
-    found = False
-    new_cart = []
-    for item in user_cart:
-        if item["product_id"] == product_id:
-            found = True
-            if quantity > 0:
-                new_cart.append({"product_id": product_id, "quantity": quantity})
-            # else skip -> remove
-        else:
-            new_cart.append(item)
+    with cart_txn(user_id) as txn:
+        found = False
+        new_cart = []
+        for item in txn.cart:
+            if item["product_id"] == product_id:
+                found = True
+                if quantity > 0:
+                    new_cart.append({"product_id": product_id, "quantity": quantity})
+                # else skip -> remove
+            else:
+                new_cart.append(item)
 
-    # if not found and quantity>0, add it
-    if (not found) and quantity > 0:
-        new_cart.append({"product_id": product_id, "quantity": quantity})
+        # if not found and quantity>0, add it
+        if (not found) and quantity > 0:
+            new_cart.append({"product_id": product_id, "quantity": quantity})
 
-    carts[user_id] = new_cart
-    _write_cart(carts)
-    return {"user_id": user_id, "cart": new_cart}
+        txn.cart = new_cart
+        return {"user_id": user_id, "cart": new_cart}
 
 # Utility: get user cart
 def get_cart(user_id: str) -> Dict[str, Any]:
     """Return the cart content for given user_id (empty list if none)."""
-    carts = _read_cart()
-    return {"user_id": user_id, "cart": carts.get(user_id, [])}
+    return {"user_id": user_id, "cart": store.get_cart(user_id)}
 
 # Utility: clear cart
 def clear_cart(user_id: str) -> Dict[str, Any]:
     """Empty the user's cart."""
-    carts = _read_cart()
-    carts[user_id] = []
-    _write_cart(carts)
+    with cart_txn(user_id) as txn:
+        txn.cart = []
     return {"user_id": user_id, "cart": []}
 
+# Utility: cart with product details and totals
+def hydrate_cart(cart: Dict[str, Any], catalog) -> Dict[str, Any]:
+    """
+    Add to a get_cart() result, per line: the product record, unit/list price,
+    line total and line discount; and for the cart: item count, subtotal
+    (list prices), discount and total. Prices come from the catalog's numeric
+    arrays (parsed once at load), so nothing is re-parsed per request.
+    Products no longer in the catalog are returned with "available": False
+    and left out of the totals.
+    """
+    lines = cart["cart"]
+    rows = catalog.rows(item["product_id"] for item in lines)
+    quantities = np.fromiter((item["quantity"] for item in lines), dtype=np.int64, count=len(lines))
+    known = rows >= 0
+    unit = np.zeros(len(lines))
+    listed = np.zeros(len(lines))
+    unit[known] = catalog.sale_prices[rows[known]]
+    listed[known] = catalog.list_prices[rows[known]]
+    line_totals = unit * quantities
+    line_discounts = (listed - unit) * quantities
+
+    items = []
+    for i, item in enumerate(lines):
+        items.append({
+            **item,
+            "available": bool(known[i]),
+            "product": catalog.get(item["product_id"]),
+            "unit_price": round(float(unit[i]), 2),
+            "list_price": round(float(listed[i]), 2),
+            "line_total": round(float(line_totals[i]), 2),
+            "line_discount": round(float(line_discounts[i]), 2),
+        })
+    total = float(line_totals.sum())
+    discount = float(line_discounts.sum())
+    return {
+        **cart,
+        "cart": items,
+        "totals": {
+            "items": int(quantities[known].sum()),
+            "subtotal": round(total + discount, 2),
+            "discount": round(discount, 2),
+            "total": round(total, 2),
+        },
+    }
+
 # ---------------- WISHLIST FUNCTIONS ----------------
 
 def add_to_wishlist(user_id: str, product_id: str) -> Dict[str, Any]:
@@ -155,43 +172,135 @@ def add_to_wishlist(user_id: str, product_id: str) -> Dict[str, Any]:
     Add product_id to user's wishlist. No duplicates allowed.
     Returns updated wishlist for the user.
     """
-    wishes = _read_wishlist()
-    user_wish = wishes.get(user_id, [])
-    if product_id not in user_wish:
-        user_wish.append(product_id)
-    wishes[user_id] = user_wish
-    _write_wishlist(wishes)
-    return {"user_id": user_id, "wishlist": user_wish}
+    with cart_txn(user_id) as txn:
+        if product_id not in txn.wishlist:
+            txn.wishlist.append(product_id)
+        return {"user_id": user_id, "wishlist": txn.wishlist}
 
 def remove_from_wishlist(user_id: str, product_id: str) -> Dict[str, Any]:
     """
     Remove product_id from user's wishlist.
     """
-    wishes = _read_wishlist()
-    user_wish = wishes.get(user_id, [])
-    user_wish = [pid for pid in user_wish if pid != product_id]
-    wishes[user_id] = user_wish
-    _write_wishlist(wishes)
-    return {"user_id": user_id, "wishlist": user_wish}
+    with cart_txn(user_id) as txn:
+        txn.wishlist = [pid for pid in txn.wishlist if pid != product_id]
+        return {"user_id": user_id, "wishlist": txn.wishlist}
 
 def get_wishlist(user_id: str) -> Dict[str, Any]:
     """Return wishlist for the user."""
-    wishes = _read_wishlist()
-    return {"user_id": user_id, "wishlist": wishes.get(user_id, [])}
+    return {"user_id": user_id, "wishlist": store.get_wishlist(user_id)}
 
 def move_wishlist_to_cart(user_id: str, product_id: str, quantity: int = 1) -> Dict[str, Any]:
     """
-    Move an item from wishlist to cart:
+    Move an item from wishlist to cart in one transaction:
       - remove from wishlist
       - add to cart with given quantity
     Returns both updated wishlist and cart.
     """
-    # remove from wishlist
-    remove_from_wishlist(user_id, product_id)
-    # add to cart
-    cart_state = add_to_cart(user_id, product_id, quantity)
-    wish_state = get_wishlist(user_id)
-    return {"user_id": user_id, "cart": cart_state["cart"], "wishlist": wish_state["wishlist"]}
+    if quantity <= 0:
+        raise ValueError("Quantity must be >= 1")
+
+    with cart_txn(user_id) as txn:
+        txn.wishlist = [pid for pid in txn.wishlist if pid != product_id]
+        _add_item(txn.cart, product_id, quantity)
+        return {"user_id": user_id, "cart": txn.cart, "wishlist": txn.wishlist}
+
+# ---------------- BATCH OPERATIONS ----------------
+# Many changes for one user (e.g. syncing a guest cart at login) in a single
+# storage transaction: one read, one write, and either all ops apply or none.
+
+MAX_BATCH_OPERATIONS = 500
+
+CART_BATCH_OPS = ("add", "remove", "set")
+WISHLIST_BATCH_OPS = ("add", "remove", "move_to_cart")
+
+def _validate_batch(operations: List[Dict[str, Any]], allowed_ops) -> None:
+    """Reject the whole batch up front, before any lock is taken."""
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ValueError(f"At most {MAX_BATCH_OPERATIONS} operations per batch")
+    for i, op in enumerate(operations):
+        kind = op.get("op")
+        if kind not in allowed_ops:
+            raise ValueError(f"Operation {i}: unknown op {kind!r} (expected one of {', '.join(allowed_ops)})")
+        if not op.get("product_id"):
+            raise ValueError(f"Operation {i}: product_id is required")
+        quantity = op.get("quantity", 1)
+        if kind in ("add", "move_to_cart") and quantity <= 0:
+            raise ValueError(f"Operation {i}: Quantity must be >= 1")
+        if kind == "set" and quantity < 0:
+            raise ValueError(f"Operation {i}: Quantity must be >= 0")
+
+def _cart_lines(cart: List[Dict[str, Any]]) -> Dict[str, int]:
+    # product_id -> quantity, in cart order (dicts keep insertion order)
+    lines: Dict[str, int] = {}
+    for item in cart:
+        lines[item["product_id"]] = lines.get(item["product_id"], 0) + item["quantity"]
+    return lines
+
+def _cart_items(lines: Dict[str, int]) -> List[Dict[str, Any]]:
+    return [{"product_id": pid, "quantity": qty} for pid, qty in lines.items()]
+
+def apply_cart_batch(user_id: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply cart operations in order, atomically:
+      {"op": "add",    "product_id": "...", "quantity": 2}  -> increment (same as add_to_cart)
+      {"op": "set",    "product_id": "...", "quantity": 0}  -> exact quantity, 0 removes (update_cart_quantity)
+      {"op": "remove", "product_id": "..."}                 -> remove the line (remove_from_cart)
+    Raises ValueError (nothing applied) if any operation is invalid.
+    Returns the final cart.
+    """
+    _validate_batch(operations, CART_BATCH_OPS)
+
+    with cart_txn(user_id) as txn:
+        lines = _cart_lines(txn.cart)
+        for op in operations:
+            pid, kind, quantity = op["product_id"], op["op"], op.get("quantity", 1)
+            if kind == "add":
+                lines[pid] = lines.get(pid, 0) + quantity
+            elif kind == "set" and quantity > 0:
+                lines[pid] = quantity
+            else:
+                lines.pop(pid, None)
+        txn.cart = _cart_items(lines)
+        return {"user_id": user_id, "cart": txn.cart}
+
+def apply_wishlist_batch(user_id: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply wishlist operations in order, atomically:
+      {"op": "add",          "product_id": "..."}
+      {"op": "remove",       "product_id": "..."}
+      {"op": "move_to_cart", "product_id": "...", "quantity": 1}
+    Raises ValueError (nothing applied) if any operation is invalid.
+    Returns the final wishlist and cart.
+    """
+    _validate_batch(operations, WISHLIST_BATCH_OPS)
+
+    with cart_txn(user_id) as txn:
+        wishlist = dict.fromkeys(txn.wishlist)  # ordered set
+        lines = _cart_lines(txn.cart)
+        for op in operations:
+            pid, kind = op["product_id"], op["op"]
+            if kind == "add":
+                wishlist.setdefault(pid)
+            else:
+                wishlist.pop(pid, None)
+                if kind == "move_to_cart":
+                    lines[pid] = lines.get(pid, 0) + op.get("quantity", 1)
+        txn.wishlist = list(wishlist)
+        txn.cart = _cart_items(lines)
+        return {"user_id": user_id, "wishlist": txn.wishlist, "cart": txn.cart}
+
+def move_all_wishlist_to_cart(user_id: str, quantity: int = 1) -> Dict[str, Any]:
+    """
+    Move every wishlist item to the cart (each with `quantity`) in one
+    transaction. Returns both the (now empty) wishlist and the cart.
+    """
+    if quantity <= 0:
+        raise ValueError("Quantity must be >= 1")
 
-# Ensure files exist when module is imported
-_ensure_files()
+    with cart_txn(user_id) as txn:
+        lines = _cart_lines(txn.cart)
+        for pid in txn.wishlist:
+            lines[pid] = lines.get(pid, 0) + quantity
+        txn.wishlist = []
+        txn.cart = _cart_items(lines)
+        return {"user_id": user_id, "cart": txn.cart, "wishlist": []}
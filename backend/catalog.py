@@ -0,0 +1,188 @@
+"""
+backend/catalog.py
+
+In-memory product catalog, loaded once at startup.
+
+Builds lookup indexes over products.json so request handlers never have to
+re-read the file or scan every product:
+  - by_id:       product_id -> product record
+  - category_rows: lowercase category -> numpy array of catalog rows
+    (uncategorized_rows: products without one, which pass every category filter)
+  - sale_prices / list_prices: numpy price arrays by catalog row, so price
+    filters and cart totals never re-parse currency strings
+
+Filters are answered as one boolean numpy mask over catalog rows
+(filter_mask), which BM25, FAISS and the fuzzy index all take directly.
+
+When a fresh columnar copy of products.json exists (backend/catalog_store.py,
+written by rebuild_vectorstore.py) it is memory-mapped instead of parsing
+the JSON: products become lightweight read-only views and the prices come
+pre-parsed.
+
+Config (env):
+  CATALOG_COLUMNAR  load the columnar copy when it is up to date (default 1)
+"""
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+DATA_FILE = Path(__file__).parent / "data" / "products.json"
+CATALOG_COLUMNAR = os.getenv("CATALOG_COLUMNAR", "1") != "0"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def parse_price(raw_price) -> float:
+    """Turn a price like "₹1,299" / "1299.00" / 1299 into a float (0.0 if unparseable)."""
+    if isinstance(raw_price, (int, float)):
+        return float(raw_price)
+    cleaned = "".join(ch for ch in str(raw_price or "") if ch.isdigit() or ch == ".")
+    try:
+        return float(cleaned) if cleaned else 0.0
+    except ValueError:
+        return 0.0
+
+
+def product_price(product: Dict[str, Any]) -> float:
+    """Selling price of a product: explicit `price`, else discounted, else actual price."""
+    for key in ("price", "discounted_price", "actual_price"):
+        if product.get(key) not in (None, ""):
+            return parse_price(product[key])
+    return 0.0
+
+
+def product_list_price(product: Dict[str, Any], sale_price: float) -> float:
+    """Undiscounted (MRP) price: `actual_price` if known, never below the selling price."""
+    actual = parse_price(product.get("actual_price"))
+    return max(actual, sale_price)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens of a string."""
+    return _TOKEN_RE.findall(str(text or "").lower())
+
+
+class Catalog:
+    """Read-only product catalog with precomputed indexes."""
+
+    def __init__(self, products: Iterable[Dict[str, Any]], sale_prices: Optional[np.ndarray] = None,
+                 list_prices: Optional[np.ndarray] = None):
+        """
+        `sale_prices` / `list_prices` may be given pre-parsed (one per product,
+        in order, for products that are already unique and have an id).
+        """
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        for p in products:
+            pid = p.get("product_id")
+            if pid:
+                self.by_id[pid] = p
+
+        # Catalog rows: ids[row] is the product at that row, order[product_id] its row
+        self.ids: List[str] = list(self.by_id)
+        self.order: Dict[str, int] = {pid: i for i, pid in enumerate(self.ids)}
+
+        categories: Dict[str, List[int]] = {}
+        uncategorized: List[int] = []
+        for row, p in enumerate(self.by_id.values()):
+            category = p.get("category")
+            if category:
+                categories.setdefault(str(category).lower(), []).append(row)
+            else:
+                uncategorized.append(row)
+
+        # Ascending rows per category
+        self.category_rows: Dict[str, np.ndarray] = {
+            category: np.asarray(rows, dtype=np.int64) for category, rows in categories.items()
+        }
+        # Products without a category pass any category filter (as passes_filters did)
+        self.uncategorized_rows = np.asarray(uncategorized, dtype=np.int64)
+
+        # Selling / list price per catalog row, parsed once here
+        if sale_prices is not None:
+            self.sale_prices = np.asarray(sale_prices, dtype=np.float64)
+        else:
+            self.sale_prices = np.fromiter((product_price(p) for p in self.by_id.values()),
+                                           dtype=np.float64, count=len(self.ids))
+        if list_prices is not None:
+            self.list_prices = np.asarray(list_prices, dtype=np.float64)
+        else:
+            self.list_prices = np.fromiter(
+                (product_list_price(p, price) for p, price in zip(self.by_id.values(), self.sale_prices.tolist())),
+                dtype=np.float64, count=len(self.ids),
+            )
+
+    # ---------------- Lookups ----------------
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self.by_id
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(product_id)
+
+    def values(self) -> List[Dict[str, Any]]:
+        return list(self.by_id.values())
+
+    def rows(self, product_ids: Iterable[str]) -> np.ndarray:
+        """Catalog row of each product_id (-1 if unknown), for indexing the price arrays."""
+        return np.fromiter((self.order.get(pid, -1) for pid in product_ids), dtype=np.int64)
+
+    def ids_where(self, mask: np.ndarray) -> List[str]:
+        """Product ids of the rows set in a filter mask, in catalog order."""
+        ids = self.ids
+        return [ids[row] for row in np.flatnonzero(mask).tolist()]
+
+    # ---------------- Index queries ----------------
+
+    def filter_mask(self, category: str = None, min_price: float = None,
+                    max_price: float = None) -> Optional[np.ndarray]:
+        """
+        Boolean mask over catalog rows of the products passing the filters:
+        category matches exactly (case-insensitive) or the product has none,
+        min_price <= price <= max_price.
+        Returns None when no filter is given (i.e. everything passes).
+        """
+        if not category and min_price is None and max_price is None:
+            return None
+        if category:
+            mask = np.zeros(len(self.ids), dtype=bool)
+            rows = self.category_rows.get(str(category).lower())
+            if rows is not None:
+                mask[rows] = True
+            mask[self.uncategorized_rows] = True
+        else:
+            mask = np.ones(len(self.ids), dtype=bool)
+        if min_price is not None:
+            mask &= self.sale_prices >= min_price
+        if max_price is not None:
+            mask &= self.sale_prices <= max_price
+        return mask
+
+
+def catalog_files(path: Path = DATA_FILE) -> List[Path]:
+    """Files a loaded catalog depends on (for change detection)."""
+    from backend.catalog_store import columns_dir
+
+    return [Path(path), columns_dir(path) / "meta.json"]
+
+
+def load_catalog(path: Path = DATA_FILE) -> Catalog:
+    """Load the catalog (columnar copy if up to date, else products.json) and build its indexes."""
+    from backend import catalog_store
+
+    if CATALOG_COLUMNAR and catalog_store.is_fresh(path):
+        table = catalog_store.load_columnar(path)
+        return Catalog(table.views(), sale_prices=table.sale_price, list_prices=table.list_price)
+    if CATALOG_COLUMNAR and catalog_store.columns_dir(path).exists():
+        logging.warning(f"Columnar catalog is older than {Path(path).name}, parsing the JSON instead "
+                        f"(rebuild with: python -m backend.catalog_store)")
+    with open(path, "r", encoding="utf-8") as f:
+        return Catalog(json.load(f))
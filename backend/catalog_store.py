@@ -0,0 +1,323 @@
+"""
+backend/catalog_store.py
+
+Compact columnar copy of products.json, memory-mapped at load time.
+
+`json.load` of products.json turns every field of every product into its
+own Python str and re-parses the currency strings on each load. The build
+step here (run by rebuild_vectorstore.py, or on its own) writes the
+catalog once as NumPy arrays into `products.columns/` next to the JSON:
+
+  strings.npy          uint8: every distinct string value, UTF-8, concatenated
+  string_offsets.npy   int64: start of string i (plus one end offset)
+  col.<field>.npy      int32 per product: string id, -1 = key missing, -2 = null
+  layout.npy           int32 per product: which key order (meta.json "layouts") it had
+  sale_price.npy       float64 selling price  (catalog.product_price)
+  list_price.npy       float64 MRP            (catalog.product_list_price)
+  rating.npy           float32, NaN if unknown
+  rating_count.npy     int64, -1 if unknown
+  discount.npy         float32 discount percentage, NaN if unknown
+  meta.json            fields, kinds, key layouts, product count and the source fingerprint
+
+Every distinct string is stored once, so repeated values (categories,
+price strings, ratings) cost one int32 per product. Fields holding
+anything other than strings (numbers, lists, ...) are kept losslessly as
+JSON text ("json" kind) and decoded on access.
+
+load_columnar() maps every array read-only (shared by all uvicorn workers
+through the page cache) and returns ProductView objects: `__slots__`
+read-only mappings that decode a field only when it is read, so the
+catalog costs one small object per product instead of a dict of strings.
+
+Products without a product_id are dropped and duplicates collapse exactly
+as in Catalog: the last record wins, at the position of the first.
+
+  python -m backend.catalog_store [--source backend/data/products.json]
+"""
+
+import json
+import logging
+import math
+import os
+import shutil
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from backend.catalog import product_list_price, product_price
+
+FORMAT_VERSION = 1
+MISSING = -1  # string ids with a special meaning
+NULL = -2
+_ABSENT = object()
+
+
+def columns_dir(source: Path) -> Path:
+    """products.json -> products.columns/"""
+    source = Path(source)
+    return source.with_name(source.stem + ".columns")
+
+
+def source_fingerprint(source: Path) -> Optional[Dict[str, int]]:
+    try:
+        stat = Path(source).stat()
+    except FileNotFoundError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def is_fresh(source: Path) -> bool:
+    """A columnar copy exists and was built from the current products.json (or the JSON is gone)."""
+    meta_path = columns_dir(source) / "meta.json"
+    if not meta_path.exists():
+        return False
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    current = source_fingerprint(source)
+    return meta.get("version") == FORMAT_VERSION and (current is None or meta.get("source") == current)
+
+
+# ---------------- Parsing helpers ----------------
+
+def _parse_float(raw) -> float:
+    """Like catalog.parse_price, but NaN (not 0.0) when there is no number."""
+    if isinstance(raw, (int, float)):
+        return float(raw)
+    cleaned = "".join(ch for ch in str(raw or "") if ch.isdigit() or ch == ".")
+    try:
+        return float(cleaned)
+    except ValueError:
+        return math.nan
+
+
+def _parse_count(raw) -> int:
+    if isinstance(raw, (int, float)):
+        return int(raw) if raw == raw else -1  # NaN check
+    digits = "".join(ch for ch in str(raw or "") if ch.isdigit())
+    return int(digits) if digits else -1
+
+
+# ---------------- Build ----------------
+
+class _StringTable:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = self.ids[value] = len(self.ids)
+        return sid
+
+    def save(self, folder: Path) -> None:
+        encoded = [s.encode("utf-8") for s in self.ids]  # insertion order == id order
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        np.save(folder / "strings.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        np.save(folder / "string_offsets.npy", offsets)
+
+
+def build_columnar(products: Iterable[Dict[str, Any]], source: Path, folder: Optional[Path] = None) -> int:
+    """
+    Write the columnar catalog for `products` (normally streamed from
+    `source`); replaces any previous copy. Returns the number of products.
+    """
+    started = time.perf_counter()
+    folder = Path(folder or columns_dir(source))
+    fingerprint = source_fingerprint(source)
+
+    fields: Dict[str, List[Any]] = {}   # field -> raw value per product (_ABSENT if missing)
+    sale, listed, rating, rating_count, discount = [], [], [], [], []
+    rows: Dict[str, int] = {}
+    layouts: Dict[tuple, int] = {}      # distinct key orders, so views iterate like the JSON did
+    layout: List[int] = []
+    for p in products:
+        pid = p.get("product_id")
+        if not pid:
+            continue
+        row = rows.get(pid)
+        if row is None:
+            # New product: grow every column by one
+            row = rows[pid] = len(rows)
+            for values in fields.values():
+                values.append(_ABSENT)
+            for column in (layout, sale, listed, rating, rating_count, discount):
+                column.append(None)
+        for key in p:
+            if key not in fields:
+                fields[key] = [_ABSENT] * len(rows)
+        for key, values in fields.items():
+            values[row] = p[key] if key in p else _ABSENT
+        keys = tuple(p)
+        layout[row] = layouts.setdefault(keys, len(layouts))
+        price = product_price(p)
+        sale[row] = price
+        listed[row] = product_list_price(p, price)
+        rating[row] = _parse_float(p.get("rating"))
+        rating_count[row] = _parse_count(p.get("rating_count"))
+        discount[row] = _parse_float(p.get("discount_percentage"))
+    n = len(rows)
+
+    tmp = folder.with_name(folder.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    strings = _StringTable()
+    kinds = {}
+    for key, values in fields.items():
+        present = [v for v in values if v is not _ABSENT and v is not None]
+        kind = "str" if all(isinstance(v, str) for v in present) else "json"
+        kinds[key] = kind
+        column = np.empty(n, dtype=np.int32)
+        for row, value in enumerate(values):
+            if value is _ABSENT:
+                column[row] = MISSING
+            elif value is None:
+                column[row] = NULL
+            else:
+                column[row] = strings.intern(value if kind == "str" else json.dumps(value, ensure_ascii=False))
+        np.save(tmp / f"col.{key}.npy", column)
+
+    strings.save(tmp)
+    field_index = {key: i for i, key in enumerate(fields)}
+    np.save(tmp / "layout.npy", np.asarray(layout, dtype=np.int32))
+    np.save(tmp / "sale_price.npy", np.asarray(sale, dtype=np.float64))
+    np.save(tmp / "list_price.npy", np.asarray(listed, dtype=np.float64))
+    np.save(tmp / "rating.npy", np.asarray(rating, dtype=np.float32))
+    np.save(tmp / "rating_count.npy", np.asarray(rating_count, dtype=np.int64))
+    np.save(tmp / "discount.npy", np.asarray(discount, dtype=np.float32))
+    (tmp / "meta.json").write_text(json.dumps({
+        "version": FORMAT_VERSION,
+        "products": n,
+        "fields": list(fields),
+        "kinds": kinds,
+        "layouts": [[field_index[key] for key in keys] for keys in layouts],
+        "strings": len(strings.ids),
+        "source": fingerprint,
+    }, indent=2), encoding="utf-8")
+
+    # Swap directories; readers that already mapped the old files keep them until they let go
+    old = folder.with_name(folder.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if folder.exists():
+        os.replace(folder, old)
+    os.replace(tmp, folder)
+    shutil.rmtree(old, ignore_errors=True)
+    logging.info(f"Columnar catalog: {n} products, {len(strings.ids)} distinct strings "
+                 f"in {time.perf_counter() - started:.2f}s")
+    return n
+
+
+# ---------------- Load ----------------
+
+def _view(array: np.ndarray, fmt: str) -> memoryview:
+    """Flat native-typed memoryview of a (mapped) array; empty arrays get an empty view."""
+    if array.size == 0:
+        return memoryview(b"").cast(fmt)
+    return memoryview(array).cast("B").cast(fmt)
+
+
+class ColumnarProducts:
+    """The mapped arrays of one columnar catalog."""
+
+    def __init__(self, folder: Path):
+        folder = Path(folder)
+        meta = json.loads((folder / "meta.json").read_text(encoding="utf-8"))
+        self.folder = folder
+        self.fields: List[str] = meta["fields"]
+        self.kinds: Dict[str, str] = meta["kinds"]
+        self.count: int = meta["products"]
+        self.strings = np.load(folder / "strings.npy", mmap_mode="r")
+        self.offsets = np.load(folder / "string_offsets.npy", mmap_mode="r")
+        self.columns = {f: np.load(folder / f"col.{f}.npy", mmap_mode="r") for f in self.fields}
+        self.field_index: Dict[str, int] = {f: i for i, f in enumerate(self.fields)}
+        # Typed memoryviews over the same mapped pages: indexing them yields plain ints /
+        # bytes, far cheaper per field read than numpy scalars and memmap slices
+        self._blob = _view(self.strings, "B")
+        self._offsets = _view(self.offsets, "q")
+        self._column_list = [_view(self.columns[f], "i") for f in self.fields]
+        self._json = [self.kinds[f] == "json" for f in self.fields]
+        self.layouts: List[tuple] = [tuple(fields) for fields in meta["layouts"]]
+        self.layout = np.load(folder / "layout.npy", mmap_mode="r")
+        self._layout = _view(self.layout, "i")
+        self.sale_price = np.load(folder / "sale_price.npy", mmap_mode="r")
+        self.list_price = np.load(folder / "list_price.npy", mmap_mode="r")
+        self.rating = np.load(folder / "rating.npy", mmap_mode="r")
+        self.rating_count = np.load(folder / "rating_count.npy", mmap_mode="r")
+        self.discount = np.load(folder / "discount.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def string(self, sid: int) -> str:
+        return str(self._blob[self._offsets[sid]:self._offsets[sid + 1]], "utf-8")
+
+    def value(self, field: int, row: int) -> Any:
+        """Decoded value of field number `field` for `row`; _ABSENT if the product lacks it."""
+        sid = self._column_list[field][row]
+        if sid == MISSING:
+            return _ABSENT
+        if sid == NULL:
+            return None
+        text = self.string(sid)
+        return json.loads(text) if self._json[field] else text
+
+    def views(self) -> Iterator["ProductView"]:
+        for row in range(self.count):
+            yield ProductView(self, row)
+
+
+class ProductView(Mapping):
+    """Read-only dict-like product record backed by the columnar arrays."""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: ColumnarProducts, row: int):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        field = self._table.field_index.get(key)
+        if field is None:
+            raise KeyError(key)
+        value = self._table.value(field, self._row)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def _fields(self) -> tuple:
+        return self._table.layouts[self._table._layout[self._row]]
+
+    def __iter__(self) -> Iterator[str]:
+        names = self._table.fields
+        return (names[field] for field in self._fields())
+
+    def __len__(self) -> int:
+        return len(self._fields())
+
+    def to_dict(self) -> Dict[str, Any]:
+        table = self._table
+        return {table.fields[field]: table.value(field, self._row) for field in self._fields()}
+
+    def __repr__(self) -> str:
+        return f"ProductView({self.to_dict()!r})"
+
+
+def load_columnar(source: Path) -> ColumnarProducts:
+    return ColumnarProducts(columns_dir(source))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from backend.catalog import DATA_FILE
+    from backend.ingestion import iter_json_array
+
+    parser = argparse.ArgumentParser(description="Build the columnar (memory-mapped) copy of products.json")
+    parser.add_argument("--source", default=str(DATA_FILE))
+    args = parser.parse_args()
+
+    count = build_columnar(iter_json_array(Path(args.source)), Path(args.source))
+    print(f"✅ Columnar catalog written to {columns_dir(Path(args.source))} ({count} products).")
@@ -29,43 +29,123 @@
 
 
 # backend/chat_chain.py
-import os
-from dotenv import load_dotenv
+import time
 
-load_dotenv()
+from langchain_core.prompts import format_document
 
-# Gemini ke chat model ke liye import
-from langchain_google_genai import ChatGoogleGenerativeAI
-
-# RetrievalQA chain import (LLM + retriever ko combine karne ke liye)
-from langchain.chains import RetrievalQA
-
-# Hamara retriever import
-from backend.retriever import get_retriever
-
-# LLM (Gemini Pro) initialise karo
-# temperature=0.3 => model thoda creative hoga lekin mostly factual
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.3,
-    google_api_key=os.getenv("GEMINI_API_KEY"),
-)
-
-# Retriever load karo
-retriever = get_retriever()
-
-# RetrievalQA chain banate hain (retriever + LLM)
-qa_chain = RetrievalQA.from_chain_type(
-    llm=llm,
-    retriever=retriever,
-    return_source_documents=True  # Ye sources bhi return karega
-)
+# LLM, retriever aur RetrievalQA chain ab resources.py me hain (ek hi shared copy,
+# pehli zarurat par / startup warm_up me load hoti hai)
+from backend.answer_cache import answer_cache
+from backend.metrics import span, stage_latency
+from backend.resources import resources
 
 # Function jo query lega aur LLM se answer return karega
 def ask_ai(query: str):
     """
     User ka query leta hai, retriever se relevant context nikalta hai,
     LLM ko deta hai, aur final answer return karta hai.
+    Milta-julta sawaal pehle pooch chuke hain to cached answer (answer_cache.py).
+    """
+    if not answer_cache.enabled:
+        with span("qa_chain"):
+            return resources.qa_chain.invoke({"query": query})
+    # Ye embedding retriever bhi reuse karta hai (embedding cache), extra API call nahi
+    with span("embedding"):
+        embedding = resources.embeddings.embed_query(query)
+    version = resources.index.current.version
+    with span("answer_cache"):
+        cached = answer_cache.get(embedding, version)
+    if cached is not None:
+        return {**cached, "query": query, "cached": True}
+    with span("qa_chain"):
+        result = resources.qa_chain.invoke({"query": query})
+    answer_cache.put(embedding, version, result)
+    return result
+
+# Async version (/chat endpoint) - event loop block nahi karta
+async def aask_ai(query: str):
+    """
+    ask_ai ka async version: retrieval aur Gemini call dono await hote hain,
+    isliye generation ke dauraan koi worker thread hold nahi hota.
     """
-    result = qa_chain({"query": query})
+    if not answer_cache.enabled:
+        with span("qa_chain"):
+            return await resources.qa_chain.ainvoke({"query": query})
+    with span("embedding"):
+        embedding = await resources.embeddings.aembed_query(query)
+    version = resources.index.current.version
+    with span("answer_cache"):
+        cached = answer_cache.get(embedding, version)
+    if cached is not None:
+        return {**cached, "query": query, "cached": True}
+    # retrieval + Gemini generation (RetrievalQA)
+    with span("qa_chain"):
+        result = await resources.qa_chain.ainvoke({"query": query})
+    answer_cache.put(embedding, version, result)
     return result
+
+# Streaming version (/chat/stream) - pehle sources, phir LLM tokens jaise aate hain
+async def astream_ai(query: str):
+    """
+    qa_chain wala hi retriever aur prompt use karta hai, lekin answer ek saath
+    return karne ke bajaye events yield karta hai:
+      ("sources", [metadata, ...])  -> retrieval ke turant baad
+      ("token", "text chunk")       -> har LLM chunk par
+      ("done", {retrieval_ms, first_token_ms, total_ms})
+    """
+    qa_chain = resources.qa_chain
+    start = time.perf_counter()
+
+    # Cache hit: poora answer ek hi token event me, LLM call nahi
+    embedding = version = None
+    if answer_cache.enabled:
+        with span("embedding"):
+            embedding = await resources.embeddings.aembed_query(query)
+        version = resources.index.current.version
+        with span("answer_cache"):
+            cached = answer_cache.get(embedding, version)
+        if cached is not None:
+            yield "sources", [doc.metadata for doc in cached["source_documents"]]
+            yield "token", cached["result"]
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+            # Live answer jaisa hi "done" schema, taaki client ko farak na pade
+            yield "done", {"retrieval_ms": elapsed_ms, "first_token_ms": elapsed_ms, "total_ms": elapsed_ms}
+            return
+
+    with span("retrieval"):
+        docs = await qa_chain.retriever.ainvoke(query)
+    retrieval_ms = (time.perf_counter() - start) * 1000
+    yield "sources", [doc.metadata for doc in docs]
+
+    # RetrievalQA ("stuff") ka hi prompt aur context formatting, sirf public API se
+    stuff_chain = qa_chain.combine_documents_chain
+    context = stuff_chain.document_separator.join(
+        format_document(doc, stuff_chain.document_prompt) for doc in docs
+    )
+    prompt = stuff_chain.llm_chain.prompt.format_messages(
+        **{stuff_chain.document_variable_name: context, "question": query}
+    )
+
+    first_token_ms = None
+    answer = []
+    llm_start = time.perf_counter()
+    async for chunk in resources.llm.astream(prompt):
+        if not chunk.content:
+            continue
+        if first_token_ms is None:
+            first_token_ms = (time.perf_counter() - start) * 1000
+            stage_latency.observe(time.perf_counter() - llm_start, stage="llm_first_token")
+        answer.append(chunk.content)
+        yield "token", chunk.content
+    # Stream ke beech yield hote hain, isliye span() nahi; seedha histogram me
+    stage_latency.observe(time.perf_counter() - llm_start, stage="llm")
+
+    # Poora stream mila tabhi cache karo (beech me disconnect/timeout ho to nahi)
+    if embedding is not None:
+        answer_cache.put(embedding, version, {"query": query, "result": "".join(answer), "source_documents": docs})
+
+    yield "done", {
+        "retrieval_ms": round(retrieval_ms, 1),
+        "first_token_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+        "total_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
@@ -0,0 +1,38 @@
+# backend/conftest.py
+"""
+Shared pytest fixtures (no Gemini calls).
+
+app_client: TestClient for the real app in main.py, set up the way
+benchmark_app.py runs it offline: fake Gemini clients (fakes.py), a small
+synthetic catalog + index and a scratch cart store. main.py is only
+imported when a test asks for it, since importing cart_wishlist opens the
+cart store. Startup events are not run (no real warm-up / index watcher).
+"""
+from types import SimpleNamespace
+
+import pytest
+
+APP_ARGS = SimpleNamespace(
+    dim=32, seed=0, embed_latency=0.0, embed_jitter=0.0,
+    llm_tokens=8, llm_first_token=0.0, llm_token_latency=0.0, llm_jitter=0.0,
+)
+APP_PRODUCTS = 60
+
+
+@pytest.fixture(scope="session")
+def app_resources(tmp_path_factory):
+    from backend.benchmark_app import configure_app, prepare_dataset, use_dataset
+
+    workdir = tmp_path_factory.mktemp("app")
+    app, resources = configure_app(workdir, APP_ARGS)
+    use_dataset(resources, prepare_dataset(APP_PRODUCTS, workdir, APP_ARGS.dim, APP_ARGS.seed), APP_ARGS)
+    return app, resources
+
+
+@pytest.fixture
+def app_client(app_resources):
+    from fastapi.testclient import TestClient
+    from backend.answer_cache import answer_cache
+
+    answer_cache.clear()
+    return TestClient(app_resources[0])
@@ -1,11 +1,12 @@
-import json
 import os
-from langchain_community.vectorstores import FAISS
+from pathlib import Path
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.docstore.document import Document
 from dotenv import load_dotenv
 
+from backend.ingestion import build_vectorstore, iter_json_array, source_signature
+
 load_dotenv()
 
 GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -14,17 +15,13 @@ if not GOOGLE_API_KEY:
     raise ValueError("GEMINI_API_KEY environment variable is not set.")
 
 
-DATA_PATH = "data/products.json"
-VECTORESTORE_PATH = "vectorestore"
+DATA_PATH = Path(__file__).parent / "data/products.json"
+VECTORESTORE_PATH = Path(__file__).parent / "vectorestore"
 
 
 def load_product_data():
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        products = json.load(f)
-
-    docs = []
-
-    for product in products:
+    """Stream products from DATA_PATH, yielding one Document per product."""
+    for product in iter_json_array(DATA_PATH):
         content = (
             f"Product Name: {product['product_name']}\n"
             f"Category: {product['category']}\n"
@@ -36,35 +33,34 @@ def load_product_data():
             f"Product Link: {product['product_link']}\n"
         )
 
-        docs.append(
-            Document(
-                page_content=content,
-                metadata={"product_id": product["product_id"]}
-            )
+        yield Document(
+            page_content=content,
+            metadata={"product_id": product["product_id"]}
         )
 
-    return docs
-
 
 def create_vectorstore():
-    docs = load_product_data()
-
-
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
         chunk_overlap=200,
     )
 
-    chunks = text_splitter.split_documents(docs)
-
     embeddings = GoogleGenerativeAIEmbeddings(
         model="models/embedding-001",
         google_api_key=GOOGLE_API_KEY
     )
 
-    vectorstore = FAISS.from_documents(chunks, embeddings)
-
-    vectorstore.save_local(VECTORESTORE_PATH)
+    # Batched, parallel, resumable embedding (see ingestion.py). Each distinct chunk text is
+    # embedded once and a product's chunks are pooled into one vector stored under its product_id.
+    build_vectorstore(
+        load_product_data(),
+        embeddings,
+        folder=VECTORESTORE_PATH,
+        index_name="index",
+        signature=source_signature(DATA_PATH, model="models/embedding-001", text="pooled-1000-200"),
+        id_key="product_id",
+        splitter=text_splitter,
+    )
 
     print(f"Vector store created and saved at {VECTORESTORE_PATH}")
 
@@ -0,0 +1,246 @@
+"""
+backend/embedding_cache.py
+
+Query-embedding cache in front of the embeddings client.
+
+Popular search/chat queries repeat constantly, and each repeat would be a
+full round-trip to the Gemini embedding API. CachedEmbeddings wraps any
+LangChain `Embeddings` and caches `embed_query` results keyed on the
+model name + normalized query text:
+  - tier 1: bounded in-process LRU with TTL
+  - tier 2 (optional): SQLite file in WAL mode, shared by all uvicorn
+    workers on the box (set EMBEDDING_CACHE_PATH to enable); pruned on
+    open and every PRUNE_EVERY writes: expired rows first, then the
+    oldest rows beyond EMBEDDING_CACHE_MAX_ROWS
+
+aembed_query reads and writes the SQLite tier on a worker thread, so a
+busy database never blocks the event loop. Document embeddings (index
+builds) are passed straight through.
+
+Config (env):
+  EMBEDDING_CACHE_SIZE  max entries in memory (default 2048, 0 disables)
+  EMBEDDING_CACHE_TTL   entry lifetime in seconds (default 86400)
+  EMBEDDING_CACHE_PATH  SQLite file for the shared tier (default: disabled)
+  EMBEDDING_CACHE_MAX_ROWS  max rows kept in the SQLite tier (default 100000)
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from array import array
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+PRUNE_EVERY = 256  # SQLite writes between prunes
+
+
+def normalize_query(text: str) -> str:
+    """Cache key form of a query: lowercased, whitespace collapsed."""
+    return " ".join(str(text).lower().split())
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with a per-entry TTL."""
+
+    def __init__(self, max_size: int = 2048, ttl: float = 86400):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if self.ttl and time.time() - created > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteVectorCache:
+    """On-disk key -> float32 vector cache, safe to share across processes."""
+
+    def __init__(self, path: str, ttl: float = 86400, max_rows: int = 100_000):
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._writes = 0
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS query_embeddings_created ON query_embeddings (created)")
+        self._conn.commit()
+        with self._lock:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Delete expired rows, then the oldest rows over max_rows. Caller holds the lock."""
+        if self.ttl:
+            self._conn.execute("DELETE FROM query_embeddings WHERE created < ?", (time.time() - self.ttl,))
+        if self.max_rows > 0:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()
+            if count > self.max_rows:
+                self._conn.execute(
+                    "DELETE FROM query_embeddings WHERE key IN "
+                    "(SELECT key FROM query_embeddings ORDER BY created LIMIT ?)",
+                    (count - self.max_rows,),
+                )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        blob, created = row
+        if self.ttl and time.time() - created > self.ttl:
+            return None
+        return array("f", blob).tolist()
+
+    def set(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings (key, vector, created) VALUES (?, ?, ?)",
+                (key, array("f", vector).tobytes(), time.time()),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._prune()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM query_embeddings")
+            self._conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """`Embeddings` wrapper that caches query embeddings (memory LRU + optional SQLite)."""
+
+    def __init__(self, embeddings: Embeddings, model: str = "",
+                 memory: Optional[LRUCache] = None, disk: Optional[SQLiteVectorCache] = None):
+        self.embeddings = embeddings
+        self.model = model or getattr(embeddings, "model", "") or type(embeddings).__name__
+        self.memory = memory if memory is not None else LRUCache()
+        self.disk = disk
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = Lock()  # counters are bumped from many threads
+
+    def _key(self, text: str) -> str:
+        return f"{self.model}\x00{normalize_query(text)}"
+
+    def _count(self, hit: bool, disk: bool = False) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+                if disk:
+                    self.disk_hits += 1
+            else:
+                self.misses += 1
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        vector = self.memory.get(key)
+        if vector is None and self.disk is not None:
+            vector = self.disk.get(key)
+            if vector is not None:
+                self._count(True, disk=True)
+                self.memory.set(key, vector)
+                return vector
+        self._count(vector is not None)
+        return vector
+
+    async def _alookup(self, key: str) -> Optional[List[float]]:
+        # Only the in-memory tier is read on the event loop; SQLite can wait on a
+        # lock held by another worker (busy timeout), so it runs on a thread
+        vector = self.memory.get(key)
+        if vector is None and self.disk is not None:
+            vector = await asyncio.to_thread(self.disk.get, key)
+            if vector is not None:
+                self._count(True, disk=True)
+                self.memory.set(key, vector)
+                return vector
+        self._count(vector is not None)
+        return vector
+
+    def _store(self, key: str, vector: List[float]) -> None:
+        self.memory.set(key, vector)
+        if self.disk is not None:
+            self.disk.set(key, vector)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = await self._alookup(key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self.memory.set(key, vector)
+            if self.disk is not None:
+                await asyncio.to_thread(self.disk.set, key, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits, disk_hits, misses = self.hits, self.disk_hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "disk_hits": disk_hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+        }
+
+
+def cached_embeddings(embeddings: Embeddings, model: str = "") -> CachedEmbeddings:
+    """Wrap an embeddings client using the EMBEDDING_CACHE_* settings from the environment."""
+    ttl = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+    memory = LRUCache(max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")), ttl=ttl)
+    disk_path = os.getenv("EMBEDDING_CACHE_PATH")
+    max_rows = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "100000"))
+    disk = SQLiteVectorCache(disk_path, ttl=ttl, max_rows=max_rows) if disk_path else None
+    return CachedEmbeddings(embeddings, model=model, memory=memory, disk=disk)
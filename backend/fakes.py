@@ -0,0 +1,181 @@
+"""
+backend/fakes.py
+
+Deterministic local stand-ins for the Gemini clients, used by the benchmark
+suite (benchmark_app.py) so load tests run offline and give the same
+results on every run.
+
+- FakeEmbeddings replaces GoogleGenerativeAIEmbeddings: a bag-of-words
+  embedding where every token maps to a fixed pseudo-random vector (seeded
+  by the token's hash). Texts sharing words get similar vectors, so FAISS,
+  the neighbour table and the answer cache behave like they do with real
+  embeddings.
+- FakeChatModel replaces ChatGoogleGenerativeAI: a canned answer derived
+  from the prompt, returned (or streamed token by token) after a simulated
+  time-to-first-token and per-token delay.
+
+Both simulate upstream latency with time.sleep / asyncio.sleep, so the
+sync and async request paths block exactly like real API calls would.
+"""
+
+import asyncio
+import hashlib
+import random
+import time
+from threading import Lock
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from backend.catalog import tokenize
+
+EMBEDDING_DIM = 768  # same as models/embedding-001
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class SimulatedLatency:
+    """`base` seconds +- up to `jitter` seconds, from a seeded RNG."""
+
+    def __init__(self, base: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.base = base
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = Lock()
+
+    def next(self) -> float:
+        if not self.jitter:
+            return self.base
+        with self._lock:
+            return max(0.0, self.base + self._rng.uniform(-self.jitter, self.jitter))
+
+    def sleep(self) -> None:
+        delay = self.next()
+        if delay:
+            time.sleep(delay)
+
+    async def asleep(self) -> None:
+        delay = self.next()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+# ---------------- Embeddings ----------------
+
+class FakeEmbeddings(Embeddings):
+    """Bag-of-words embeddings with simulated per-request latency."""
+
+    def __init__(self, size: int = EMBEDDING_DIM, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.size = size
+        self.seed = seed
+        self.latency = SimulatedLatency(latency, jitter, seed)
+        self.calls = 0
+        self._tokens: Dict[str, np.ndarray] = {}
+        self._lock = Lock()
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vector = self._tokens.get(token)
+        if vector is None:
+            rng = np.random.default_rng(_seed(f"{self.seed}:{token}"))
+            vector = rng.standard_normal(self.size).astype(np.float32)
+            with self._lock:
+                self._tokens[token] = vector
+        return vector
+
+    def _embed(self, text: str) -> List[float]:
+        tokens = tokenize(text) or [text]
+        vector = np.sum([self._token_vector(tok) for tok in tokens], axis=0)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.latency.sleep()  # one API request per batch
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        self.latency.sleep()
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        await self.latency.asleep()
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        await self.latency.asleep()
+        return self._embed(text)
+
+
+# ---------------- Chat model ----------------
+
+_ANSWER_WORDS = (
+    "based on the catalog the best match is a well rated option with good battery life "
+    "solid build quality and fast delivery it is priced competitively and comes with a "
+    "standard warranty customers mention comfort and value for money as its main strengths"
+).split()
+
+
+class FakeChatModel(BaseChatModel):
+    """Canned, prompt-dependent answers after a simulated Gemini delay."""
+
+    answer_tokens: int = 40
+    first_token_latency: float = 0.0
+    token_latency: float = 0.0
+    jitter: float = 0.0
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _plan(self, messages: List[BaseMessage]) -> Tuple[List[str], float]:
+        """Answer tokens and time-to-first-token, both seeded by the prompt."""
+        rng = random.Random(_seed(f"{self.seed}:{messages[-1].content}"))
+        tokens = [rng.choice(_ANSWER_WORDS) + " " for _ in range(self.answer_tokens)]
+        delay = self.first_token_latency
+        if self.jitter:
+            delay = max(0.0, delay + rng.uniform(-self.jitter, self.jitter))
+        return tokens, delay
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        tokens, delay = self._plan(messages)
+        time.sleep(delay + self.token_latency * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens).strip()))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                         **kwargs: Any) -> ChatResult:
+        tokens, delay = self._plan(messages)
+        await asyncio.sleep(delay + self.token_latency * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens).strip()))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        tokens, delay = self._plan(messages)
+        time.sleep(delay)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        tokens, delay = self._plan(messages)
+        await asyncio.sleep(delay)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
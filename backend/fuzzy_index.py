@@ -0,0 +1,122 @@
+"""
+backend/fuzzy_index.py
+
+Precomputed fuzzy-match corpus for the /search fallback and suggestions.
+
+Built once at startup from the catalog:
+  - every choice string is normalized (rapidfuzz default_process) and its
+    tokens pre-sorted, so scoring with fuzz.ratio gives the same result as
+    fuzz.token_sort_ratio without re-tokenizing the corpus per request
+  - a character-trigram inverted index shortlists the rows that share the
+    most trigrams with the query; only that shortlist is scored (with
+    process.cdist, workers=-1)
+  - the original choice texts are kept only where callers read them (the
+    name index, for suggestions); the large name + description corpus
+    keeps just its normalized strings and trigram postings
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+# How many trigram-ranked candidates are scored per query
+SHORTLIST_SIZE = 256
+
+
+def _sorted_tokens(text: str) -> str:
+    return " ".join(sorted(default_process(text or "").split()))
+
+
+def _trigrams(normalized: str) -> Set[str]:
+    grams = set()
+    for tok in normalized.split():
+        padded = f" {tok} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class FuzzyIndex:
+    """Fuzzy (token-sort) matcher over a fixed list of (key, text) choices."""
+
+    def __init__(self, choices: Iterable[Tuple[str, str]], shortlist_size: int = SHORTLIST_SIZE,
+                 keep_texts: bool = True):
+        """`keep_texts=False` drops the original texts; extract() then returns None as the text."""
+        self.shortlist_size = shortlist_size
+        self.keys: List[str] = []
+        self.texts: Optional[List[str]] = [] if keep_texts else None
+        self.normalized: List[str] = []
+        postings: Dict[str, List[int]] = {}
+
+        for row, (key, text) in enumerate(choices):
+            norm = _sorted_tokens(text)
+            self.keys.append(key)
+            if self.texts is not None:
+                self.texts.append(text)
+            self.normalized.append(norm)
+            for gram in _trigrams(norm):
+                postings.setdefault(gram, []).append(row)
+
+        self.postings: Dict[str, np.ndarray] = {
+            gram: np.asarray(rows, dtype=np.int32) for gram, rows in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _shortlist(self, query_norm: str, allowed: Optional[np.ndarray]) -> np.ndarray:
+        """Row ids (unordered) sharing the most trigrams with the query."""
+        hits = [self.postings[g] for g in _trigrams(query_norm) if g in self.postings]
+        if not hits:
+            return np.empty(0, dtype=np.int32)
+        counts = np.bincount(np.concatenate(hits), minlength=len(self.keys))
+        if allowed is not None:
+            counts[~allowed] = 0
+        rows = np.flatnonzero(counts)
+        if len(rows) > self.shortlist_size:
+            top = np.argpartition(counts[rows], -self.shortlist_size)[-self.shortlist_size:]
+            rows = rows[top]
+        return rows
+
+    def extract(self, query: str, limit: int = 5, score_cutoff: float = 0,
+                allowed: Optional[np.ndarray] = None) -> List[Tuple[str, Optional[str], float]]:
+        """
+        Best `limit` matches for the query as (key, text, score), score descending.
+        `allowed` optionally restricts matching to the rows set in a boolean
+        mask (catalog rows for build_fuzzy_indexes).
+        """
+        query_norm = _sorted_tokens(query)
+        rows = self._shortlist(query_norm, allowed)
+        if not len(rows):
+            return []
+        scores = process.cdist(
+            [query_norm],
+            [self.normalized[r] for r in rows],
+            scorer=fuzz.ratio,
+            processor=None,
+            score_cutoff=score_cutoff,
+            workers=-1,
+        )[0]
+        order = np.argsort(-scores, kind="stable")[:limit]
+        texts = self.texts
+        return [
+            (self.keys[rows[i]], texts[rows[i]] if texts is not None else None, float(scores[i]))
+            for i in order
+            if scores[i] > 0 and scores[i] >= score_cutoff
+        ]
+
+
+def build_fuzzy_indexes(products: Dict[str, dict]) -> Tuple[FuzzyIndex, FuzzyIndex]:
+    """
+    Build the two /search corpora from the product cache:
+      - documents: product_name + about_product (fallback matching, texts not kept)
+      - names: product_name only (query suggestions)
+    """
+    documents = FuzzyIndex(
+        ((pid, f"{p.get('product_name', '')} {p.get('about_product', '')}") for pid, p in products.items()),
+        keep_texts=False,
+    )
+    names = FuzzyIndex((pid, p.get("product_name", "")) for pid, p in products.items())
+    return documents, names
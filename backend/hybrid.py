@@ -0,0 +1,253 @@
+"""
+backend/hybrid.py
+
+Hybrid keyword + vector retrieval for /search (and any caller that wants a
+LangChain retriever, see retriever.get_hybrid_retriever).
+
+- BM25Index: a local inverted index over each product's composed document
+  text (the same text that is embedded, rebuild_vectorstore._compose_doc_text).
+  Postings are numpy arrays, so scoring a query is a few vectorized adds.
+- Vector side: the query is embedded once and searched in the FAISS index.
+- Category/price filters are pushed down into both sides before ranking,
+  as one boolean mask over catalog rows (Catalog.filter_mask): BM25 rows
+  are catalog rows, and FAISS searches with an IDSelector over the vector
+  rows of the allowed products (a precomputed catalog row -> vector row
+  map). Each side over-fetches `top_k * OVERFETCH` candidates, so a
+  filtered query still fills `top_k` whenever enough products match.
+- An index with several chunk vectors per product yields each product
+  once on the vector side (its best chunk), so RRF counts it once.
+- The two rankings are merged with reciprocal-rank fusion (RRF).
+- asearch() runs BM25 and FAISS on worker threads, off the event loop.
+
+Modes: "hybrid" (default), "bm25" (no embedding call at all) and "vector".
+
+Config (env):
+  SEARCH_MODE      default mode for /search (default hybrid)
+  SEARCH_OVERFETCH candidates per side as a multiple of top_k (default 4)
+  BM25_K1, BM25_B  BM25 parameters (default 1.5 / 0.75)
+  RRF_K            reciprocal-rank fusion constant (default 60)
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from backend.catalog import Catalog, tokenize
+from backend.metrics import span
+from backend.mmap_index import MmapDocstore
+
+MODES = ("hybrid", "bm25", "vector")
+SEARCH_MODE = os.getenv("SEARCH_MODE", "hybrid")
+OVERFETCH = max(1, int(os.getenv("SEARCH_OVERFETCH", "4")))
+BM25_K1 = float(os.getenv("BM25_K1", "1.5"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+
+# ---------------- BM25 ----------------
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of (key, text) documents."""
+
+    def __init__(self, docs: Iterable[Tuple[str, str]], k1: float = BM25_K1, b: float = BM25_B):
+        self.keys: List[str] = []
+        postings: Dict[str, Dict[int, int]] = {}
+        lengths: List[int] = []
+        for row, (key, text) in enumerate(docs):
+            tokens = tokenize(text)
+            self.keys.append(key)
+            lengths.append(len(tokens))
+            for tok in tokens:
+                counts = postings.setdefault(tok, {})
+                counts[row] = counts.get(row, 0) + 1
+
+        self.row_of: Dict[str, int] = {key: row for row, key in enumerate(self.keys)}
+        n = len(self.keys)
+        doc_len = np.asarray(lengths, dtype=np.float32)
+        avg_len = float(doc_len.mean()) if n else 0.0
+        # Per-row length normalisation, folded into each posting's weight up front
+        norm = k1 * (1 - b + b * doc_len / avg_len) if avg_len else np.full(n, k1, np.float32)
+
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for tok, counts in postings.items():
+            rows = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            idf = np.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+            self.postings[tok] = (rows, (idf * tf * (k1 + 1) / (tf + norm[rows])).astype(np.float32))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, query: str, limit: int, allowed: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """
+        Top `limit` (key, score) pairs with a positive score, best first.
+        `allowed` is an optional boolean mask over the rows (catalog rows for
+        build_bm25_index).
+        """
+        hits = [self.postings[tok] for tok in set(tokenize(query)) if tok in self.postings]
+        if not hits or limit <= 0:
+            return []
+        scores = np.zeros(len(self.keys), dtype=np.float32)
+        for rows, weights in hits:
+            scores[rows] += weights  # rows are unique within one posting list
+        if allowed is not None:
+            scores[~allowed] = 0
+        rows = np.flatnonzero(scores)
+        if len(rows) > limit:
+            rows = rows[np.argpartition(scores[rows], -limit)[-limit:]]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return [(self.keys[r], float(scores[r])) for r in rows]
+
+
+def build_bm25_index(catalog: Catalog) -> BM25Index:
+    # Same text the vector index embeds, so both sides see the same fields; row i is catalog row i
+    from backend.rebuild_vectorstore import _compose_doc_text
+
+    return BM25Index((pid, _compose_doc_text(p)) for pid, p in catalog.by_id.items())
+
+
+# ---------------- Vector side ----------------
+
+def vector_row_ids(vectorstore) -> List[str]:
+    """
+    Product id of each FAISS row (position i -> product_id), read from the
+    document metadata: indexes built without `id_key` are keyed by uuid.
+    """
+    docstore = vectorstore.docstore
+    ids = []
+    for row in range(vectorstore.index.ntotal):
+        if isinstance(docstore, MmapDocstore):
+            metadata, doc_id = docstore.metadata(row), docstore.doc_id(row)
+        else:
+            doc_id = vectorstore.index_to_docstore_id[row]
+            metadata = docstore.search(doc_id).metadata
+        ids.append(str(metadata.get("product_id", doc_id)))
+    return ids
+
+
+def _search_params(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    # Keep the index's own nprobe / efSearch when adding the selector
+    if isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def vector_search(index: faiss.Index, row_ids: Sequence[str], embedding: Sequence[float], limit: int,
+                  rows: Optional[np.ndarray] = None) -> List[str]:
+    """
+    Product ids of the `limit` nearest rows, searching only the vector `rows`
+    when given. Each id appears once, at its best row.
+    """
+    query = np.asarray([embedding], dtype=np.float32)
+    if rows is None:
+        _, found = index.search(query, limit)
+    else:
+        if not len(rows):
+            return []
+        selector = faiss.IDSelectorBatch(rows)
+        _, found = index.search(query, min(limit, len(rows)), params=_search_params(index, selector))
+    return list(dict.fromkeys(row_ids[r] for r in found[0] if r >= 0))
+
+
+# ---------------- Fusion ----------------
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Merge ranked id lists: score(id) = sum over lists of 1 / (k + rank)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridSearcher:
+    """BM25 + FAISS over one catalog / index version."""
+
+    def __init__(self, bm25: BM25Index, vectorstore: Any, row_ids: Optional[List[str]] = None):
+        self.bm25 = bm25
+        self.vectorstore = vectorstore
+        self.row_ids = row_ids if row_ids is not None else vector_row_ids(vectorstore)
+        row_of = {pid: row for row, pid in enumerate(self.row_ids)}
+        # Vector row of each BM25 (= catalog) row, -1 if the product has no vector
+        self.vector_rows = np.fromiter((row_of.get(key, -1) for key in bm25.keys), dtype=np.int64,
+                                       count=len(bm25))
+
+    def _allowed_vector_rows(self, allowed: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if allowed is None:
+            return None
+        rows = self.vector_rows[allowed]
+        return rows[rows >= 0]
+
+    def _fuse(self, keyword: List[str], vector: List[str], mode: str, top_k: int) -> List[str]:
+        if mode == "bm25":
+            return keyword[:top_k]
+        if mode == "vector":
+            return vector[:top_k]
+        return [key for key, _ in reciprocal_rank_fusion([keyword, vector])[:top_k]]
+
+    def _keyword(self, query: str, fetch_k: int, allowed: Optional[np.ndarray], mode: str) -> List[str]:
+        if mode not in MODES:
+            raise ValueError(f"Unknown search mode {mode!r}; expected one of {', '.join(MODES)}")
+        if mode == "vector":
+            return []
+        with span("bm25"):
+            return [key for key, _ in self.bm25.search(query, fetch_k, allowed)]
+
+    def search(self, query: str, top_k: int, allowed: Optional[np.ndarray] = None,
+               mode: str = SEARCH_MODE) -> List[str]:
+        """Ranked product ids for `query`, restricted to the catalog-row mask `allowed` (None = no filter)."""
+        fetch_k = top_k * OVERFETCH
+        keyword = self._keyword(query, fetch_k, allowed, mode)
+        vector = []
+        if mode != "bm25":
+            with span("embedding"):
+                embedding = self.vectorstore.embeddings.embed_query(query)
+            with span("faiss"):
+                vector = vector_search(self.vectorstore.index, self.row_ids, embedding, fetch_k,
+                                       self._allowed_vector_rows(allowed))
+        return self._fuse(keyword, vector, mode, top_k)
+
+    async def asearch(self, query: str, top_k: int, allowed: Optional[np.ndarray] = None,
+                      mode: str = SEARCH_MODE) -> List[str]:
+        fetch_k = top_k * OVERFETCH
+        keyword = await asyncio.to_thread(self._keyword, query, fetch_k, allowed, mode)
+        vector = []
+        if mode != "bm25":
+            with span("embedding"):
+                embedding = await self.vectorstore.embeddings.aembed_query(query)
+            with span("faiss"):
+                vector = await asyncio.to_thread(vector_search, self.vectorstore.index, self.row_ids, embedding,
+                                                 fetch_k, self._allowed_vector_rows(allowed))
+        return self._fuse(keyword, vector, mode, top_k)
+
+
+class HybridRetriever(BaseRetriever):
+    """LangChain retriever over a HybridSearcher; documents carry the composed product text."""
+
+    searcher: Any
+    catalog: Any
+    k: int = 4
+    mode: str = SEARCH_MODE
+
+    def _documents(self, product_ids: List[str]) -> List[Document]:
+        from backend.rebuild_vectorstore import _compose_doc_text
+
+        return [Document(id=pid, page_content=_compose_doc_text(self.catalog.by_id[pid]),
+                         metadata={"product_id": pid})
+                for pid in product_ids if pid in self.catalog.by_id]
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self._documents(self.searcher.search(query, self.k, mode=self.mode))
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return self._documents(await self.searcher.asearch(query, self.k, mode=self.mode))
@@ -0,0 +1,145 @@
+"""
+backend/index_config.py
+
+FAISS index configurations for the serving index.
+
+The LangChain build artifact (`index.faiss` + `index.pkl`) always stays a
+flat index: it is the exact source of truth that incremental updates edit
+in place (IVF/HNSW cannot renumber or remove vectors the way LangChain's
+FAISS.delete expects). The serving copy written by mmap_index.py is built
+from those vectors with the configured index type, trained on the catalog
+embeddings. The choice is persisted in `<index>.config.json`, so later
+incremental updates re-export with the same settings.
+
+Index types:
+  flat      exact L2 scan (default)
+  ivf_flat  inverted file, full vectors           knobs: nlist / nprobe
+  ivf_pq    inverted file, product-quantized      knobs: nlist, pq_m / nprobe
+  ivf_sq8   inverted file, 8-bit scalar quantized knobs: nlist / nprobe
+  hnsw      graph index (not memory-mappable)     knobs: hnsw_m / ef_search
+  sq8       8-bit scalar quantized flat scan
+
+Query-time knobs (`nprobe`, `ef_search`) default to the persisted values and
+can be overridden with FAISS_NPROBE / FAISS_EF_SEARCH or per call through
+retriever.get_retriever().
+"""
+
+import json
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "ivf_sq8", "hnsw", "sq8")
+TRAIN_SAMPLE = int(os.getenv("FAISS_TRAIN_SAMPLE", "100000"))
+DEFAULT_NPROBE = 8
+DEFAULT_EF_SEARCH = 64
+DEFAULT_HNSW_M = 32
+DEFAULT_PQ_M = 64
+
+
+def make_config(index_type: str = "flat", nlist: Optional[int] = None, pq_m: Optional[int] = None,
+                hnsw_m: Optional[int] = None, nprobe: Optional[int] = None,
+                ef_search: Optional[int] = None) -> Dict[str, Any]:
+    """Validated index config; unset sizes are derived from the data at build time."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}; expected one of {', '.join(INDEX_TYPES)}")
+    return {
+        "index_type": index_type,
+        "nlist": nlist,
+        "pq_m": pq_m,
+        "hnsw_m": hnsw_m,
+        "nprobe": nprobe,
+        "ef_search": ef_search,
+    }
+
+
+def config_path(folder: Path, index_name: str) -> Path:
+    return Path(folder) / f"{index_name}.config.json"
+
+
+def load_index_config(folder: Path, index_name: str) -> Dict[str, Any]:
+    """The persisted config, or the flat default for indexes built before configs existed."""
+    path = config_path(folder, index_name)
+    if not path.exists():
+        return make_config()
+    return {**make_config(), **json.loads(path.read_text(encoding="utf-8"))}
+
+
+def save_index_config(folder: Path, index_name: str, config: Dict[str, Any]) -> None:
+    path = config_path(folder, index_name)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(config, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ---------------- Building ----------------
+
+def _default_nlist(n: int) -> int:
+    # ~4*sqrt(n) lists, with enough points per list for k-means to be meaningful
+    return max(1, min(int(4 * math.sqrt(n)), n // 39 or 1))
+
+
+def _pq_m(d: int, wanted: int) -> int:
+    """Largest number of sub-quantizers <= wanted that divides the dimension."""
+    return next(m for m in range(min(wanted, d), 0, -1) if d % m == 0)
+
+
+def factory_string(config: Dict[str, Any], d: int, n: int) -> str:
+    """faiss.index_factory description for `config` on n vectors of dimension d."""
+    index_type = config["index_type"]
+    nlist = config.get("nlist") or _default_nlist(n)
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "sq8":
+        return "SQ8"
+    if index_type == "hnsw":
+        return f"HNSW{config.get('hnsw_m') or DEFAULT_HNSW_M}"
+    if index_type == "ivf_flat":
+        return f"IVF{nlist},Flat"
+    if index_type == "ivf_sq8":
+        return f"IVF{nlist},SQ8"
+    # ivf_pq: 8-bit codes need >= 256 training points per sub-quantizer
+    nbits = min(8, max(1, int(math.log2(max(n, 2)))))
+    return f"IVF{nlist},PQ{_pq_m(d, config.get('pq_m') or DEFAULT_PQ_M)}x{nbits}"
+
+
+def build_index(vectors: np.ndarray, config: Dict[str, Any], metric: int = faiss.METRIC_L2) -> faiss.Index:
+    """
+    Train an index of the configured type on `vectors` and add them in order,
+    so FAISS position i is still row i of the docstore.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, d = vectors.shape
+    description = factory_string(config, d, n)
+    index = faiss.index_factory(d, description, metric)
+    if isinstance(index, faiss.IndexIVFPQ):
+        # polysemous codes are unused at search time and make training ~100x slower
+        index.do_polysemous_training = False
+    if not index.is_trained:
+        sample = vectors
+        if n > TRAIN_SAMPLE:
+            rows = np.random.default_rng(0).choice(n, TRAIN_SAMPLE, replace=False)
+            sample = vectors[np.sort(rows)]
+        index.train(sample)
+    index.add(vectors)
+    logging.info(f"Built {description} index over {n} vectors")
+    return index
+
+
+# ---------------- Query-time knobs ----------------
+
+def apply_search_params(index: faiss.Index, config: Dict[str, Any],
+                        nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+    """Set nprobe / efSearch on `index` (explicit args > env > persisted config > defaults)."""
+    params = faiss.ParameterSpace()
+    if isinstance(index, faiss.IndexIVF):
+        value = nprobe or os.getenv("FAISS_NPROBE") or config.get("nprobe") or DEFAULT_NPROBE
+        params.set_index_parameter(index, "nprobe", min(int(value), index.nlist))
+    elif isinstance(index, faiss.IndexHNSW):
+        value = ef_search or os.getenv("FAISS_EF_SEARCH") or config.get("ef_search") or DEFAULT_EF_SEARCH
+        params.set_index_parameter(index, "efSearch", int(value))
@@ -0,0 +1,260 @@
+"""
+backend/index_manager.py
+
+Versioned serving state (FAISS vectorstore + neighbour table + product
+catalog + fuzzy and BM25 indexes) with zero-downtime hot reload.
+
+- `IndexManager.current` is an immutable ServingState snapshot. Request
+  handlers read it once and use that snapshot throughout, so a request that
+  started on version N finishes on version N even if N+1 is swapped in.
+- `reload()` loads the new index/catalog next to the serving one, swaps the
+  reference in a single assignment, and drops the old version; its memory is
+  freed as soon as the last in-flight request using it returns.
+- A watcher thread polls the vectorstore files and products.json and reloads
+  once a change has settled (files unchanged for one full poll interval),
+  so half-written rebuilds are never picked up. POST /admin/reload in main.py
+  triggers the same reload on demand.
+- Only changed components are reloaded: a products.json edit reuses the
+  loaded FAISS index and vice versa. Per-component load times of the last
+  reload are kept in `load_times`.
+
+The application's IndexManager is `resources.index` (see resources.py),
+which also supplies the shared embeddings client.
+
+Config (env):
+  INDEX_WATCH_INTERVAL  seconds between polls (default 10, 0 disables watching)
+"""
+
+import gc
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from backend import catalog as catalog_module
+from backend import retriever as retriever_module
+from backend.catalog import Catalog
+from backend.fuzzy_index import FuzzyIndex, build_fuzzy_indexes
+from backend.hybrid import BM25Index, HybridSearcher, build_bm25_index, vector_row_ids
+from backend.mmap_index import mmap_paths
+from backend.neighbors import NeighborTable, load_neighbor_table, neighbor_paths
+
+WATCH_INTERVAL = float(os.getenv("INDEX_WATCH_INTERVAL", "10"))
+RETRIEVER_K = 3
+
+Fingerprint = Tuple[Tuple[str, int, int], ...]
+
+
+def fingerprint(paths: List[Path]) -> Fingerprint:
+    """(name, size, mtime) of each file; missing files count as (name, -1, -1)."""
+    result = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            result.append((path.name, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            result.append((path.name, -1, -1))
+    return tuple(result)
+
+
+class ServingState:
+    """One loaded version of everything /search, /chat and recommendations read."""
+
+    def __init__(self, version: int, vectorstore: Any, catalog: Catalog,
+                 fuzzy_docs: FuzzyIndex, fuzzy_names: FuzzyIndex,
+                 index_fingerprint: Fingerprint, catalog_fingerprint: Fingerprint,
+                 neighbors: Optional[NeighborTable] = None, bm25: Optional[BM25Index] = None,
+                 vector_rows: Optional[List[str]] = None):
+        self.version = version
+        self.vectorstore = vectorstore
+        self.neighbors = neighbors
+        self.retriever = vectorstore.as_retriever(search_kwargs={"k": RETRIEVER_K})
+        self.catalog = catalog
+        self.fuzzy_docs = fuzzy_docs
+        self.fuzzy_names = fuzzy_names
+        self.bm25 = bm25 if bm25 is not None else build_bm25_index(catalog)
+        self.vector_rows = vector_rows if vector_rows is not None else vector_row_ids(vectorstore)
+        self.searcher = HybridSearcher(self.bm25, vectorstore, self.vector_rows)
+        self.index_fingerprint = index_fingerprint
+        self.catalog_fingerprint = catalog_fingerprint
+        self.loaded_at = time.time()
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "vectors": self.vectorstore.index.ntotal,
+            "products": len(self.catalog),
+            "neighbor_table": len(self.neighbors) if self.neighbors is not None else None,
+        }
+
+
+class IndexManager:
+    """Owns the current ServingState and swaps in new versions."""
+
+    def __init__(self, embeddings_provider: Callable[[], Any] = None, vectorstore_path: Path = None,
+                 catalog_path: Path = None, watch_interval: float = WATCH_INTERVAL):
+        self.embeddings_provider = embeddings_provider or retriever_module.get_embeddings
+        self.vectorstore_path = Path(vectorstore_path or retriever_module.VECTORSTORE_PATH)
+        self.catalog_path = Path(catalog_path or catalog_module.DATA_FILE)
+        self.watch_interval = watch_interval
+        self.load_times: Dict[str, float] = {}
+        self._state: Optional[ServingState] = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    # ---------------- State ----------------
+
+    @property
+    def current(self) -> ServingState:
+        """The serving snapshot (loaded on first access if startup has not done it)."""
+        state = self._state
+        if state is None:
+            state = self.reload()
+        return state
+
+    @property
+    def loaded(self) -> bool:
+        return self._state is not None
+
+    def _index_files(self) -> List[Path]:
+        name = retriever_module.INDEX_NAME
+        return [self.vectorstore_path / f"{name}.faiss", self.vectorstore_path / f"{name}.pkl",
+                *mmap_paths(self.vectorstore_path, name), *neighbor_paths(self.vectorstore_path, name)]
+
+    # ---------------- Loading ----------------
+
+    def load(self) -> ServingState:
+        """Initial (blocking) load."""
+        return self.reload(force=True)
+
+    def reload(self, force: bool = False) -> ServingState:
+        """
+        Load whatever changed on disk and atomically swap it in.
+        Returns the serving state (unchanged if nothing changed and not forced).
+        """
+        with self._reload_lock:
+            old = self._state
+            index_fp = fingerprint(self._index_files())
+            catalog_fp = fingerprint(catalog_module.catalog_files(self.catalog_path))
+            reload_index = force or old is None or index_fp != old.index_fingerprint
+            reload_catalog = force or old is None or catalog_fp != old.catalog_fingerprint
+            if not (reload_index or reload_catalog):
+                return old
+
+            started = time.perf_counter()
+            load_times = {}
+
+            def load_index():
+                t = time.perf_counter()
+                vectorstore = retriever_module.load_vectorstore(self.embeddings_provider(), self.vectorstore_path)
+                neighbors = load_neighbor_table(self.vectorstore_path, retriever_module.INDEX_NAME)
+                vector_rows = vector_row_ids(vectorstore)
+                load_times["vectorstore"] = time.perf_counter() - t
+                return vectorstore, neighbors, vector_rows
+
+            def load_catalog():
+                t = time.perf_counter()
+                catalog = catalog_module.load_catalog(self.catalog_path)
+                load_times["catalog"] = time.perf_counter() - t
+                t = time.perf_counter()
+                fuzzy_docs, fuzzy_names = build_fuzzy_indexes(catalog.by_id)
+                load_times["fuzzy_index"] = time.perf_counter() - t
+                t = time.perf_counter()
+                bm25 = build_bm25_index(catalog)
+                load_times["bm25_index"] = time.perf_counter() - t
+                return catalog, fuzzy_docs, fuzzy_names, bm25
+
+            # FAISS index and catalog load side by side when both changed
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                index_future = pool.submit(load_index) if reload_index else None
+                catalog_future = pool.submit(load_catalog) if reload_catalog else None
+                vectorstore, neighbors, vector_rows = (
+                    index_future.result() if index_future
+                    else (old.vectorstore, old.neighbors, old.vector_rows)
+                )
+                catalog, fuzzy_docs, fuzzy_names, bm25 = (
+                    catalog_future.result() if catalog_future
+                    else (old.catalog, old.fuzzy_docs, old.fuzzy_names, old.bm25)
+                )
+
+            new = ServingState(
+                version=(old.version + 1) if old else 1,
+                vectorstore=vectorstore,
+                catalog=catalog,
+                fuzzy_docs=fuzzy_docs,
+                fuzzy_names=fuzzy_names,
+                index_fingerprint=index_fp,
+                catalog_fingerprint=catalog_fp,
+                neighbors=neighbors,
+                bm25=bm25,
+                vector_rows=vector_rows,
+            )
+            # The swap: new requests see `new`, in-flight ones keep their old snapshot
+            self._state = new
+            self.load_times = load_times
+            logging.info(
+                f"Serving index version {new.version} ({len(catalog)} products, "
+                f"index {'reloaded' if reload_index else 'reused'}, "
+                f"catalog {'reloaded' if reload_catalog else 'reused'}) "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+
+        # Release the previous version's memory once nothing references it
+        del old
+        gc.collect()
+        return new
+
+    # ---------------- Watching ----------------
+
+    def start_watching(self) -> None:
+        if self.watch_interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="index-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.watch_interval + 1)
+            self._watcher = None
+
+    def _watch(self) -> None:
+        last_seen = None
+        while not self._stop.wait(self.watch_interval):
+            state = self._state
+            if state is None:
+                continue
+            seen = (fingerprint(self._index_files()), fingerprint(catalog_module.catalog_files(self.catalog_path)))
+            changed = seen != (state.index_fingerprint, state.catalog_fingerprint)
+            # Reload only once the files have stopped changing between two polls
+            if changed and seen == last_seen:
+                try:
+                    self.reload()
+                except Exception as e:
+                    logging.error(f"Index reload failed, still serving version {state.version}: {e}",
+                                  exc_info=True)
+            last_seen = seen
+
+
+class CurrentRetriever(BaseRetriever):
+    """Retriever that always searches the version `manager` is currently serving."""
+
+    manager: IndexManager
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.manager.current.retriever.invoke(query)
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return await self.manager.current.retriever.ainvoke(query)
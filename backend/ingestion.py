@@ -0,0 +1,437 @@
+"""
+backend/ingestion.py
+
+Batched, parallel and resumable embedding pipeline used by
+rebuild_vectorstore.py and data_ingestion.py.
+
+- Products are streamed from the catalog JSON array (never fully loaded).
+- Documents are embedded in batches of `batch_size` on a bounded thread
+  pool (`workers` batches in flight), each batch retried with exponential
+  backoff on API errors.
+- Every finished batch is checkpointed to `<checkpoint_dir>/batch_NNNNNN.*`
+  (vectors as .npy, texts/metadata as .json). Re-running after a crash or
+  Ctrl+C skips the batches already on disk. The checkpoint is tied to the
+  source file + batch size + model, and is removed once the index is saved.
+- Incremental updates: a full build with `id_key` stores each document
+  under its own id (e.g. product_id) plus a `<index>.hashes.json` manifest
+  of id -> sha256(text). update_vectorstore() then diffs the current docs
+  against that manifest, deletes removed/changed ids from the FAISS
+  docstore + index, and embeds only the new or changed documents.
+- Chunked documents (`splitter`, e.g. data_ingestion.py): each document is
+  split, every distinct chunk text (by sha256) is embedded only once across
+  the whole catalog, and a document's chunk vectors are mean-pooled into a
+  single vector. The index then holds one entry per product (full text,
+  stored under its id), so retrieval ranks products, not chunks.
+- Every save also writes the memory-mapped serving copy (mmap_index.py)
+  that the API workers load; `index.pkl` stays the source for updates.
+
+Config (env, overridable per call / CLI flag):
+  EMBED_BATCH_SIZE   documents per embedding request (default 100)
+  EMBED_WORKERS      concurrent batches (default 4)
+  EMBED_MAX_RETRIES  retries per batch before giving up (default 5)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import TextSplitter
+
+from backend.index_config import load_index_config
+from backend.mmap_index import export_mmap_index
+
+BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+WORKERS = int(os.getenv("EMBED_WORKERS", "4"))
+MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+
+
+# ---------------- Streaming input ----------------
+
+def iter_json_array(path: Path, chunk_size: int = 1 << 20) -> Iterator[Dict[str, Any]]:
+    """Yield the objects of a top-level JSON array one by one, reading the file in chunks."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    started = False
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buf += chunk
+            pos = 0
+            while True:
+                # skip whitespace, separators and the opening bracket
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    pos += 1
+                if not started and pos < len(buf):
+                    if buf[pos] != "[":
+                        raise ValueError(f"{path} is not a JSON array")
+                    started = True
+                    pos += 1
+                    continue
+                if pos < len(buf) and buf[pos] == "]":
+                    return
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    break  # object continues in the next chunk
+                yield obj
+                pos = end
+            buf = buf[pos:]
+            if not chunk:
+                if buf.strip():
+                    raise ValueError(f"Unexpected end of {path}")
+                return
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+# ---------------- Embedding with retry ----------------
+
+def embed_with_retry(embeddings: Embeddings, texts: List[str], max_retries: int = MAX_RETRIES) -> np.ndarray:
+    """embed_documents with exponential backoff (1s, 2s, 4s, ... + jitter, capped at 60s)."""
+    for attempt in range(max_retries + 1):
+        try:
+            return np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = min(60.0, 2 ** attempt) + random.uniform(0, 1)
+            logging.warning(f"Embedding batch failed ({e}); retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+# ---------------- Checkpoints ----------------
+
+class Checkpoint:
+    """On-disk store of finished batches for one (source, batch size, model) run."""
+
+    def __init__(self, directory: Path, signature: Dict[str, Any]):
+        self.directory = Path(directory)
+        self.signature = signature
+        manifest = self.directory / "manifest.json"
+        if manifest.exists():
+            try:
+                same_run = json.loads(manifest.read_text(encoding="utf-8")) == signature
+            except ValueError:
+                same_run = False
+            if not same_run:
+                print("ℹ️  Source or settings changed since the last run; discarding old checkpoint.")
+                shutil.rmtree(self.directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest.write_text(json.dumps(signature), encoding="utf-8")
+
+    def _paths(self, index: int) -> Tuple[Path, Path]:
+        stem = self.directory / f"batch_{index:06d}"
+        return stem.with_suffix(".json"), stem.with_suffix(".npy")
+
+    def has(self, index: int) -> bool:
+        return self._paths(index)[1].exists()
+
+    def save(self, index: int, docs: List[Document], vectors: np.ndarray) -> None:
+        meta_path, vec_path = self._paths(index)
+        meta_path.write_text(json.dumps({
+            "texts": [d.page_content for d in docs],
+            "metadatas": [d.metadata for d in docs],
+        }, ensure_ascii=False), encoding="utf-8")
+        # vectors are written last (temp + rename) and mark the batch as complete
+        tmp = vec_path.with_name(vec_path.stem + ".tmp.npy")
+        np.save(tmp, vectors)
+        os.replace(tmp, vec_path)
+
+    def load(self, index: int) -> Tuple[List[str], List[dict], np.ndarray]:
+        meta_path, vec_path = self._paths(index)
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        return meta["texts"], meta["metadatas"], np.load(vec_path)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def source_signature(path: Path, **settings) -> Dict[str, Any]:
+    """Identify a run by the source file's size/mtime plus the embedding settings."""
+    stat = Path(path).stat()
+    return {"source": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, **settings}
+
+
+# ---------------- Pipeline ----------------
+
+def embed_documents_resumable(docs: Iterable[Document], embeddings: Embeddings, checkpoint: Checkpoint,
+                              batch_size: int = BATCH_SIZE, workers: int = WORKERS,
+                              max_retries: int = MAX_RETRIES) -> int:
+    """
+    Embed `docs` batch by batch into `checkpoint`, skipping batches already there.
+    At most `workers` batches are in flight; returns the number of batches.
+    """
+    started = time.perf_counter()
+    total = skipped = done = 0
+    in_flight = {}
+
+    def drain(block_until: int) -> None:
+        nonlocal done
+        while len(in_flight) > block_until:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, batch = in_flight.pop(future)
+                checkpoint.save(index, batch, future.result())
+                done += 1
+                if done % 10 == 0:
+                    print(f"  … {done} batches embedded ({time.perf_counter() - started:.0f}s)")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for index, batch in enumerate(batched(docs, batch_size)):
+                total += 1
+                if checkpoint.has(index):
+                    skipped += 1
+                    continue
+                texts = [d.page_content for d in batch]
+                future = pool.submit(embed_with_retry, embeddings, texts, max_retries)
+                in_flight[future] = (index, batch)
+                drain(block_until=workers - 1)
+            drain(block_until=0)
+        except BaseException:
+            for future in in_flight:
+                future.cancel()
+            raise
+
+    if skipped:
+        print(f"↩️  Resumed: {skipped} of {total} batches were already checkpointed.")
+    return total
+
+
+def load_checkpointed(checkpoint: Checkpoint, num_batches: int) -> Tuple[List[str], List[dict], np.ndarray]:
+    """All checkpointed batches, in order, as (texts, metadatas, vector matrix)."""
+    texts: List[str] = []
+    metadatas: List[dict] = []
+    vectors: List[np.ndarray] = []
+    for index in range(num_batches):
+        batch_texts, batch_meta, batch_vectors = checkpoint.load(index)
+        texts.extend(batch_texts)
+        metadatas.extend(batch_meta)
+        vectors.append(batch_vectors)
+    matrix = np.vstack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+    return texts, metadatas, matrix
+
+
+def build_faiss_from_checkpoint(checkpoint: Checkpoint, num_batches: int, embeddings: Embeddings,
+                                id_key: Optional[str] = None) -> FAISS:
+    """Assemble a FAISS vectorstore from all checkpointed batches, in order."""
+    texts, metadatas, matrix = load_checkpointed(checkpoint, num_batches)
+    if not texts:
+        raise ValueError("No documents to index")
+    ids = [m[id_key] for m in metadatas] if id_key else None
+    return FAISS.from_embeddings(list(zip(texts, matrix)), embeddings, metadatas=metadatas, ids=ids)
+
+
+def pool_vectors(groups: List[List[str]], rows: Dict[str, int], matrix: np.ndarray) -> np.ndarray:
+    """
+    One vector per group of chunk keys: the mean of the chunk vectors, rescaled
+    to their mean length so pooled and single-chunk documents stay comparable
+    under L2 distance (a one-chunk group gets its chunk vector unchanged).
+    """
+    if not groups:
+        return np.empty((0, matrix.shape[1] if matrix.ndim == 2 else 0), dtype=np.float32)
+    order = np.fromiter((rows[key] for keys in groups for key in keys), dtype=np.int64)
+    lengths = np.fromiter((len(keys) for keys in groups), dtype=np.int64, count=len(groups))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    chunks = matrix[order]
+    pooled = np.add.reduceat(chunks, starts, axis=0) / lengths[:, None]
+    target = np.add.reduceat(np.linalg.norm(chunks, axis=1), starts) / lengths
+    current = np.linalg.norm(pooled, axis=1)
+    scale = np.divide(target, current, out=np.ones_like(current), where=current > 0)
+    return (pooled * scale[:, None]).astype(np.float32)
+
+
+def embed_pooled(docs: Iterable[Document], splitter: TextSplitter, embeddings: Embeddings, checkpoint: Checkpoint,
+                 batch_size: int = BATCH_SIZE, workers: int = WORKERS,
+                 max_retries: int = MAX_RETRIES) -> Tuple[List[str], List[dict], np.ndarray]:
+    """
+    Split `docs` into chunks, embed each distinct chunk text once (resumably,
+    via `checkpoint`) and pool every doc's chunks into one vector.
+    Returns the docs' full texts, their metadatas and the pooled vectors.
+    """
+    texts: List[str] = []
+    metadatas: List[dict] = []
+    groups: List[List[str]] = []
+    seen = set()
+    total = 0
+
+    def unique_chunks() -> Iterator[Document]:
+        nonlocal total
+        for doc in docs:
+            keys = []
+            # A text too short to split is its own single chunk
+            for chunk in splitter.split_text(doc.page_content) or [doc.page_content]:
+                key = content_hash(chunk)
+                keys.append(key)
+                total += 1
+                if key not in seen:
+                    seen.add(key)
+                    yield Document(page_content=chunk, metadata={"chunk": key})
+            texts.append(doc.page_content)
+            metadatas.append(doc.metadata)
+            groups.append(keys)
+
+    num_batches = embed_documents_resumable(unique_chunks(), embeddings, checkpoint, batch_size, workers, max_retries)
+    _, chunk_meta, matrix = load_checkpointed(checkpoint, num_batches)
+    rows = {m["chunk"]: i for i, m in enumerate(chunk_meta)}
+    print(f"🧩 {len(texts)} documents -> {total} chunks, {len(rows)} distinct embedded "
+          f"({total - len(rows)} repeats reused).")
+    return texts, metadatas, pool_vectors(groups, rows, matrix)
+
+
+# ---------------- Content hashes (incremental updates) ----------------
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hashes_path(folder: Path, index_name: str) -> Path:
+    return Path(folder) / f"{index_name}.hashes.json"
+
+
+def load_hashes(folder: Path, index_name: str) -> Optional[Dict[str, str]]:
+    """id -> content hash manifest of an index (None if the index has none)."""
+    path = hashes_path(folder, index_name)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_hashes(folder: Path, index_name: str, hashes: Dict[str, str]) -> None:
+    path = hashes_path(folder, index_name)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(hashes), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def unique_docs(docs: Iterable[Document], id_key: str, hashes: Dict[str, str]) -> Iterator[Document]:
+    """Drop repeated ids (first one wins) and record each kept doc's content hash."""
+    for doc in docs:
+        doc_id = doc.metadata[id_key]
+        if doc_id in hashes:
+            continue
+        hashes[doc_id] = content_hash(doc.page_content)
+        yield doc
+
+
+def build_vectorstore(docs: Iterable[Document], embeddings: Embeddings, folder: Path, index_name: str,
+                      signature: Dict[str, Any], batch_size: int = BATCH_SIZE, workers: int = WORKERS,
+                      max_retries: int = MAX_RETRIES, fresh: bool = False,
+                      id_key: Optional[str] = None, index_config: Optional[Dict[str, Any]] = None,
+                      splitter: Optional[TextSplitter] = None) -> FAISS:
+    """
+    Embed `docs` (resumably) and save the FAISS index to `folder/index_name.*`.
+    With `id_key`, documents are stored under metadata[id_key] (first wins on
+    repeats) and a content-hash manifest is written for update_vectorstore().
+    `index_config` picks the serving index type (see index_config.py).
+    With `splitter`, each document is embedded as pooled, deduplicated chunks.
+    """
+    folder = Path(folder)
+    checkpoint_dir = folder / f".{index_name}.checkpoint"
+    signature = {**signature, "batch_size": batch_size}
+    if fresh:
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    checkpoint = Checkpoint(checkpoint_dir, signature)
+
+    hashes: Dict[str, str] = {}
+    if id_key:
+        docs = unique_docs(docs, id_key, hashes)
+    if splitter is not None:
+        texts, metadatas, matrix = embed_pooled(docs, splitter, embeddings, checkpoint, batch_size, workers,
+                                                max_retries)
+        if not texts:
+            raise ValueError("No documents to index")
+        vectorstore = FAISS.from_embeddings(list(zip(texts, matrix)), embeddings, metadatas=metadatas,
+                                            ids=[m[id_key] for m in metadatas] if id_key else None)
+    else:
+        num_batches = embed_documents_resumable(docs, embeddings, checkpoint, batch_size, workers, max_retries)
+        vectorstore = build_faiss_from_checkpoint(checkpoint, num_batches, embeddings, id_key)
+
+    folder.mkdir(parents=True, exist_ok=True)
+    vectorstore.save_local(folder_path=str(folder), index_name=index_name)
+    export_mmap_index(vectorstore, folder, index_name, index_config)
+    if id_key:
+        save_hashes(folder, index_name, hashes)
+    else:
+        hashes_path(folder, index_name).unlink(missing_ok=True)
+    checkpoint.clear()
+    return vectorstore
+
+
+def update_vectorstore(docs: Iterable[Document], embeddings: Embeddings, folder: Path, index_name: str,
+                       signature: Dict[str, Any], id_key: str, batch_size: int = BATCH_SIZE,
+                       workers: int = WORKERS, max_retries: int = MAX_RETRIES,
+                       index_config: Optional[Dict[str, Any]] = None,
+                       splitter: Optional[TextSplitter] = None) -> Tuple[FAISS, Dict[str, int]]:
+    """
+    Bring an index built with `id_key` in line with `docs`, embedding only
+    new/changed documents. Returns the vectorstore and added/changed/removed counts.
+    A new `index_config` re-exports the serving index even if no document changed.
+    Pass the same `splitter` as the full build if it used one.
+    """
+    folder = Path(folder)
+    old_hashes = load_hashes(folder, index_name)
+    if old_hashes is None:
+        raise FileNotFoundError(f"No content-hash manifest for {folder / index_name}; run a full build first")
+
+    new_hashes: Dict[str, str] = {}
+    pending = [doc for doc in unique_docs(docs, id_key, new_hashes)
+               if old_hashes.get(doc.metadata[id_key]) != new_hashes[doc.metadata[id_key]]]
+    removed = [doc_id for doc_id in old_hashes if doc_id not in new_hashes]
+    changed = [d.metadata[id_key] for d in pending if d.metadata[id_key] in old_hashes]
+    stats = {"added": len(pending) - len(changed), "changed": len(changed), "removed": len(removed)}
+
+    vectorstore = FAISS.load_local(
+        folder_path=str(folder), embeddings=embeddings, index_name=index_name,
+        allow_dangerous_deserialization=True,
+    )
+    if not pending and not removed:
+        if index_config and index_config != load_index_config(folder, index_name):
+            export_mmap_index(vectorstore, folder, index_name, index_config)
+        return vectorstore, stats
+
+    # Docstore ids are the document ids, so stale vectors can be deleted directly
+    if removed or changed:
+        vectorstore.delete(removed + changed)
+
+    if pending:
+        pending_ids = "".join(sorted(d.metadata[id_key] + new_hashes[d.metadata[id_key]] for d in pending))
+        checkpoint = Checkpoint(
+            folder / f".{index_name}.update.checkpoint",
+            {**signature, "batch_size": batch_size, "pending": content_hash(pending_ids)},
+        )
+        if splitter is not None:
+            texts, metadatas, matrix = embed_pooled(pending, splitter, embeddings, checkpoint, batch_size, workers,
+                                                    max_retries)
+        else:
+            num_batches = embed_documents_resumable(pending, embeddings, checkpoint, batch_size, workers,
+                                                    max_retries)
+            texts, metadatas, matrix = load_checkpointed(checkpoint, num_batches)
+        vectorstore.add_embeddings(list(zip(texts, matrix)), metadatas=metadatas,
+                                   ids=[m[id_key] for m in metadatas])
+
+    vectorstore.save_local(folder_path=str(folder), index_name=index_name)
+    export_mmap_index(vectorstore, folder, index_name, index_config)
+    save_hashes(folder, index_name, new_hashes)
+    if pending:
+        checkpoint.clear()
+    return vectorstore, stats
@@ -0,0 +1,82 @@
+"""
+backend/limits.py
+
+Concurrency limits and timeouts for the slow upstream calls made by the
+async endpoints (query embedding / FAISS retrieval and Gemini generation).
+
+Each limiter caps how many calls of its kind are in flight at once and
+bounds how long a single call may take; a call that runs past its timeout
+raises TimeoutError, which main.py turns into a 504 response. `in_flight`
+and `timeouts` are exported on /metrics.
+
+Config (env):
+  RETRIEVAL_CONCURRENCY / RETRIEVAL_TIMEOUT   (default 32 calls / 10 s)
+  LLM_CONCURRENCY / LLM_TIMEOUT               (default 8 calls / 60 s)
+"""
+
+import asyncio
+import os
+from typing import AsyncIterator, Awaitable, TypeVar
+
+T = TypeVar("T")
+
+
+class CallLimiter:
+    """Semaphore + timeout around awaitable upstream calls."""
+
+    def __init__(self, name: str, concurrency: int, timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.in_flight = 0
+        self.timeouts = 0
+
+    async def run(self, call: Awaitable[T]) -> T:
+        """Await `call` once a slot is free; raise TimeoutError after `timeout` seconds."""
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                return await asyncio.wait_for(call, timeout=self.timeout or None)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise TimeoutError(f"{self.name} call timed out after {self.timeout}s")
+            finally:
+                self.in_flight -= 1
+
+    async def stream(self, items: AsyncIterator[T]) -> AsyncIterator[T]:
+        """
+        Hold one slot while re-yielding an async stream (e.g. LLM tokens); the
+        whole stream must finish within `timeout` seconds.
+        """
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + self.timeout if self.timeout else None
+                iterator = items.__aiter__()
+                while True:
+                    remaining = None if deadline is None else max(deadline - loop.time(), 0)
+                    try:
+                        item = await asyncio.wait_for(iterator.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        self.timeouts += 1
+                        raise TimeoutError(f"{self.name} call timed out after {self.timeout}s")
+                    yield item
+            finally:
+                self.in_flight -= 1
+
+
+retrieval_limiter = CallLimiter(
+    "retrieval",
+    concurrency=int(os.getenv("RETRIEVAL_CONCURRENCY", "32")),
+    timeout=float(os.getenv("RETRIEVAL_TIMEOUT", "10")),
+)
+
+llm_limiter = CallLimiter(
+    "llm",
+    concurrency=int(os.getenv("LLM_CONCURRENCY", "8")),
+    timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+)
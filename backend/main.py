@@ -1,18 +1,28 @@
-from fastapi import FastAPI, Request, Query
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from backend.chat_chain import ask_ai
-from backend.retriever import get_retriever
+from fastapi import FastAPI, Request, Query, Header
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Match
+from pydantic import BaseModel, ConfigDict
+from backend.chat_chain import aask_ai, astream_ai
+from backend.resources import resources
+from backend.limits import retrieval_limiter, llm_limiter
+from backend.hybrid import SEARCH_MODE
+from backend.product_listing import MAX_LIMIT, listing_response, parse_fields
+from backend.serialization import fast_response
+from backend import metrics
+from backend.metrics import span
 from backend.cart_wishlist import (
     add_to_cart, remove_from_cart, update_cart_quantity, get_cart, clear_cart,
-    add_to_wishlist, remove_from_wishlist, get_wishlist, move_wishlist_to_cart
+    add_to_wishlist, remove_from_wishlist, get_wishlist, move_wishlist_to_cart,
+    apply_cart_batch, apply_wishlist_batch, move_all_wishlist_to_cart, hydrate_cart
 )
 from fastapi.middleware.cors import CORSMiddleware
 
+import asyncio
+import hmac
 import json
-from pathlib import Path
 import logging
-from rapidfuzz import fuzz, process
+import os
+from typing import List, Optional, Union
 
 # -------------------- Logging Setup --------------------
 logging.basicConfig(
@@ -34,8 +44,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-retriever = None
-products_cache = {}
+# Retriever, catalog and fuzzy indexes live in the shared resource container
+# (hot-reloadable). Handlers take one `index_manager.current` snapshot per request.
+index_manager = resources.index
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 class ChatRequest(BaseModel):
     query: str
@@ -44,6 +56,63 @@ class SearchRequest(BaseModel):
     query: str
     top_k: int = 2
 
+# Response models: documentation (OpenAPI) of the catalog payloads only. Those
+# routes return pre-rendered responses (serialization.fast_response), so the
+# models are not used to validate or re-encode anything at runtime.
+class Product(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    product_id: str
+    product_name: Optional[str] = None
+    category: Optional[str] = None
+    discounted_price: Union[str, float, None] = None
+    actual_price: Union[str, float, None] = None
+    discount_percentage: Union[str, float, None] = None
+    rating: Union[str, float, None] = None
+    rating_count: Union[str, int, None] = None
+    about_product: Optional[str] = None
+    img_link: Optional[str] = None
+    product_link: Optional[str] = None
+
+class Page(BaseModel):
+    offset: int
+    limit: Optional[int] = None
+    total: int
+    next_cursor: Optional[str] = None
+
+class ProductResponse(BaseModel):
+    status: str
+    message: str
+    data: Optional[Product] = None
+
+class ProductListResponse(BaseModel):
+    status: str
+    message: str
+    data: Optional[List[Product]] = None
+    page: Optional[Page] = None
+
+class SearchResponse(BaseModel):
+    products: List[Product]
+    suggestions: List[str]
+
+class CartOperation(BaseModel):
+    op: str  # add | remove | set
+    product_id: str
+    quantity: int = 1
+
+class CartBatchRequest(BaseModel):
+    user_id: str
+    operations: List[CartOperation]
+
+class WishlistOperation(BaseModel):
+    op: str  # add | remove | move_to_cart
+    product_id: str
+    quantity: int = 1
+
+class WishlistBatchRequest(BaseModel):
+    user_id: str
+    operations: List[WishlistOperation]
+
 # -------------------- Utility --------------------
 def success_response(message, data=None):
     return {"status": "success", "message": message, "data": data}
@@ -55,19 +124,78 @@ def error_response(message):
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logging.error(f"Error: {str(exc)}", exc_info=True)
+    metrics.errors.inc(kind="exception")
     return JSONResponse(status_code=500, content=error_response("Internal Server Error"))
 
+@app.exception_handler(TimeoutError)
+async def timeout_exception_handler(request: Request, exc: TimeoutError):
+    logging.warning(f"Timeout: {str(exc)}")
+    metrics.errors.inc(kind="timeout")
+    return JSONResponse(status_code=504, content=error_response("Upstream request timed out"))
+
+# -------------------- Metrics --------------------
+def _route_of(request: Request) -> str:
+    # Route template (e.g. /products/{product_id}) keeps label cardinality bounded
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    route = _route_of(request)
+    started = metrics.start_request(route)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        server_timing = metrics.finish_request(request.method, route, status, started)
+    if server_timing:
+        response.headers["Server-Timing"] = server_timing
+    return response
+
+def _cache_samples():
+    caches = resources.status()["caches"]
+    for name, stats in caches.items():
+        if not stats:
+            continue
+        yield "", {"cache": name, "result": "hit"}, stats.get("hits", 0)
+        yield "", {"cache": name, "result": "miss"}, stats.get("misses", 0)
+
+def _limiter_samples():
+    for limiter in (retrieval_limiter, llm_limiter):
+        yield "", {"limiter": limiter.name}, limiter.in_flight
+
+metrics.registry.collector("cache_lookups_total", "Cache lookups by cache and result", "counter", _cache_samples)
+metrics.registry.collector("upstream_calls_in_flight", "Upstream calls holding a limiter slot", "gauge",
+                           _limiter_samples)
+metrics.registry.collector(
+    "upstream_timeouts_total", "Upstream calls that hit their limiter timeout", "counter",
+    lambda: [("", {"limiter": l.name}, l.timeouts) for l in (retrieval_limiter, llm_limiter)])
+metrics.registry.collector(
+    "index_version", "Serving index version", "gauge",
+    lambda: [("", {}, index_manager.current.version)] if index_manager.loaded else [])
+
+@app.get("/metrics", include_in_schema=False)
+def api_metrics():
+    """Prometheus text exposition of this worker's metrics."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 # -------------------- Startup --------------------
 @app.on_event("startup")
 def load_retriever():
-    global retriever, products_cache
-    retriever = get_retriever()
+    # Index/catalog and LLM/QA chain are initialised in parallel
+    load_times = resources.warm_up()
     logging.info("Retriever loaded successfully!")
+    logging.info(f"Loaded {len(index_manager.current.catalog)} products into cache.")
+    logging.info("Startup load times: " + ", ".join(f"{k}={v:.2f}s" for k, v in load_times.items()))
+    index_manager.start_watching()
 
-    file_path = Path(__file__).parent / "data/products.json"
-    with open(file_path, "r", encoding="utf-8") as f:
-        products_cache = {p["product_id"]: p for p in json.load(f)}
-    logging.info(f"Loaded {len(products_cache)} products into cache.")
+@app.on_event("shutdown")
+def stop_index_watcher():
+    index_manager.stop_watching()
 
 # -------------------- Root --------------------
 @app.get("/")
@@ -84,86 +212,156 @@ def read_root():
 #     })
 
 @app.post("/chat")
-def chat(request: ChatRequest):  # ChatRequest me 'question' field rakho
-    response = ask_ai(request.query)
+async def chat(request: ChatRequest):  # ChatRequest me 'question' field rakho
+    response = await llm_limiter.run(aask_ai(request.query))
     return success_response("AI response generated", {
         "answer": response["result"],
-        "sources": [doc.metadata for doc in response["source_documents"]]
+        "sources": [doc.metadata for doc in response["source_documents"]],
+        "cached": response.get("cached", False),
     })
+
+# -------------------- Chat (streaming, SSE) --------------------
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Server-Sent Events version of /chat:
+      event: sources -> {"sources": [...]}  (as soon as retrieval finishes)
+      event: token   -> {"text": "..."}     (one per LLM chunk)
+      event: done    -> {"retrieval_ms", "first_token_ms", "total_ms"}
+      event: error   -> {"message": "..."}  (if the stream fails midway)
+    """
+    async def event_stream():
+        try:
+            async for kind, payload in llm_limiter.stream(astream_ai(request.query)):
+                if kind == "sources":
+                    yield sse_event("sources", {"sources": payload})
+                elif kind == "token":
+                    yield sse_event("token", {"text": payload})
+                else:
+                    yield sse_event(kind, payload)
+        except TimeoutError as e:
+            logging.warning(f"Chat stream timed out: {e}")
+            yield sse_event("error", {"message": "Upstream request timed out"})
+        except Exception as e:
+            logging.error(f"Chat stream failed: {e}", exc_info=True)
+            yield sse_event("error", {"message": "Internal Server Error"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # -------------------- Get All Products --------------------
-@app.get("/products")
-def get_products():
-    return success_response("Product list fetched", list(products_cache.values()))
+@app.get("/products", responses={200: {"model": ProductListResponse}})
+def get_products(request: Request, offset: int = Query(0, ge=0), limit: int = Query(None, ge=1, le=MAX_LIMIT),
+                 cursor: str = None, category: str = None, min_price: float = None, max_price: float = None,
+                 fields: str = None):
+    """
+    Paginated (offset/limit or cursor), filtered and field-projected listing.
+    Bodies are cached per catalog version with an ETag and gzip (see product_listing.py).
+    """
+    state = index_manager.current
+    try:
+        return listing_response(request, state.version, state.catalog, offset=offset, limit=limit, cursor=cursor,
+                                category=category, min_price=min_price, max_price=max_price,
+                                fields=parse_fields(fields))
+    except ValueError as e:
+        return error_response(str(e))
 
 # -------------------- Get Product by ID --------------------
-@app.get("/products/{product_id}")
+@app.get("/products/{product_id}", responses={200: {"model": ProductResponse}})
 def get_product_by_id(product_id: str):
+    products_cache = index_manager.current.catalog.by_id
     if product_id in products_cache:
-        return success_response("Product found", products_cache[product_id])
+        return fast_response(success_response("Product found", products_cache[product_id]))
     return error_response("Product not found")
 
 # -------------------- Search Products --------------------
-@app.post("/search")
-def search_products(query: str = Query(...), top_k: int = 5, category: str = None, min_price: float = None, max_price: float = None):
-    docs = retriever.invoke(query)
-
-    file_path = Path(__file__).parent / "data/products.json"
-    with open(file_path, "r", encoding="utf-8") as f:
-        products = {p["product_id"]: p for p in json.load(f)}
-
-    results = []
-    query_lower = query.lower()
-
-    # 1. Exact/substring match in product name
-    for doc in docs:
-        pid = doc.metadata.get("product_id")
-        if pid in products:
-            product = products[pid]
-            if query_lower in product["product_name"].lower():
-                results.append(product)
-
-    # 2. Fuzzy match if not enough results
+@app.post("/search", responses={200: {"model": SearchResponse}})
+async def search_products(query: str = Query(...), top_k: int = 5, category: str = None, min_price: float = None,
+                          max_price: float = None, mode: str = SEARCH_MODE):
+    state = index_manager.current
+    catalog = state.catalog
+    products = catalog.by_id
+
+    # Category/price filters: one numpy mask over catalog rows (None = no filter),
+    # pushed down into the BM25, FAISS and fuzzy searches before ranking.
+    allowed = catalog.filter_mask(category, min_price, max_price)
+
+    # 1. Hybrid BM25 + vector ranking in one pass (mode=bm25 skips the embedding call)
+    try:
+        ranked = await retrieval_limiter.run(state.searcher.asearch(query, top_k, allowed, mode))
+    except ValueError as e:
+        return error_response(str(e))
+    results = [products[pid] for pid in ranked if pid in products]
+    seen = set(ranked)
+
+    # 2. Fuzzy match if not enough results, e.g. misspelt names (trigram-shortlisted, precomputed corpus)
     if len(results) < top_k:
-        candidates = [p for p in products.values() if p not in results]
-        fuzzy_matches = process.extract(
-            query,
-            [(p["product_id"], p["product_name"] + " " + p.get("about_product", "")) for p in candidates],
-            scorer=fuzz.token_sort_ratio,
-            limit=top_k * 2
-        )
-        for (pid, _), score, _ in fuzzy_matches:
-            if score >= 70 and products[pid] not in results:
+        with span("fuzzy"):
+            fuzzy_matches = await asyncio.to_thread(state.fuzzy_docs.extract, query, top_k * 2 + len(seen),
+                                                    70, allowed)
+        for pid, _, _ in fuzzy_matches:
+            if pid in products and pid not in seen:
                 results.append(products[pid])
+                seen.add(pid)
             if len(results) >= top_k:
                 break
 
-    # 3. Apply filters if provided
-    def passes_filters(product):
-        if category and product.get("category") and product["category"].lower() != category.lower():
-            return False
-        if min_price is not None and float(product.get("price", 0)) < min_price:
-            return False
-        if max_price is not None and float(product.get("price", 0)) > max_price:
-            return False
-        return True
-    filtered_results = [p for p in results if passes_filters(p)]
-
-    # 4. Suggestions if no results
+    # 3. Suggestions if no results
     suggestions = []
-    if not filtered_results:
+    if not results:
         # Suggest similar product names
-        all_names = [p["product_name"] for p in products.values()]
-        suggestions = [s for s, score, _ in process.extract(query, all_names, scorer=fuzz.token_sort_ratio, limit=3) if score >= 60]
+        matches = await asyncio.to_thread(state.fuzzy_names.extract, query, 3, 60)
+        suggestions = [name for _, name, _ in matches]
+
+    return fast_response({"products": results[:top_k], "suggestions": suggestions})
 
-    return {"products": filtered_results[:top_k], "suggestions": suggestions}
 
+# -------------------- Query-based Recommendations --------------------
+# Declared before /recommendations/{product_id}, which would otherwise capture "by-query"
+@app.get("/recommendations/by-query", responses={200: {"model": ProductListResponse}})
+async def recommend_by_query(query: str = Query(...), top_k: int = 6):
+    state = index_manager.current
+    products_cache = state.catalog.by_id
+    try:
+        docs = await retrieval_limiter.run(state.retriever.ainvoke(query))
+        results = []
+        seen = set()
+        for doc in docs:
+            pid = doc.metadata.get("product_id")
+            if pid in products_cache and pid not in seen:
+                results.append(products_cache[pid])
+                seen.add(pid)
+            if len(results) >= top_k:
+                break
+        return fast_response(success_response("Query recommendations fetched", results))
+    except TimeoutError:
+        raise
+    except Exception as e:
+        logging.error(f"Query recommendations failed: {e}")
+        return error_response("Query recommendations failed")
 
 # -------------------- Recommendations --------------------
-@app.get("/recommendations/{product_id}")
-def recommend_products(product_id: str, top_k: int = 5):
+@app.get("/recommendations/{product_id}", responses={200: {"model": ProductListResponse}})
+async def recommend_products(product_id: str, top_k: int = 5):
+    state = index_manager.current
+    products_cache = state.catalog.by_id
     if product_id not in products_cache:
         return error_response("Product not found")
 
+    # Precomputed neighbour table (backend/neighbors.py): a lookup, no embedding call
+    if state.neighbors is not None and product_id in state.neighbors:
+        results = [products_cache[pid] for pid in state.neighbors.lookup(product_id, top_k)
+                   if pid != product_id and pid in products_cache]
+        if len(results) >= top_k:
+            return fast_response(success_response("Recommendations fetched", results))
+
+    # Table not built yet, product added since, or top_k wider than the table: embed the product text instead
     try:
         p = products_cache[product_id]
         parts = [
@@ -182,9 +380,9 @@ def recommend_products(product_id: str, top_k: int = 5):
             elif v:
                 parts.append(str(v))
         query_text = ' '.join([str(x) for x in parts if x])
-        docs = retriever.vectorstore.as_retriever(
+        docs = await retrieval_limiter.run(state.vectorstore.as_retriever(
             search_kwargs={"k": top_k + 1}
-        ).invoke(query_text)
+        ).ainvoke(query_text))
 
         results = []
         seen = set()
@@ -196,29 +394,41 @@ def recommend_products(product_id: str, top_k: int = 5):
             if len(results) >= top_k:
                 break
 
-        return success_response("Recommendations fetched", results)
+        return fast_response(success_response("Recommendations fetched", results))
+    except TimeoutError:
+        raise
     except Exception as e:
         logging.error(f"Recommendations failed: {e}")
         return error_response("Recommendations failed")
 
-# -------------------- Query-based Recommendations --------------------
-@app.get("/recommendations/by-query")
-def recommend_by_query(query: str = Query(...), top_k: int = 6):
+# -------------------- Admin: index hot reload --------------------
+def _admin_denied(token):
+    # Fail closed: without a configured ADMIN_TOKEN the admin routes are off
+    if not ADMIN_TOKEN:
+        return JSONResponse(status_code=404, content=error_response("Admin API disabled (set ADMIN_TOKEN)"))
+    if not token or not hmac.compare_digest(token, ADMIN_TOKEN):
+        return JSONResponse(status_code=403, content=error_response("Forbidden"))
+    return None
+
+@app.get("/admin/index")
+def api_index_status(x_admin_token: str = Header(None)):
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
+    return success_response("Index status", resources.status())
+
+@app.post("/admin/reload")
+def api_reload_index(force: bool = False, x_admin_token: str = Header(None)):
+    """Load the rebuilt FAISS index / products.json and swap them in without a restart."""
+    denied = _admin_denied(x_admin_token)
+    if denied:
+        return denied
     try:
-        docs = retriever.invoke(query)
-        results = []
-        seen = set()
-        for doc in docs:
-            pid = doc.metadata.get("product_id")
-            if pid in products_cache and pid not in seen:
-                results.append(products_cache[pid])
-                seen.add(pid)
-            if len(results) >= top_k:
-                break
-        return success_response("Query recommendations fetched", results)
+        state = index_manager.reload(force=force)
     except Exception as e:
-        logging.error(f"Query recommendations failed: {e}")
-        return error_response("Query recommendations failed")
+        logging.error(f"Index reload failed: {e}", exc_info=True)
+        return error_response("Index reload failed")
+    return success_response("Index reloaded", state.info())
 
 # -------------------- CART APIs --------------------
 @app.post("/cart/add")
@@ -239,9 +449,22 @@ def api_update_cart_quantity(user_id: str, product_id: str, quantity: int):
     except ValueError as e:
         return error_response(str(e))
 
+@app.post("/cart/batch")
+def api_cart_batch(request: CartBatchRequest):
+    """Apply add/remove/set operations to one user's cart in a single transaction (all or nothing)."""
+    try:
+        operations = [op.model_dump() for op in request.operations]
+        return success_response("Cart updated", apply_cart_batch(request.user_id, operations))
+    except ValueError as e:
+        return error_response(str(e))
+
 @app.get("/cart/{user_id}")
-def api_get_cart(user_id: str):
-    return success_response("Cart fetched", get_cart(user_id))
+def api_get_cart(user_id: str, hydrate: bool = False):
+    """hydrate=true adds product details, line totals and cart totals (one call instead of N+1)."""
+    cart = get_cart(user_id)
+    if hydrate:
+        cart = hydrate_cart(cart, index_manager.current.catalog)
+    return fast_response(success_response("Cart fetched", cart))
 
 @app.post("/cart/clear")
 def api_clear_cart(user_id: str):
@@ -256,11 +479,30 @@ def api_add_to_wishlist(user_id: str, product_id: str):
 def api_remove_from_wishlist(user_id: str, product_id: str):
     return success_response("Product removed from wishlist", remove_from_wishlist(user_id, product_id))
 
+@app.post("/wishlist/batch")
+def api_wishlist_batch(request: WishlistBatchRequest):
+    """Apply add/remove/move_to_cart operations to one user's wishlist in a single transaction."""
+    try:
+        operations = [op.model_dump() for op in request.operations]
+        return success_response("Wishlist updated", apply_wishlist_batch(request.user_id, operations))
+    except ValueError as e:
+        return error_response(str(e))
+
 @app.get("/wishlist/{user_id}")
 def api_get_wishlist(user_id: str):
     return success_response("Wishlist fetched", get_wishlist(user_id))
 
 @app.post("/wishlist/move-to-cart")
 def api_move_wishlist_to_cart(user_id: str, product_id: str, quantity: int = 1):
-    return success_response("Product moved from wishlist to cart",
-                            move_wishlist_to_cart(user_id, product_id, quantity))
+    try:
+        return success_response("Product moved from wishlist to cart",
+                                move_wishlist_to_cart(user_id, product_id, quantity))
+    except ValueError as e:
+        return error_response(str(e))
+
+@app.post("/wishlist/move-all-to-cart")
+def api_move_all_wishlist_to_cart(user_id: str, quantity: int = 1):
+    try:
+        return success_response("Wishlist moved to cart", move_all_wishlist_to_cart(user_id, quantity))
+    except ValueError as e:
+        return error_response(str(e))
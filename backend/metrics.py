@@ -0,0 +1,256 @@
+"""
+backend/metrics.py
+
+In-process request metrics in Prometheus text format (no extra dependency).
+
+- Counter / Gauge / Histogram with labels, all thread-safe.
+- span("stage") times a block of a request (embedding, faiss, llm, ...)
+  into the `stage_duration_seconds` histogram and, when enabled, into the
+  request's Server-Timing header.
+- start_request() / finish_request() are called by the HTTP middleware in
+  main.py to record per-route latency, status counts and in-flight requests.
+- Collectors (plain callables returning samples) export values that live
+  elsewhere, e.g. cache hit counts or limiter slots, at scrape time.
+
+Each uvicorn worker keeps its own registry; Prometheus sums them per
+instance label when it scrapes every worker.
+
+Config (env):
+  SERVER_TIMING  add a Server-Timing header to every response (default 0)
+"""
+
+import contextvars
+import math
+import os
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+# Latency buckets in seconds: sub-ms FAISS/BM25 lookups up to multi-second LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]  # (name suffix, labels, value)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [("", dict(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [("", dict(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, List[float]] = {}  # per-bucket counts + [sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = [(key, list(counts)) for key, counts in self._values.items()]
+        out: List[Sample] = []
+        for key, counts in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                out.append(("_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            out.append(("_bucket", {**labels, "le": "+Inf"}, counts[-1]))
+            out.append(("_sum", labels, counts[-2]))
+            out.append(("_count", labels, counts[-1]))
+        return out
+
+
+class CollectedMetric(_Metric):
+    """A metric whose samples are produced by a callable at scrape time."""
+
+    def __init__(self, name: str, help_text: str, kind: str, collect: Callable[[], Iterable[Sample]]):
+        super().__init__(name, help_text)
+        self.kind = kind
+        self._collect = collect
+
+    def samples(self) -> List[Sample]:
+        return list(self._collect())
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def collector(self, name: str, help_text: str, kind: str, collect: Callable[[], Iterable[Sample]]):
+        return self.register(CollectedMetric(name, help_text, kind, collect))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # A broken collector must not take the whole scrape down
+                continue
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route, method and status", ("method", "route", "status"))
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ("route",))
+stage_latency = registry.histogram(
+    "stage_duration_seconds", "Latency of request stages (embedding, faiss, bm25, llm, ...)", ("stage",))
+errors = registry.counter("errors_total", "Errors by kind (exception, timeout, ...)", ("kind",))
+
+
+# ---------------- Spans / Server-Timing ----------------
+
+# Per-request list of (stage, seconds); set by start_request, appended to by span()
+_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None)
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block as `stage` (works in sync and async code)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_latency.observe(elapsed, stage=stage)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def start_request(route: str) -> float:
+    _timings.set([])
+    http_in_flight.inc(route=route)
+    return time.perf_counter()
+
+
+def finish_request(method: str, route: str, status: int, started: float) -> Optional[str]:
+    """Record the request; returns the Server-Timing header value when enabled."""
+    elapsed = time.perf_counter() - started
+    http_in_flight.dec(route=route)
+    http_requests.inc(method=method, route=route, status=str(status))
+    http_latency.observe(elapsed, method=method, route=route)
+    if not SERVER_TIMING:
+        return None
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in _timings.get() or []]
+    parts.append(f"total;dur={elapsed * 1000:.1f}")
+    return ", ".join(parts)
@@ -0,0 +1,210 @@
+"""
+backend/mmap_index.py
+
+Memory-mapped serving format for the FAISS vectorstore, so that several
+uvicorn workers on one box share a single page-cache copy of the index
+instead of each holding its own heap copy.
+
+Files written next to LangChain's `index.faiss` / `index.pkl`:
+
+  <index>.mmap.faiss   FAISS index readable with IO_FLAG_MMAP. Flat indexes
+                       are stored as a one-list IndexIVFFlat (exact search,
+                       same results), because FAISS only memory-maps
+                       inverted lists; IVF indexes are stored as they are.
+  <index>.docs.bin     UTF-8 blob: for every vector row, its page_content,
+                       metadata JSON and docstore id, back to back.
+  <index>.docs.idx.npy int64 offsets into the blob (3 per row + end),
+                       loaded with np.load(mmap_mode="r").
+
+The FAISS file holds whatever index type is configured (index_config.py);
+IVF variants memory-map, HNSW and SQ8 are read into each worker's heap.
+
+Row i of the docs file belongs to FAISS position i, so the loader needs no
+pickled docstore or id dict at all. The serving copy is read-only; the
+ingestion tools still keep `index.pkl` to apply incremental updates, and
+re-export this format after every build/update.
+"""
+
+import json
+import logging
+import mmap
+import os
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from backend.index_config import apply_search_params, build_index, load_index_config, save_index_config
+
+
+def mmap_paths(folder: Path, index_name: str) -> Tuple[Path, Path, Path]:
+    folder = Path(folder)
+    return (
+        folder / f"{index_name}.mmap.faiss",
+        folder / f"{index_name}.docs.bin",
+        folder / f"{index_name}.docs.idx.npy",
+    )
+
+
+def has_mmap_index(folder: Path, index_name: str) -> bool:
+    return all(path.exists() for path in mmap_paths(folder, index_name))
+
+
+# ---------------- Writing ----------------
+
+def _mmappable(index: faiss.Index) -> faiss.Index:
+    """Return an index whose vectors FAISS can memory-map on read."""
+    if isinstance(index, faiss.IndexIVF) or index.ntotal == 0:
+        return index
+    if not isinstance(index, faiss.IndexFlat):
+        logging.warning(f"{type(index).__name__} cannot be memory-mapped; workers will each load a copy")
+        return index
+
+    # One inverted list holding every vector, searched exhaustively: same
+    # results as the flat index, but the list data is mmap-able.
+    vectors = index.reconstruct_n(0, index.ntotal)
+    quantizer = faiss.IndexFlat(index.d, index.metric_type)
+    quantizer.add(vectors.mean(axis=0, keepdims=True))
+    ivf = faiss.IndexIVFFlat(quantizer, index.d, 1, index.metric_type)
+    ivf.is_trained = True
+    ivf.add_with_ids(vectors, np.arange(index.ntotal, dtype=np.int64))
+    return ivf
+
+
+def export_mmap_index(vectorstore: FAISS, folder: Path, index_name: str,
+                      config: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Write `vectorstore` in the memory-mapped serving format, as the index type
+    in `config` (default: the persisted config, see index_config.py).
+    """
+    index_path, blob_path, offsets_path = mmap_paths(folder, index_name)
+    tmp_index = index_path.with_suffix(".tmp")
+    tmp_blob = blob_path.with_suffix(".tmp")
+    tmp_offsets = offsets_path.with_name(offsets_path.name + ".tmp")
+
+    config = config or load_index_config(folder, index_name)
+    serving = vectorstore.index
+    if config["index_type"] != "flat" and serving.ntotal:
+        vectors = serving.reconstruct_n(0, serving.ntotal)
+        serving = build_index(vectors, config, serving.metric_type)
+    faiss.write_index(_mmappable(serving), str(tmp_index))
+
+    offsets: List[int] = [0]
+    with open(tmp_blob, "wb") as blob:
+        for row in range(vectorstore.index.ntotal):
+            doc_id = vectorstore.index_to_docstore_id[row]
+            doc = vectorstore.docstore.search(doc_id)
+            for part in (doc.page_content, json.dumps(doc.metadata, ensure_ascii=False), str(doc_id)):
+                data = part.encode("utf-8")
+                blob.write(data)
+                offsets.append(offsets[-1] + len(data))
+    with open(tmp_offsets, "wb") as f:
+        np.save(f, np.asarray(offsets, dtype=np.int64))
+
+    # os.replace swaps inodes, so workers still mapping the old files keep reading them safely
+    os.replace(tmp_blob, blob_path)
+    os.replace(tmp_offsets, offsets_path)
+    os.replace(tmp_index, index_path)
+    save_index_config(folder, index_name, config)
+
+
+# ---------------- Reading ----------------
+
+class MmapDocstore(Docstore):
+    """Read-only docstore over the mmap'd docs blob; keys are FAISS row numbers."""
+
+    def __init__(self, blob_path: Path, offsets_path: Path):
+        self._offsets = np.load(offsets_path, mmap_mode="r")
+        with open(blob_path, "rb") as f:
+            # mmap of an empty file is not allowed
+            self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    def __len__(self) -> int:
+        return (len(self._offsets) - 1) // 3
+
+    def _part(self, row: int, field: int) -> str:
+        start = int(self._offsets[3 * row + field])
+        end = int(self._offsets[3 * row + field + 1])
+        return self._blob[start:end].decode("utf-8")
+
+    def doc_id(self, row: int) -> str:
+        """Docstore id of `row` without decoding its text or metadata."""
+        return self._part(row, 2)
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        """Metadata of `row` without decoding its text."""
+        return json.loads(self._part(row, 1))
+
+    def search(self, search: Union[int, str]) -> Union[str, Document]:
+        row = int(search)
+        if not 0 <= row < len(self):
+            return f"ID {search} not found."
+        return Document(
+            id=self._part(row, 2),
+            page_content=self._part(row, 0),
+            metadata=json.loads(self._part(row, 1)),
+        )
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        raise NotImplementedError("The memory-mapped docstore is read-only; rebuild the index instead")
+
+    def delete(self, ids: List) -> None:
+        raise NotImplementedError("The memory-mapped docstore is read-only; rebuild the index instead")
+
+
+class RowIds(Mapping):
+    """index_to_docstore_id stand-in: FAISS position i maps to docstore key i."""
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def __getitem__(self, row: int) -> int:
+        if not 0 <= row < self.size:
+            raise KeyError(row)
+        return int(row)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.size))
+
+
+def load_mmap_vectorstore(embeddings, folder: Path, index_name: str,
+                          nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> FAISS:
+    """
+    Load the serving format written by export_mmap_index (index and docs stay
+    on disk). `nprobe` / `ef_search` override the persisted search settings.
+    """
+    index_path, blob_path, offsets_path = mmap_paths(folder, index_name)
+    index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    apply_search_params(index, load_index_config(folder, index_name), nprobe, ef_search)
+    docstore = MmapDocstore(blob_path, offsets_path)
+    if index.ntotal != len(docstore):
+        raise ValueError(f"{index_path.name} has {index.ntotal} vectors but docs file has {len(docstore)} rows")
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=RowIds(index.ntotal),
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export an existing FAISS index (index.faiss + index.pkl) "
+                                                 "in the memory-mapped serving format, without re-embedding")
+    parser.add_argument("--folder", default=str(Path(__file__).parent / "vectorstore"))
+    parser.add_argument("--index-name", default="index")
+    args = parser.parse_args()
+
+    vectorstore = FAISS.load_local(args.folder, embeddings=None, index_name=args.index_name,
+                                   allow_dangerous_deserialization=True)
+    export_mmap_index(vectorstore, Path(args.folder), args.index_name)
+    print(f"✅ Exported {vectorstore.index.ntotal} vectors to {mmap_paths(args.folder, args.index_name)[0]}")
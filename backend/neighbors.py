@@ -0,0 +1,261 @@
+"""
+backend/neighbors.py
+
+Precomputed product-to-product neighbour table for /recommendations/{id}.
+
+Every product is already embedded in the FAISS index, so "similar products"
+does not need a new embedding call per request. This offline job
+reconstructs the stored product vectors, finds each product's top-N nearest
+neighbours in batched exact searches, and writes:
+
+  <index>.neighbors.npy     int32 (products x N): row numbers of the
+                            neighbours, nearest first, -1 = padding
+  <index>.neighbor_ids.npy  fixed-width product ids, one per row
+
+Both are loaded with np.load(mmap_mode="r"), so the API answers
+recommendations with an array lookup. rebuild_vectorstore.py refreshes the
+table after every build/update; it can also be run on its own.
+
+An incremental index update does not redo the O(n²) all-pairs search:
+update_neighbor_table() re-searches only the changed/added products and the
+products whose stored neighbours were changed or removed. Every other
+row's list is still exact among the unchanged products, so it only has to
+be merged with its nearest changed/added products (an n x changed search).
+When most rows would be re-searched anyway it falls back to a full build.
+
+  python -m backend.neighbors [--top-n 20]
+
+Config (env):
+  NEIGHBORS_TOP_N       neighbours stored per product (default 20)
+  NEIGHBORS_BATCH_SIZE  query rows per search batch (default 1024)
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+TOP_N = int(os.getenv("NEIGHBORS_TOP_N", "20"))
+BATCH_SIZE = int(os.getenv("NEIGHBORS_BATCH_SIZE", "1024"))
+
+
+def neighbor_paths(folder: Path, index_name: str) -> Tuple[Path, Path]:
+    folder = Path(folder)
+    return folder / f"{index_name}.neighbors.npy", folder / f"{index_name}.neighbor_ids.npy"
+
+
+# ---------------- Offline job ----------------
+
+def compute_neighbors(vectors: np.ndarray, top_n: int = TOP_N, batch_size: int = BATCH_SIZE,
+                      metric: int = faiss.METRIC_L2, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Exact top-`top_n` neighbours of every row (or only of `rows`, in that
+    order) among all rows (itself excluded), searched `batch_size` rows at a time.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, d = vectors.shape
+    query_rows = np.arange(n) if rows is None else np.asarray(rows, dtype=np.int64)
+    table = np.full((len(query_rows), top_n), -1, dtype=np.int32)
+    if n < 2 or not len(query_rows):
+        return table
+
+    index = faiss.IndexFlat(d, metric)
+    index.add(vectors)
+    k = min(top_n + 1, n)
+    for start in range(0, len(query_rows), batch_size):
+        batch = query_rows[start:start + batch_size]
+        _, found = index.search(vectors[batch], k)
+        rows = batch[:, None]
+        # Drop each row's own hit (usually, but not always, the first one):
+        # a stable sort moves kept hits to the front without reordering them
+        keep = (found != rows) & (found >= 0)
+        order = np.argsort(~keep, axis=1, kind="stable")[:, :top_n]
+        hits = np.take_along_axis(found, order, axis=1)
+        valid = np.take_along_axis(keep, order, axis=1)
+        table[start:start + len(found), :hits.shape[1]] = np.where(valid, hits, -1)
+    return table
+
+
+def _distances(queries: np.ndarray, neighbours: np.ndarray, vectors: np.ndarray, metric: int) -> np.ndarray:
+    """Distance (smaller = nearer) from each query row to each of its neighbour rows; inf for -1."""
+    x = vectors[np.maximum(neighbours, 0)]
+    q = vectors[queries][:, None, :]
+    if metric == faiss.METRIC_INNER_PRODUCT:
+        dist = -np.einsum("bkd,bkd->bk", np.broadcast_to(q, x.shape), x)
+    else:
+        diff = x - q
+        dist = np.einsum("bkd,bkd->bk", diff, diff)
+    return np.where(neighbours >= 0, dist, np.inf)
+
+
+def _stored_vectors(vectorstore: FAISS) -> Tuple[List[str], np.ndarray]:
+    """Product id and vector of every FAISS row."""
+    index = vectorstore.index
+    ids = []
+    for row in range(index.ntotal):
+        doc_id = vectorstore.index_to_docstore_id[row]
+        doc = vectorstore.docstore.search(doc_id)
+        ids.append(str(doc.metadata.get("product_id", doc_id)))
+    vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else np.zeros((0, index.d), np.float32)
+    return ids, np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def _save_table(folder: Path, index_name: str, ids: List[str], table: np.ndarray) -> None:
+    table_path, ids_path = neighbor_paths(folder, index_name)
+    tmp_table = table_path.with_name(table_path.name + ".tmp")
+    tmp_ids = ids_path.with_name(ids_path.name + ".tmp")
+    with open(tmp_ids, "wb") as f:
+        np.save(f, np.asarray(ids, dtype=f"U{max(map(len, ids), default=1)}"))
+    with open(tmp_table, "wb") as f:
+        np.save(f, table)
+    os.replace(tmp_ids, ids_path)
+    os.replace(tmp_table, table_path)
+
+
+def build_neighbor_table(vectorstore: FAISS, folder: Path, index_name: str, top_n: int = TOP_N,
+                         batch_size: int = BATCH_SIZE) -> int:
+    """Compute and save the neighbour table for `vectorstore`; returns the number of products."""
+    started = time.perf_counter()
+    ids, vectors = _stored_vectors(vectorstore)
+    table = compute_neighbors(vectors, top_n, batch_size, vectorstore.index.metric_type)
+    _save_table(folder, index_name, ids, table)
+    logging.info(f"Neighbour table: {len(ids)} products x {top_n} in {time.perf_counter() - started:.2f}s")
+    return len(ids)
+
+
+def update_neighbor_table(vectorstore: FAISS, folder: Path, index_name: str, updated_ids: Iterable[str],
+                          removed_ids: Iterable[str], top_n: int = TOP_N, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Bring the saved table in line with `vectorstore` after the products in
+    `updated_ids` (added or re-embedded) and `removed_ids` changed; same
+    result as build_neighbor_table up to the order of equidistant neighbours.
+    Returns the number of products.
+    """
+    table_path, ids_path = neighbor_paths(folder, index_name)
+    if not (table_path.exists() and ids_path.exists()):
+        return build_neighbor_table(vectorstore, folder, index_name, top_n, batch_size)
+    started = time.perf_counter()
+    old_table = np.load(table_path)
+    old_ids = [str(pid) for pid in np.load(ids_path)]
+    ids, vectors = _stored_vectors(vectorstore)
+    n = len(ids)
+    if old_table.shape[1] != top_n or len(old_table) != len(old_ids) or n < 2:
+        return build_neighbor_table(vectorstore, folder, index_name, top_n, batch_size)
+    metric = vectorstore.index.metric_type
+
+    row_of = {pid: row for row, pid in enumerate(ids)}
+    updated = {pid for pid in updated_ids if pid in row_of}
+    gone = updated | set(removed_ids)
+    # Old neighbour lists re-expressed in new rows; lists that held a changed/removed product are stale
+    old_to_new = np.fromiter((-1 if pid in gone else row_of.get(pid, -1) for pid in old_ids),
+                             dtype=np.int64, count=len(old_ids))
+    old_stale = np.fromiter((pid in gone for pid in old_ids), dtype=bool, count=len(old_ids))
+    old_row_of = {pid: row for row, pid in enumerate(old_ids)}
+
+    carried = np.full((n, top_n), -1, dtype=np.int64)
+    research = np.zeros(n, dtype=bool)
+    for row, pid in enumerate(ids):
+        old = old_row_of.get(pid)
+        if old is None or pid in updated:
+            research[row] = True
+            continue
+        neighbours = old_table[old]
+        valid = neighbours >= 0
+        if old_stale[neighbours[valid]].any():
+            research[row] = True
+        else:
+            carried[row, :valid.sum()] = old_to_new[neighbours[valid]]
+
+    research_rows = np.flatnonzero(research)
+    if len(research_rows) * 2 > n:
+        return build_neighbor_table(vectorstore, folder, index_name, top_n, batch_size)
+
+    table = np.full((n, top_n), -1, dtype=np.int32)
+    table[research_rows] = compute_neighbors(vectors, top_n, batch_size, metric, rows=research_rows)
+
+    # Every other row: merge its carried list with its nearest updated products
+    keep_rows = np.flatnonzero(~research)
+    dirty_rows = np.fromiter((row_of[pid] for pid in updated), dtype=np.int64, count=len(updated))
+    dirty_index = None
+    if len(dirty_rows):
+        dirty_index = faiss.IndexFlat(vectors.shape[1], metric)
+        dirty_index.add(vectors[dirty_rows])
+    for start in range(0, len(keep_rows), batch_size):
+        batch = keep_rows[start:start + batch_size]
+        neighbours = carried[batch]
+        dist = _distances(batch, neighbours, vectors, metric)
+        if dirty_index is not None:
+            found_dist, found = dirty_index.search(vectors[batch], min(top_n, len(dirty_rows)))
+            if metric == faiss.METRIC_INNER_PRODUCT:
+                found_dist = -found_dist
+            candidates = np.where(found >= 0, dirty_rows[np.maximum(found, 0)], -1)
+            neighbours = np.concatenate([neighbours, candidates], axis=1)
+            dist = np.concatenate([dist, np.where(found >= 0, found_dist, np.inf)], axis=1)
+        order = np.argsort(dist, axis=1, kind="stable")[:, :top_n]
+        merged = np.take_along_axis(neighbours, order, axis=1)
+        merged[np.isinf(np.take_along_axis(dist, order, axis=1))] = -1
+        table[batch] = merged
+
+    _save_table(folder, index_name, ids, table)
+    logging.info(f"Neighbour table updated: {len(research_rows)} of {n} products re-searched, "
+                 f"{len(updated)} changed/added, in {time.perf_counter() - started:.2f}s")
+    return n
+
+
+# ---------------- Serving ----------------
+
+class NeighborTable:
+    """Memory-mapped neighbour table; lookups never touch the embedding API."""
+
+    def __init__(self, table: np.ndarray, ids: np.ndarray):
+        self.table = table
+        self.ids = ids
+        self.row_of: Dict[str, int] = {str(pid): row for row, pid in enumerate(ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self.row_of
+
+    def lookup(self, product_id: str, top_k: Optional[int] = None) -> List[str]:
+        """Neighbour product ids of `product_id`, nearest first ([] if unknown)."""
+        row = self.row_of.get(product_id)
+        if row is None:
+            return []
+        hits = self.table[row, :top_k]
+        return [str(self.ids[i]) for i in hits if i >= 0]
+
+
+def load_neighbor_table(folder: Path, index_name: str) -> Optional[NeighborTable]:
+    """The saved table, or None if it has not been built for this index yet."""
+    table_path, ids_path = neighbor_paths(folder, index_name)
+    if not (table_path.exists() and ids_path.exists()):
+        return None
+    table = np.load(table_path, mmap_mode="r")
+    ids = np.load(ids_path, mmap_mode="r")
+    if len(table) != len(ids):
+        logging.warning(f"{table_path.name} does not match {ids_path.name}; ignoring the neighbour table")
+        return None
+    return NeighborTable(table, ids)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute product-to-product neighbours from the FAISS index")
+    parser.add_argument("--folder", default=str(Path(__file__).parent / "vectorstore"))
+    parser.add_argument("--index-name", default="index")
+    parser.add_argument("--top-n", type=int, default=TOP_N, help="neighbours stored per product")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="query rows per search batch")
+    args = parser.parse_args()
+
+    vectorstore = FAISS.load_local(args.folder, embeddings=None, index_name=args.index_name,
+                                   allow_dangerous_deserialization=True)
+    count = build_neighbor_table(vectorstore, Path(args.folder), args.index_name, args.top_n, args.batch_size)
+    print(f"✅ Neighbour table built for {count} products ({args.top_n} neighbours each).")
@@ -0,0 +1,215 @@
+"""
+backend/product_listing.py
+
+GET /products: paginated, filtered and projected catalog listing with
+pre-serialized, cached response bodies.
+
+- Pagination: `offset` + `limit`, or `cursor` (the last product_id of the
+  previous page, returned as `page.next_cursor`). Cursors stay valid across
+  catalog reloads as long as that product still exists.
+- Filters (`category`, `min_price`, `max_price`) are one numpy mask over the
+  catalog's row-aligned columns (Catalog.filter_mask), results are in catalog order.
+- `fields=product_id,product_name` projects each product to those keys.
+- The serialized JSON body of every (catalog version, query) is kept in an
+  LRU bounded by bytes, together with its strong ETag and gzip / brotli encodings
+  (compressed once, on first request). Repeat requests are a dict lookup;
+  a matching If-None-Match gets a bodiless 304.
+
+Without pagination parameters the whole catalog is returned (as before),
+but still from the cached, compressed body.
+
+Config (env):
+  PRODUCTS_MAX_LIMIT   largest page size accepted (default 1000)
+  PRODUCTS_CACHE_MB    size budget of the cached bodies per worker (default 64)
+"""
+
+import gzip
+import hashlib
+import os
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+from backend.serialization import dumps
+
+try:  # optional: brotli is only used when installed
+    import brotli
+except ImportError:
+    brotli = None
+
+MAX_LIMIT = int(os.getenv("PRODUCTS_MAX_LIMIT", "1000"))
+CACHE_BYTES = int(float(os.getenv("PRODUCTS_CACHE_MB", "64")) * 1024 * 1024)
+MIN_COMPRESS_SIZE = 1024  # bytes; smaller bodies are sent as they are
+
+
+class CachedBody:
+    """One serialized response plus its lazily built compressed variants."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            if encoding == "br":
+                data = brotli.compress(self.body, quality=5)
+            else:
+                data = gzip.compress(self.body, compresslevel=6)
+            self._encoded[encoding] = data
+        return data
+
+
+class ListingCache:
+    """
+    Thread-safe LRU of CachedBody keyed by normalized query, bounded by the
+    total size of the uncompressed bodies. Entries of an older catalog
+    version are dropped as soon as a new version is requested, and late
+    writes for an older version are ignored.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Tuple, CachedBody]" = OrderedDict()
+        self._bytes = 0
+        self._version: Any = None
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, version: Any) -> None:
+        if version != self._version:
+            self._items.clear()
+            self._bytes = 0
+            self._version = version
+
+    def get(self, version: Any, key: Tuple) -> Optional[CachedBody]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, version: Any, key: Tuple, entry: CachedBody) -> None:
+        if self.max_bytes <= 0:
+            return
+        with self._lock:
+            # Only get() moves the cache to a new version; a body rendered from a
+            # catalog that was swapped out meanwhile is dropped, not cached
+            if version != self._version:
+                return
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._items[key] = entry
+            self._bytes += len(entry.body)
+            # Always keep the newest entry, even if it alone is over budget (e.g. the full catalog)
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted.body)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._items), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses}
+
+
+listing_cache = ListingCache()
+
+
+# ---------------- Query ----------------
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    if not fields:
+        return None
+    names = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    return names or None
+
+
+def list_products(catalog, offset: int = 0, limit: Optional[int] = None, cursor: Optional[str] = None,
+                  category: Optional[str] = None, min_price: Optional[float] = None,
+                  max_price: Optional[float] = None, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """
+    The response payload for one page. Raises ValueError for an unknown cursor.
+    """
+    mask = catalog.filter_mask(category, min_price, max_price)
+    # Matching product ids in catalog order
+    ids: List[str] = catalog.ids if mask is None else catalog.ids_where(mask)
+    total = len(ids)
+
+    start = offset
+    if cursor is not None:
+        row = catalog.order.get(cursor)
+        if row is None:
+            raise ValueError("Unknown cursor")
+        start = bisect_right(ids, row, key=catalog.order.__getitem__)
+    end = total if limit is None else min(total, start + limit)
+    page_ids = ids[start:end]
+
+    by_id = catalog.by_id
+    if fields:
+        items = [{f: by_id[pid][f] for f in fields if f in by_id[pid]} for pid in page_ids]
+    else:
+        items = [by_id[pid] for pid in page_ids]
+    next_cursor = page_ids[-1] if page_ids and end < total else None
+    return {
+        "status": "success",
+        "message": "Product list fetched",
+        "data": items,
+        "page": {"offset": start, "limit": limit, "total": total, "next_cursor": next_cursor},
+    }
+
+
+# ---------------- HTTP ----------------
+
+def _accepted_encoding(request: Request) -> Optional[str]:
+    accept = request.headers.get("accept-encoding", "").lower()
+    offered = {part.split(";")[0].strip() for part in accept.split(",")}
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return None
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Encoded variants carry a "-gzip" / "-br" suffix on the same content hash
+    tags = (t.strip().removeprefix("W/").strip('"') for t in header.split(","))
+    return any(t.split("-")[0] == etag for t in tags)
+
+
+def listing_response(request: Request, version: Any, catalog, **query) -> Response:
+    """Cached, compressed (and conditional) response for GET /products."""
+    key = tuple(sorted(query.items()))
+    entry = listing_cache.get(version, key)
+    if entry is None:
+        payload = list_products(catalog, **query)
+        body = dumps(payload)
+        entry = CachedBody(body)
+        listing_cache.put(version, key, entry)
+
+    encoding = _accepted_encoding(request) if len(entry.body) >= MIN_COMPRESS_SIZE else None
+    etag = f'"{entry.etag}-{encoding}"' if encoding else f'"{entry.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(entry.encoded(encoding), media_type="application/json", headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
@@ -1,12 +1,19 @@
 # backend/rebuild_vectorstore.py
-import json
+import argparse
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from langchain_community.vectorstores import FAISS
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain.schema import Document
 
+from backend.catalog_store import build_columnar, columns_dir
+from backend.index_config import INDEX_TYPES, make_config
+from backend.neighbors import build_neighbor_table, neighbor_paths, update_neighbor_table
+from backend.ingestion import (
+    BATCH_SIZE, WORKERS, MAX_RETRIES, build_vectorstore, iter_json_array, load_hashes,
+    source_signature, update_vectorstore,
+)
+
 # Load env vars
 load_dotenv()
 
@@ -14,6 +21,7 @@ load_dotenv()
 DATA_FILE = Path(__file__).parent / "data/products.json"
 VECTORSTORE_PATH = Path(__file__).parent / "vectorstore"
 INDEX_NAME = "index"
+EMBEDDING_MODEL = "models/embedding-001"
 
 def _normalize_value(value):
     if value is None:
@@ -73,36 +81,115 @@ def _compose_doc_text(product: dict) -> str:
         parts.append(str(product))
     return " ".join(parts)
 
-def rebuild_vectorstore():
-    # 1️⃣ Load products.json
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        products = json.load(f)
-
-    # 2️⃣ Convert to LangChain Document format (enriched content)
-    docs = []
-    for product in products:
-        text = _compose_doc_text(product)
+def iter_product_docs(data_file: Path = DATA_FILE):
+    """Stream products.json and yield one enriched Document per product."""
+    for product in iter_json_array(data_file):
         metadata = {"product_id": product.get("product_id") or product.get("id")}
         if not metadata["product_id"]:
             # Skip items without an identifier
             continue
-        docs.append(Document(page_content=text, metadata=metadata))
+        yield Document(page_content=_compose_doc_text(product), metadata=metadata)
 
-    # 3️⃣ Create embeddings
-    embeddings = GoogleGenerativeAIEmbeddings(
-        model="models/embedding-001",
+def _embeddings():
+    return GoogleGenerativeAIEmbeddings(
+        model=EMBEDDING_MODEL,
         google_api_key=os.getenv("GEMINI_API_KEY")
     )
 
-    # 4️⃣ Create FAISS index
-    vectorstore = FAISS.from_documents(docs, embedding=embeddings)
+def _signature():
+    return source_signature(DATA_FILE, model=EMBEDDING_MODEL, text="enriched")
+
+def build_catalog_columns(data_file: Path = DATA_FILE):
+    """Refresh the memory-mapped columnar catalog the API loads instead of products.json."""
+    count = build_columnar(iter_json_array(data_file), data_file)
+    print(f"✅ Columnar catalog written to {columns_dir(data_file)} ({count} products).")
+
+def rebuild_vectorstore(batch_size: int = BATCH_SIZE, workers: int = WORKERS,
+                        max_retries: int = MAX_RETRIES, fresh: bool = False, index_config=None):
+    """Full rebuild: embed every product (stored under its product_id)."""
+    # Stream products -> batched, parallel, checkpointed embedding -> FAISS index
+    vectorstore = build_vectorstore(
+        iter_product_docs(DATA_FILE),
+        _embeddings(),
+        folder=VECTORSTORE_PATH,
+        index_name=INDEX_NAME,
+        signature=_signature(),
+        batch_size=batch_size,
+        workers=workers,
+        max_retries=max_retries,
+        fresh=fresh,
+        id_key="product_id",
+        index_config=index_config,
+    )
+    print(f"✅ Vectorstore rebuilt successfully with {vectorstore.index.ntotal} products.")
+    build_neighbor_table(vectorstore, VECTORSTORE_PATH, INDEX_NAME)
+    return vectorstore
+
+def update_index(batch_size: int = BATCH_SIZE, workers: int = WORKERS, max_retries: int = MAX_RETRIES,
+                 index_config=None):
+    """
+    Incremental update: only products whose composed text changed (by content
+    hash) are re-embedded; removed products are deleted from the index.
+    Falls back to a full rebuild if the index has no hash manifest yet.
+    """
+    old_hashes = load_hashes(VECTORSTORE_PATH, INDEX_NAME)
+    if old_hashes is None:
+        print("ℹ️  No content-hash manifest found; doing a full rebuild.")
+        return rebuild_vectorstore(batch_size, workers, max_retries, index_config=index_config)
+
+    vectorstore, stats = update_vectorstore(
+        iter_product_docs(DATA_FILE),
+        _embeddings(),
+        folder=VECTORSTORE_PATH,
+        index_name=INDEX_NAME,
+        signature=_signature(),
+        id_key="product_id",
+        batch_size=batch_size,
+        workers=workers,
+        max_retries=max_retries,
+        index_config=index_config,
+    )
+    print(f"✅ Vectorstore updated: {stats['added']} added, {stats['changed']} changed, "
+          f"{stats['removed']} removed ({vectorstore.index.ntotal} products).")
+    # Only the changed/added products and the neighbour lists they touch are re-searched
+    changed = stats["added"] or stats["changed"] or stats["removed"]
+    if not neighbor_paths(VECTORSTORE_PATH, INDEX_NAME)[0].exists():
+        build_neighbor_table(vectorstore, VECTORSTORE_PATH, INDEX_NAME)
+    elif changed:
+        new_hashes = load_hashes(VECTORSTORE_PATH, INDEX_NAME) or {}
+        updated = [pid for pid, h in new_hashes.items() if old_hashes.get(pid) != h]
+        removed = [pid for pid in old_hashes if pid not in new_hashes]
+        update_neighbor_table(vectorstore, VECTORSTORE_PATH, INDEX_NAME, updated, removed)
+    return vectorstore
 
-    # Ensure folder exists
-    VECTORSTORE_PATH.mkdir(parents=True, exist_ok=True)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the FAISS product index from products.json")
+    parser.add_argument("--full", action="store_true",
+                        help="re-embed every product instead of only new/changed ones")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="documents per embedding request")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="concurrent embedding batches")
+    parser.add_argument("--max-retries", type=int, default=MAX_RETRIES, help="retries per failed batch")
+    parser.add_argument("--fresh", action="store_true", help="ignore any checkpoint from an interrupted run")
+    # Serving index type (persisted in index.config.json; omit to keep the current one)
+    parser.add_argument("--index-type", choices=INDEX_TYPES, help="serving index type (default: keep current)")
+    parser.add_argument("--nlist", type=int, help="IVF lists (default ~4*sqrt(products))")
+    parser.add_argument("--pq-m", type=int, help="PQ sub-quantizers for ivf_pq (default 64)")
+    parser.add_argument("--hnsw-m", type=int, help="HNSW neighbours per node (default 32)")
+    parser.add_argument("--nprobe", type=int, help="default IVF lists probed per query (default 8)")
+    parser.add_argument("--ef-search", type=int, help="default HNSW search depth (default 64)")
+    return parser.parse_args(argv)
 
-    # 5️⃣ Save FAISS index locally
-    vectorstore.save_local(folder_path=VECTORSTORE_PATH, index_name=INDEX_NAME)
-    print(f"✅ Vectorstore rebuilt successfully with {len(docs)} products.")
+def index_config_from_args(args):
+    if args.index_type is None:
+        return None
+    return make_config(args.index_type, nlist=args.nlist, pq_m=args.pq_m, hnsw_m=args.hnsw_m,
+                       nprobe=args.nprobe, ef_search=args.ef_search)
 
 if __name__ == "__main__":
-    rebuild_vectorstore()
+    args = parse_args()
+    index_config = index_config_from_args(args)
+    build_catalog_columns(DATA_FILE)
+    if args.full or args.fresh:
+        rebuild_vectorstore(args.batch_size, args.workers, args.max_retries, args.fresh, index_config)
+    else:
+        update_index(args.batch_size, args.workers, args.max_retries, index_config)
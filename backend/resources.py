@@ -0,0 +1,146 @@
+"""
+backend/resources.py
+
+Application-scoped resource container: the single owner of the embeddings
+client, the served FAISS index + catalog (IndexManager), the Gemini LLM and
+the RetrievalQA chain. main.py and chat_chain.py both go through
+`resources`, so each worker process holds exactly one copy of the index.
+
+Every component is created lazily on first use (thread-safe). On startup
+`warm_up()` initialises the index and the LLM in parallel instead, so the
+first request does not pay for them. How long each component took to load
+is recorded in `load_times` (seconds) and reported by `status()`, which
+GET /admin/index returns.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable
+
+from dotenv import load_dotenv
+
+from backend import retriever as retriever_module
+from backend.answer_cache import answer_cache
+from backend.index_manager import CurrentRetriever, IndexManager
+from backend.product_listing import listing_cache
+
+load_dotenv()
+
+LLM_MODEL = "gemini-2.5-flash"
+LLM_TEMPERATURE = 0.3
+
+
+class Resources:
+    """Lazily-built, shared heavy objects for one worker process."""
+
+    def __init__(self):
+        self.load_times: Dict[str, float] = {}
+        self._locks = {name: threading.Lock() for name in ("embeddings", "llm", "qa_chain", "index")}
+        self._embeddings = None
+        self._llm = None
+        self._qa_chain = None
+        self.index = IndexManager(embeddings_provider=lambda: self.embeddings)
+
+    def _timed(self, name: str, build):
+        started = time.perf_counter()
+        value = build()
+        self.load_times[name] = time.perf_counter() - started
+        logging.info(f"Loaded {name} in {self.load_times[name]:.2f}s")
+        return value
+
+    # ---------------- Components ----------------
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            with self._locks["embeddings"]:
+                if self._embeddings is None:
+                    self._embeddings = self._timed("embeddings", retriever_module.get_embeddings)
+        return self._embeddings
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._locks["llm"]:
+                if self._llm is None:
+                    self._llm = self._timed("llm", self._build_llm)
+        return self._llm
+
+    @property
+    def qa_chain(self):
+        if self._qa_chain is None:
+            with self._locks["qa_chain"]:
+                if self._qa_chain is None:
+                    self._qa_chain = self._timed("qa_chain", self._build_qa_chain)
+        return self._qa_chain
+
+    def ensure_index(self):
+        """Load the index/catalog if no version is being served yet."""
+        if not self.index.loaded:
+            with self._locks["index"]:
+                if not self.index.loaded:
+                    self._timed("index", lambda: self.index.current)
+        return self.index.current
+
+    def _build_llm(self):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        # temperature=0.3 => mostly factual, thoda creative
+        return ChatGoogleGenerativeAI(
+            model=LLM_MODEL,
+            temperature=LLM_TEMPERATURE,
+            google_api_key=os.getenv("GEMINI_API_KEY"),
+        )
+
+    def _build_qa_chain(self):
+        from langchain.chains import RetrievalQA
+
+        # Retriever follows whatever index version is being served (hot reload aware)
+        return RetrievalQA.from_chain_type(
+            llm=self.llm,
+            retriever=CurrentRetriever(manager=self.index),
+            return_source_documents=True,
+        )
+
+    # ---------------- Startup ----------------
+
+    def warm_up(self, components: Iterable[str] = ("index", "qa_chain")) -> Dict[str, float]:
+        """Initialise the given components in parallel; returns load_times."""
+        builders = {
+            "index": self.ensure_index,
+            "embeddings": lambda: self.embeddings,
+            "llm": lambda: self.llm,
+            "qa_chain": lambda: self.qa_chain,
+        }
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(builders)) as pool:
+            futures = [pool.submit(builders[name]) for name in components]
+            for future in futures:
+                future.result()
+        self.load_times["warm_up"] = time.perf_counter() - started
+        return dict(self.load_times)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "initialized": {
+                "embeddings": self._embeddings is not None,
+                "index": self.index.loaded,
+                "llm": self._llm is not None,
+                "qa_chain": self._qa_chain is not None,
+            },
+            "load_times": {k: round(v, 4) for k, v in self.load_times.items()},
+            # breakdown of the most recent index (re)load: vectorstore / catalog / fuzzy_index
+            "index_load_times": {k: round(v, 4) for k, v in self.index.load_times.items()},
+            "index": self.index.current.info() if self.index.loaded else None,
+            "caches": {
+                "embeddings": self._embeddings.stats() if hasattr(self._embeddings, "stats") else None,
+                "answers": answer_cache.stats(),
+                "products": listing_cache.stats(),
+            },
+        }
+
+
+resources = Resources()
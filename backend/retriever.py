@@ -111,20 +111,50 @@ from langchain_community.vectorstores import FAISS
 from pathlib import Path
 import os
 
-def get_retriever(k=3):
+from backend.embedding_cache import cached_embeddings
+from backend.catalog import load_catalog
+from backend.hybrid import SEARCH_MODE, HybridRetriever, HybridSearcher, build_bm25_index
+from backend.mmap_index import has_mmap_index, load_mmap_vectorstore
+
+EMBEDDING_MODEL = "models/embedding-001"
+VECTORSTORE_PATH = Path(__file__).parent / "vectorstore"
+INDEX_NAME = "index"
+USE_MMAP = os.getenv("VECTORSTORE_MMAP", "1") != "0"
+
+def get_embeddings():
     embeddings = GoogleGenerativeAIEmbeddings(
-        model="models/embedding-001",
+        model=EMBEDDING_MODEL,
         google_api_key=os.getenv("GEMINI_API_KEY"),
         task_type="retrieval_query",
         client=None 
     )
-
-    vectorstore_path = Path(__file__).parent / "vectorstore"
-    vectorstore = FAISS.load_local(
+    # Repeated queries are served from the query-embedding cache (see embedding_cache.py)
+    return cached_embeddings(embeddings, model=EMBEDDING_MODEL)
+
+def load_vectorstore(embeddings, vectorstore_path=VECTORSTORE_PATH, nprobe=None, ef_search=None):
+    # Prefer the memory-mapped format (shared across workers, see mmap_index.py).
+    # nprobe / ef_search tune IVF / HNSW serving indexes (see index_config.py)
+    if USE_MMAP and has_mmap_index(vectorstore_path, INDEX_NAME):
+        return load_mmap_vectorstore(embeddings, vectorstore_path, INDEX_NAME, nprobe=nprobe, ef_search=ef_search)
+    return FAISS.load_local(
         folder_path=vectorstore_path,
         embeddings=embeddings,
-        index_name="index",
+        index_name=INDEX_NAME,
         allow_dangerous_deserialization=True
     )
 
+def get_retriever(k=3, embeddings=None, nprobe=None, ef_search=None):
+    if embeddings is None:
+        embeddings = get_embeddings()
+    vectorstore = load_vectorstore(embeddings, nprobe=nprobe, ef_search=ef_search)
     return vectorstore.as_retriever(search_kwargs={"k": k})
+
+def get_hybrid_retriever(k=3, mode=SEARCH_MODE, embeddings=None, catalog=None):
+    # BM25 over the catalog + FAISS, fused with RRF (see hybrid.py); mode="bm25" never embeds
+    if embeddings is None:
+        embeddings = get_embeddings()
+    if catalog is None:
+        catalog = load_catalog()
+    vectorstore = load_vectorstore(embeddings)
+    searcher = HybridSearcher(build_bm25_index(catalog), vectorstore)
+    return HybridRetriever(searcher=searcher, catalog=catalog, k=k, mode=mode)
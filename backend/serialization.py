@@ -0,0 +1,67 @@
+"""
+backend/serialization.py
+
+Fast JSON path for the large catalog payloads (/products, /products/{id},
+/search, recommendations).
+
+A route normally returns a dict, which FastAPI walks with jsonable_encoder
+and then serializes with the stdlib json module: two full passes over
+every product record. Routes that opt in return `fast_response(payload)`
+instead, a ready FastJSONResponse, so FastAPI skips jsonable_encoder and
+the body is produced by orjson in one native pass. Anything orjson cannot
+serialize natively (pydantic models, sets, Paths, ...) falls back to
+jsonable_encoder for that object only.
+
+orjson is optional: without it (or with FAST_JSON=0) fast_response returns
+the dict unchanged and the stdlib path is used.
+
+Micro-benchmark of both paths: python -m backend.benchmark_json
+
+Config (env):
+  FAST_JSON  use orjson for opted-in routes when installed (default 1)
+"""
+
+import json
+import os
+from collections.abc import Mapping
+from typing import Any, Union
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:  # optional: only used when installed
+    import orjson
+except ImportError:
+    orjson = None
+
+FAST_JSON = os.getenv("FAST_JSON", "1") != "0" and orjson is not None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Mapping):  # e.g. catalog_store.ProductView
+        return dict(obj)
+    return jsonable_encoder(obj)
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact UTF-8 JSON (orjson when enabled, else stdlib json with the same output)."""
+    if FAST_JSON:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (stdlib json if orjson is unavailable)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(payload: Any, status_code: int = 200) -> Union[FastJSONResponse, Any]:
+    """
+    Return value for an opted-in route: a pre-rendered response that bypasses
+    jsonable_encoder, or the payload itself when the fast path is off.
+    """
+    if not FAST_JSON:
+        return payload
+    return FastJSONResponse(payload, status_code=status_code)
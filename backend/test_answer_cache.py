@@ -0,0 +1,58 @@
+# backend/test_answer_cache.py
+"""
+Semantic answer cache: cosine-similarity threshold, LRU eviction, and
+invalidation when a new index version is served.
+
+Run:  python -m pytest -q backend/test_answer_cache.py
+"""
+import numpy as np
+
+from backend.answer_cache import SemanticAnswerCache
+
+
+def _near(vector, similarity):
+    """A vector at exactly `similarity` cosine from the unit vector `vector`."""
+    other = np.zeros_like(vector)
+    other[1] = 1.0
+    return similarity * vector + np.sqrt(1 - similarity ** 2) * other
+
+
+def test_hit_only_above_the_threshold():
+    cache = SemanticAnswerCache(max_size=4, ttl=0, threshold=0.9)
+    base = np.eye(8, dtype=np.float32)[0]
+    assert cache.get(base, 1) is None
+    cache.put(base * 3, 1, "answer")  # stored normalized: scale does not matter
+
+    assert cache.get(_near(base, 0.95), 1) == "answer"
+    assert cache.get(_near(base, 0.85), 1) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_hit_entry_is_evicted():
+    cache = SemanticAnswerCache(max_size=2, ttl=0, threshold=0.99)
+    a, b, c = np.eye(3, dtype=np.float32)
+    cache.get(a, 1)
+    cache.put(a, 1, "a")
+    cache.put(b, 1, "b")
+    assert cache.get(a, 1) == "a"
+    cache.put(c, 1, "c")
+    assert cache.get(b, 1) is None
+    assert cache.get(a, 1) == "a" and cache.get(c, 1) == "c"
+    assert cache.evictions == 1
+
+
+def test_new_version_drops_everything():
+    cache = SemanticAnswerCache(max_size=4, ttl=0, threshold=0.9)
+    vector = np.ones(4, dtype=np.float32)
+    cache.get(vector, 1)
+    cache.put(vector, 1, "v1 answer")
+    assert cache.get(vector, 2) is None and len(cache) == 0
+    # An answer computed on version 1 that finishes after the switch is not stored
+    cache.put(vector, 1, "stale answer")
+    assert len(cache) == 0 and cache.get(vector, 2) is None
+
+
+def test_size_zero_disables_the_cache():
+    cache = SemanticAnswerCache(max_size=0)
+    cache.put(np.ones(4), 1, "answer")
+    assert not cache.enabled and cache.get(np.ones(4), 1) is None
@@ -0,0 +1,75 @@
+# backend/test_cart_batch.py
+"""
+POST /cart/batch and /wishlist/batch (app_client fixture in conftest.py):
+operations apply in order in one transaction, and an invalid or oversized
+batch is rejected as a whole, leaving the cart untouched.
+
+Run:  python -m pytest -q backend/test_cart_batch.py
+"""
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def user():
+    return f"u-{uuid.uuid4().hex[:8]}"
+
+
+def _cart_batch(app_client, user, operations):
+    return app_client.post("/cart/batch", json={"user_id": user, "operations": operations}).json()
+
+
+def test_cart_batch_applies_operations_in_order(app_client, user):
+    app_client.post("/cart/add", params={"user_id": user, "product_id": "A", "quantity": 1})
+    body = _cart_batch(app_client, user, [
+        {"op": "add", "product_id": "A", "quantity": 2},
+        {"op": "add", "product_id": "B"},
+        {"op": "set", "product_id": "C", "quantity": 4},
+        {"op": "remove", "product_id": "B"},
+        {"op": "set", "product_id": "C", "quantity": 0},
+        {"op": "add", "product_id": "D", "quantity": 5},
+    ])
+    assert body["status"] == "success"
+    assert body["data"]["cart"] == [{"product_id": "A", "quantity": 3}, {"product_id": "D", "quantity": 5}]
+
+
+@pytest.mark.parametrize("bad_op, message", [
+    ({"op": "explode", "product_id": "B"}, "Operation 1: unknown op 'explode'"),
+    ({"op": "add", "product_id": ""}, "Operation 1: product_id is required"),
+    ({"op": "add", "product_id": "B", "quantity": 0}, "Operation 1: Quantity must be >= 1"),
+    ({"op": "set", "product_id": "B", "quantity": -1}, "Operation 1: Quantity must be >= 0"),
+])
+def test_invalid_cart_batch_applies_nothing(app_client, user, bad_op, message):
+    body = _cart_batch(app_client, user, [{"op": "add", "product_id": "A"}, bad_op])
+    assert body["status"] == "error" and body["message"].startswith(message)
+    assert app_client.get(f"/cart/{user}").json()["data"]["cart"] == []
+
+
+def test_batch_size_limit(app_client, user, monkeypatch):
+    from backend import cart_wishlist
+
+    monkeypatch.setattr(cart_wishlist, "MAX_BATCH_OPERATIONS", 3)
+    operations = [{"op": "add", "product_id": f"P{i}"} for i in range(4)]
+    body = _cart_batch(app_client, user, operations)
+    assert body == {"status": "error", "message": "At most 3 operations per batch"}
+    assert _cart_batch(app_client, user, operations[:3])["status"] == "success"
+
+
+def test_wishlist_batch_moves_to_cart(app_client, user):
+    body = app_client.post("/wishlist/batch", json={"user_id": user, "operations": [
+        {"op": "add", "product_id": "A"},
+        {"op": "add", "product_id": "B"},
+        {"op": "add", "product_id": "A"},
+        {"op": "move_to_cart", "product_id": "A", "quantity": 2},
+        {"op": "add", "product_id": "C"},
+        {"op": "remove", "product_id": "C"},
+    ]}).json()
+    assert body["data"]["wishlist"] == ["B"]
+    assert body["data"]["cart"] == [{"product_id": "A", "quantity": 2}]
+
+    rejected = app_client.post("/wishlist/batch", json={"user_id": user, "operations": [
+        {"op": "remove", "product_id": "B"}, {"op": "set", "product_id": "B"},
+    ]}).json()
+    assert rejected["status"] == "error"
+    assert app_client.get(f"/wishlist/{user}").json()["data"]["wishlist"] == ["B"]
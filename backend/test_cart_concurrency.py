@@ -0,0 +1,100 @@
+# backend/test_cart_concurrency.py
+"""
+Concurrency stress test for cart/wishlist transactions (no Gemini calls).
+
+Many concurrent add_to_cart / move_wishlist_to_cart calls are fired from
+FastAPI's threadpool (anyio worker threads, same as the sync cart
+endpoints) and from several processes (like multiple uvicorn workers)
+against a temporary store. Every increment must be present at the end,
+i.e. no lost updates.
+
+Run:  python -m backend.test_cart_concurrency [sqlite|json]
+"""
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+THREADS_PER_PROCESS = 16
+ADDS_PER_THREAD = 10
+PROCESSES = 4
+USERS = ["u1", "u2", "u3"]
+
+
+def _configure(kind: str, workdir: str) -> None:
+    """Point the store at temp files (and swap it if cart_wishlist is already imported)."""
+    import backend.cart_storage as cs
+    cs.CART_FILE = Path(workdir) / "cart.json"
+    cs.WISHLIST_FILE = Path(workdir) / "wishlist.json"
+    os.environ["CART_STORAGE"] = kind
+    os.environ["CART_DB_PATH"] = str(Path(workdir) / "cart.db")
+    if "backend.cart_wishlist" in sys.modules:
+        sys.modules["backend.cart_wishlist"].store = cs.create_store()
+
+
+def _hammer(kind: str, workdir: str, worker: int) -> None:
+    """One 'uvicorn worker': run the cart calls concurrently on the anyio threadpool."""
+    _configure(kind, workdir)
+    import anyio
+    from anyio import to_thread
+    from backend import cart_wishlist as cw
+
+    def adds(thread: int):
+        for i in range(ADDS_PER_THREAD):
+            user = USERS[(thread + i) % len(USERS)]
+            cw.add_to_cart(user, "P-shared", 1)
+            # wishlist -> cart moves must stay atomic across both stores
+            pid = f"P-{worker}-{thread}-{i}"
+            cw.add_to_wishlist(user, pid)
+            cw.move_wishlist_to_cart(user, pid, 1)
+
+    async def main():
+        to_thread.current_default_thread_limiter().total_tokens = THREADS_PER_PROCESS
+        async with anyio.create_task_group() as tg:
+            for t in range(THREADS_PER_PROCESS):
+                tg.start_soon(to_thread.run_sync, adds, t)
+
+    anyio.run(main)
+
+
+def run(kind: str = "sqlite") -> None:
+    # An earlier test may already serve cart_wishlist from its own store: put it back afterwards
+    cart_module = sys.modules.get("backend.cart_wishlist")
+    previous = cart_module.store if cart_module is not None else None
+    try:
+        _run(kind)
+    finally:
+        if previous is not None:
+            cart_module.store = previous
+
+
+def _run(kind: str) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        with ProcessPoolExecutor(max_workers=PROCESSES) as pool:
+            for f in [pool.submit(_hammer, kind, workdir, w) for w in range(PROCESSES)]:
+                f.result()
+
+        _configure(kind, workdir)
+        from backend import cart_wishlist as cw
+
+        total_calls = PROCESSES * THREADS_PER_PROCESS * ADDS_PER_THREAD
+        shared = 0
+        moved = 0
+        for user in USERS:
+            cart = cw.get_cart(user)["cart"]
+            shared += sum(i["quantity"] for i in cart if i["product_id"] == "P-shared")
+            moved += sum(1 for i in cart if i["product_id"] != "P-shared")
+            assert cw.get_wishlist(user)["wishlist"] == [], f"{user}: wishlist items left behind"
+
+        assert shared == total_calls, f"lost updates: expected {total_calls}, got {shared}"
+        assert moved == total_calls, f"lost moves: expected {total_calls}, got {moved}"
+        print(f"✅ [{kind}] {total_calls} adds + {total_calls} moves from {PROCESSES} processes, no lost updates")
+
+
+def test_no_lost_updates_sqlite():
+    run("sqlite")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else "sqlite")
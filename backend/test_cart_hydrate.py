@@ -0,0 +1,65 @@
+# backend/test_cart_hydrate.py
+"""
+Hydrated carts (GET /cart/{user_id}?hydrate=true): per-line product,
+prices and totals from the catalog's parsed price arrays; products no
+longer in the catalog are flagged and left out of the totals.
+
+Run:  python -m pytest -q backend/test_cart_hydrate.py
+"""
+import uuid
+
+import pytest
+
+from backend.catalog import Catalog
+
+CATALOG = Catalog([
+    {"product_id": "A", "discounted_price": "₹1,299", "actual_price": "₹1,999"},
+    {"product_id": "B", "price": 250.5},
+    {"product_id": "C", "actual_price": "₹100"},
+])
+
+
+@pytest.fixture
+def hydrate_cart(app_resources):
+    # cart_wishlist opens the cart store on import: only after conftest.py pointed it at a scratch DB
+    from backend.cart_wishlist import hydrate_cart
+    return hydrate_cart
+
+
+def test_line_and_cart_totals(hydrate_cart):
+    cart = {"user_id": "u1", "cart": [
+        {"product_id": "A", "quantity": 2},
+        {"product_id": "B", "quantity": 1},
+        {"product_id": "gone", "quantity": 3},
+        {"product_id": "C", "quantity": 1},
+    ]}
+    hydrated = hydrate_cart(cart, CATALOG)
+
+    a, b, gone, c = hydrated["cart"]
+    assert a == {"product_id": "A", "quantity": 2, "available": True, "product": CATALOG.get("A"),
+                 "unit_price": 1299.0, "list_price": 1999.0, "line_total": 2598.0, "line_discount": 1400.0}
+    assert (b["unit_price"], b["list_price"], b["line_discount"]) == (250.5, 250.5, 0.0)
+    assert (c["unit_price"], c["line_total"]) == (100.0, 100.0)
+    assert gone["available"] is False and gone["product"] is None and gone["line_total"] == 0.0
+    assert hydrated["totals"] == {"items": 4, "subtotal": 4348.5, "discount": 1400.0, "total": 2948.5}
+    assert hydrated["user_id"] == "u1"
+
+
+def test_empty_cart(hydrate_cart):
+    hydrated = hydrate_cart({"user_id": "u1", "cart": []}, CATALOG)
+    assert hydrated["cart"] == []
+    assert hydrated["totals"] == {"items": 0, "subtotal": 0.0, "discount": 0.0, "total": 0.0}
+
+
+def test_cart_endpoint_hydrates_on_request(app_client, app_resources):
+    user = f"u-{uuid.uuid4().hex[:8]}"
+    catalog = app_resources[1].index.current.catalog
+    pid = catalog.ids[0]
+    app_client.post("/cart/add", params={"user_id": user, "product_id": pid, "quantity": 3})
+
+    plain = app_client.get(f"/cart/{user}").json()["data"]
+    assert plain == {"user_id": user, "cart": [{"product_id": pid, "quantity": 3}]}
+    hydrated = app_client.get(f"/cart/{user}", params={"hydrate": "true"}).json()["data"]
+    assert hydrated["cart"][0]["product"]["product_id"] == pid
+    assert hydrated["totals"]["items"] == 3
+    assert hydrated["totals"]["total"] == round(3 * float(catalog.sale_prices[0]), 2)
@@ -0,0 +1,83 @@
+# backend/test_cart_storage.py
+"""
+Cart/wishlist storage backends: SQLite transactions (order, rollback) and
+the one-shot import of the legacy JSON files.
+
+Run:  python -m pytest -q backend/test_cart_storage.py
+"""
+import json
+
+import pytest
+
+from backend import cart_storage as cs
+
+
+@pytest.fixture
+def legacy(tmp_path, monkeypatch):
+    """Legacy cart.json / wishlist.json with one user's data; CART_DB_PATH in tmp_path."""
+    cart_file, wishlist_file = tmp_path / "cart.json", tmp_path / "wishlist.json"
+    cart_file.write_text(json.dumps({"u1": [{"product_id": "A", "quantity": 2}]}), encoding="utf-8")
+    wishlist_file.write_text(json.dumps({"u1": ["B", "C"]}), encoding="utf-8")
+    monkeypatch.setattr(cs, "CART_FILE", cart_file)
+    monkeypatch.setattr(cs, "WISHLIST_FILE", wishlist_file)
+    monkeypatch.setenv("CART_STORAGE", "sqlite")
+    monkeypatch.setenv("CART_DB_PATH", str(tmp_path / "cart.db"))
+    return cart_file, wishlist_file
+
+
+def test_sqlite_transaction_keeps_order_and_commits(tmp_path):
+    store = cs.SQLiteCartStore(tmp_path / "cart.db")
+    with store.transaction("u1") as txn:
+        txn.cart.append({"product_id": "B", "quantity": 1})
+        txn.cart.append({"product_id": "A", "quantity": 3})
+        txn.wishlist = ["Z", "Y"]
+    assert store.get_cart("u1") == [{"product_id": "B", "quantity": 1}, {"product_id": "A", "quantity": 3}]
+    assert store.get_wishlist("u1") == ["Z", "Y"]
+    assert store.get_cart("u2") == [] and store.get_wishlist("u2") == []
+
+
+def test_sqlite_transaction_rolls_back_on_error(tmp_path):
+    store = cs.SQLiteCartStore(tmp_path / "cart.db")
+    store.set_cart("u1", [{"product_id": "A", "quantity": 1}])
+    with pytest.raises(RuntimeError):
+        with store.transaction("u1") as txn:
+            txn.cart = []
+            raise RuntimeError("abort")
+    assert store.get_cart("u1") == [{"product_id": "A", "quantity": 1}]
+
+
+def test_migrate_json_to_sqlite(legacy, tmp_path):
+    counts = cs.migrate_json_to_sqlite(*legacy, db_path=tmp_path / "migrated.db")
+    assert counts == {"carts": 1, "wishlists": 1}
+    store = cs.SQLiteCartStore(tmp_path / "migrated.db")
+    assert store.get_cart("u1") == [{"product_id": "A", "quantity": 2}]
+    assert store.get_wishlist("u1") == ["B", "C"]
+    assert store.legacy_imported()
+
+
+def test_create_store_imports_legacy_json_only_once(legacy):
+    store = cs.create_store()
+    assert store.get_cart("u1") == [{"product_id": "A", "quantity": 2}]
+
+    # Emptying every cart must not bring the JSON data back on the next start
+    store.set_cart("u1", [])
+    store.set_wishlist("u1", [])
+    assert cs.create_store().is_empty()
+
+
+def test_create_store_marks_a_populated_database_without_importing(legacy, tmp_path):
+    existing = cs.SQLiteCartStore(tmp_path / "cart.db")
+    existing.set_cart("u9", [{"product_id": "X", "quantity": 1}])
+    store = cs.create_store()
+    assert store.get_cart("u1") == [] and store.get_cart("u9") == [{"product_id": "X", "quantity": 1}]
+    assert store.legacy_imported()
+
+
+def test_create_store_json_backend(legacy, monkeypatch):
+    monkeypatch.setenv("CART_STORAGE", "json")
+    store = cs.create_store()
+    assert isinstance(store, cs.JSONCartStore)
+    assert store.get_wishlist("u1") == ["B", "C"]
+    monkeypatch.setenv("CART_STORAGE", "redis")
+    with pytest.raises(ValueError):
+        cs.create_store()
@@ -0,0 +1,43 @@
+# backend/test_catalog.py
+"""
+In-memory catalog indexes behind /search and /products: id lookups, price
+parsing and the category/price filter mask.
+
+Run:  python -m pytest -q backend/test_catalog.py
+"""
+from backend.catalog import Catalog, parse_price, product_list_price, product_price
+
+PRODUCTS = [
+    {"product_id": "P1", "category": "Audio", "discounted_price": "₹1,299", "actual_price": "₹2,000"},
+    {"product_id": "P2", "category": "audio", "price": 499},
+    {"product_id": "P3", "price": "750"},  # no category
+    {"product_id": "P4", "category": "Kitchen", "actual_price": "₹3,499.50"},
+    {"product_name": "no id"},
+    {"product_id": "P2", "category": "Audio", "price": 599},  # duplicate: last wins, first position
+]
+
+
+def test_price_parsing():
+    assert parse_price("₹1,299") == 1299.0
+    assert parse_price("abc") == 0.0
+    assert product_price(PRODUCTS[0]) == 1299.0
+    assert product_list_price(PRODUCTS[0], 1299.0) == 2000.0
+    assert product_list_price({"actual_price": "100"}, 150.0) == 150.0
+
+
+def test_lookups_and_rows():
+    catalog = Catalog(PRODUCTS)
+    assert catalog.ids == ["P1", "P2", "P3", "P4"]
+    assert catalog.get("P2")["price"] == 599 and "P5" not in catalog
+    assert catalog.sale_prices.tolist() == [1299.0, 599.0, 750.0, 3499.5]
+    assert catalog.rows(["P4", "nope"]).tolist() == [3, -1]
+
+
+def test_filter_mask():
+    catalog = Catalog(PRODUCTS)
+    assert catalog.filter_mask() is None
+    # Uncategorized products pass a category filter; categories match case-insensitively
+    assert catalog.ids_where(catalog.filter_mask(category="AUDIO")) == ["P1", "P2", "P3"]
+    assert catalog.ids_where(catalog.filter_mask(category="Garden")) == ["P3"]
+    assert catalog.ids_where(catalog.filter_mask(min_price=600, max_price=1299)) == ["P1", "P3"]
+    assert catalog.ids_where(catalog.filter_mask(category="kitchen", min_price=1000)) == ["P4"]
@@ -0,0 +1,62 @@
+# backend/test_catalog_store.py
+"""
+Columnar catalog round-trip: a catalog loaded from products.columns/ must
+serialize byte-for-byte like the one parsed from products.json (same
+products, key order, values, nulls and prices).
+
+Run:  python -m pytest -q backend/test_catalog_store.py
+"""
+import json
+
+import numpy as np
+
+from backend import catalog as catalog_module
+from backend import catalog_store
+from backend.catalog import load_catalog
+from backend.serialization import dumps
+
+PRODUCTS = [
+    {"product_id": "B001", "product_name": "USB-C Cable", "category": "Electronics|Cables",
+     "discounted_price": "₹199", "actual_price": "₹999", "discount_percentage": "80%",
+     "rating": "4.1", "rating_count": "24,269"},
+    # Other key order, numbers instead of strings, nulls and a list
+    {"category": "Home", "product_id": "B002", "product_name": "Kettle", "price": 1299.5,
+     "rating": None, "tags": ["steel", "1.5L"], "rating_count": 12},
+    {"product_name": "no id, dropped"},
+    {"product_id": "B003", "product_name": "Fan – 1200mm", "actual_price": ""},
+    # Duplicate id: last record wins, at the first one's position
+    {"product_id": "B001", "product_name": "USB-C Cable (2m)", "category": "Electronics|Cables",
+     "discounted_price": "₹249"},
+]
+
+
+def _load(path, columnar, monkeypatch):
+    monkeypatch.setattr(catalog_module, "CATALOG_COLUMNAR", columnar)
+    return load_catalog(path)
+
+
+def test_columnar_catalog_round_trips_byte_identical(tmp_path, monkeypatch):
+    source = tmp_path / "products.json"
+    source.write_text(json.dumps(PRODUCTS, ensure_ascii=False), encoding="utf-8")
+
+    from_json = _load(source, False, monkeypatch)
+    assert catalog_store.build_columnar(PRODUCTS, source) == 3
+    assert catalog_store.is_fresh(source)
+    from_columns = _load(source, True, monkeypatch)
+
+    assert isinstance(from_columns.get("B001"), catalog_store.ProductView)
+    assert list(from_columns.by_id) == list(from_json.by_id) == ["B001", "B002", "B003"]
+    assert dumps(from_columns.values()) == dumps(from_json.values())
+    assert [list(p) for p in from_columns.values()] == [list(p) for p in from_json.values()]
+    np.testing.assert_array_equal(from_columns.sale_prices, from_json.sale_prices)
+    np.testing.assert_array_equal(from_columns.list_prices, from_json.list_prices)
+
+
+def test_stale_columnar_copy_is_ignored(tmp_path, monkeypatch):
+    source = tmp_path / "products.json"
+    source.write_text(json.dumps(PRODUCTS[:2]), encoding="utf-8")
+    catalog_store.build_columnar(PRODUCTS[:2], source)
+
+    source.write_text(json.dumps(PRODUCTS[:1]), encoding="utf-8")
+    assert not catalog_store.is_fresh(source)
+    assert list(_load(source, True, monkeypatch).by_id) == ["B001"]
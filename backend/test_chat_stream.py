@@ -0,0 +1,55 @@
+# backend/test_chat_stream.py
+"""
+POST /chat/stream (no Gemini calls: app_client fixture in conftest.py).
+
+The body must be well-formed Server-Sent Events: sources first, then one
+or more tokens, then done. A repeated question is served from the answer
+cache with the same event sequence and the same done fields.
+
+Run:  python -m pytest -q backend/test_chat_stream.py
+"""
+import json
+
+QUERY = "wireless earbuds with long battery life"
+
+
+def _events(response):
+    """Parse an SSE body into [(event, data), ...]."""
+    assert response.text.endswith("\n\n")
+    events = []
+    for block in response.text.split("\n\n")[:-1]:
+        event_line, data_line = block.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def _stream(app_client, query=QUERY):
+    response = app_client.post("/chat/stream", json={"query": query})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    return _events(response)
+
+
+def test_stream_sends_sources_tokens_then_done(app_client):
+    events = _stream(app_client)
+    kinds = [kind for kind, _ in events]
+    assert kinds[0] == "sources" and kinds[-1] == "done"
+    assert set(kinds[1:-1]) == {"token"}
+
+    sources = events[0][1]["sources"]
+    assert sources and all("product_id" in s for s in sources)
+    done = events[-1][1]
+    assert set(done) == {"retrieval_ms", "first_token_ms", "total_ms"}
+    assert 0 <= done["retrieval_ms"] <= done["first_token_ms"] <= done["total_ms"]
+
+
+def test_cached_answer_streams_the_same_events(app_client):
+    live = _stream(app_client)
+    cached = _stream(app_client)
+
+    assert [kind for kind, _ in cached] == ["sources", "token", "done"]
+    assert cached[0] == live[0]
+    assert cached[1][1]["text"] == "".join(data["text"] for kind, data in live if kind == "token")
+    assert set(cached[-1][1]) == set(live[-1][1])
@@ -0,0 +1,98 @@
+# backend/test_embedding_cache.py
+"""
+Query-embedding cache: LRU eviction and TTL, SQLite tier pruning (TTL and
+row cap), hit/miss counters and the async path (backend.fakes.FakeEmbeddings,
+so no Gemini calls).
+
+Run:  python -m pytest -q backend/test_embedding_cache.py
+"""
+import asyncio
+import time
+
+from backend import embedding_cache
+from backend.embedding_cache import CachedEmbeddings, LRUCache, SQLiteVectorCache
+from backend.fakes import FakeEmbeddings
+
+
+def _rows(cache: SQLiteVectorCache) -> int:
+    return cache._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl=0)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_expires_entries(monkeypatch):
+    cache = LRUCache(max_size=10, ttl=60)
+    cache.set("a", 1)
+    now = time.time()
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: now + 61)
+    assert cache.get("a") is None and len(cache) == 0
+
+
+def test_sqlite_tier_round_trips_and_expires(tmp_path, monkeypatch):
+    cache = SQLiteVectorCache(str(tmp_path / "cache.db"), ttl=60)
+    cache.set("q", [0.5, -1.25])
+    assert cache.get("q") == [0.5, -1.25]
+    now = time.time()
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: now + 61)
+    assert cache.get("q") is None
+    # Expired rows are deleted when the file is opened again
+    assert _rows(SQLiteVectorCache(str(tmp_path / "cache.db"), ttl=60)) == 0
+
+
+def test_sqlite_tier_prunes_to_the_row_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "PRUNE_EVERY", 10)
+    cache = SQLiteVectorCache(str(tmp_path / "cache.db"), ttl=0, max_rows=25)
+    for i in range(60):
+        cache.set(f"k{i}", [float(i)])
+    assert _rows(cache) == 25
+    assert cache.get("k59") == [59.0] and cache.get("k0") is None  # oldest rows go first
+
+    reopened = SQLiteVectorCache(str(tmp_path / "cache.db"), ttl=0, max_rows=5)
+    assert _rows(reopened) == 5
+
+
+def test_cached_embeddings_counts_hits_and_misses(tmp_path):
+    fake = FakeEmbeddings(size=8)
+    disk = SQLiteVectorCache(str(tmp_path / "cache.db"))
+    cached = CachedEmbeddings(fake, model="m", memory=LRUCache(), disk=disk)
+    first = cached.embed_query("Red  Shoes")
+    assert cached.embed_query("red shoes") == first  # normalized key, memory hit
+    assert fake.calls == 1
+
+    # Another worker: empty memory tier, shared SQLite tier
+    other = CachedEmbeddings(fake, model="m", memory=LRUCache(), disk=disk)
+    assert other.embed_query("red shoes") == first
+    assert fake.calls == 1
+    assert cached.stats()["hits"] == 1 and cached.stats()["misses"] == 1
+    stats = other.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0, 1.0)
+
+    # Document embeddings are never cached
+    cached.embed_documents(["red shoes"])
+    assert fake.calls == 2
+
+
+def test_async_path_uses_both_tiers(tmp_path):
+    fake = FakeEmbeddings(size=8)
+    disk = SQLiteVectorCache(str(tmp_path / "cache.db"))
+    cached = CachedEmbeddings(fake, model="m", memory=LRUCache(), disk=disk)
+
+    async def run():
+        first = await cached.aembed_query("kettle")
+        again = await cached.aembed_query("KETTLE")
+        other = CachedEmbeddings(fake, model="m", memory=LRUCache(), disk=disk)
+        shared = await other.aembed_query("kettle")
+        return first, again, shared, other
+
+    first, again, shared, other = asyncio.run(run())
+    assert first == again == shared
+    assert disk.get("m\x00kettle") == first
+    assert other.stats()["disk_hits"] == 1
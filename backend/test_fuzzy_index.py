@@ -0,0 +1,47 @@
+# backend/test_fuzzy_index.py
+"""
+Precomputed fuzzy corpus behind the /search fallback and suggestions:
+typo-tolerant matching, filters and the score cutoff.
+
+Run:  python -m pytest -q backend/test_fuzzy_index.py
+"""
+import numpy as np
+
+from backend.fuzzy_index import FuzzyIndex, build_fuzzy_indexes
+
+PRODUCTS = {
+    "P1": {"product_name": "Wireless Bluetooth Headphones", "about_product": "Over-ear, noise cancelling"},
+    "P2": {"product_name": "Wired Earphones", "about_product": "In-ear earphones with mic"},
+    "P3": {"product_name": "Bluetooth Speaker", "about_product": "Portable wireless speaker"},
+    "P4": {"product_name": "USB-C Charging Cable", "about_product": "Fast charging braided cable"},
+    "P5": {"product_name": "Steel Electric Kettle", "about_product": "1.5 litre kettle with auto shut-off"},
+}
+AUDIO = ("P1", "P2", "P3")
+
+
+def test_matches_misspelt_names_and_descriptions():
+    documents, names = build_fuzzy_indexes(PRODUCTS)
+    assert names.extract("bluetoth speker", limit=1)[0][:2] == ("P3", "Bluetooth Speaker")
+    assert documents.extract("electrik ketle", limit=1)[0][:2] == ("P5", None)  # texts not kept
+    assert documents.texts is None and names.texts is not None
+    assert FuzzyIndex([("x", "abc")]).extract("zzz") == []
+
+
+def test_word_order_does_not_matter():
+    index = FuzzyIndex([("a", "Electric Kettle Steel"), ("b", "Charging Cable")])
+    key, _, score = index.extract("steel electric kettle", limit=1)[0]
+    assert key == "a" and score == 100
+
+
+def test_allowed_restricts_matches():
+    _, names = build_fuzzy_indexes(PRODUCTS)
+    # Boolean mask over the choice rows (catalog rows), as Catalog.filter_mask returns
+    allowed = np.array([pid in AUDIO for pid in PRODUCTS])
+    matches = names.extract("cable", limit=5, allowed=allowed)
+    assert all(key in AUDIO for key, _, _ in matches)
+
+
+def test_score_cutoff():
+    index = FuzzyIndex([("a", "kettle"), ("b", "something else")])
+    matches = index.extract("kettle", limit=5, score_cutoff=80)
+    assert [key for key, _, _ in matches] == ["a"] and matches[0][2] == 100
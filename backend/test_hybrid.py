@@ -0,0 +1,95 @@
+# backend/test_hybrid.py
+"""
+Hybrid /search ranking: BM25 scoring and filter masks, reciprocal-rank
+fusion, and the BM25 + FAISS searcher (backend.fakes.FakeEmbeddings, so no
+Gemini calls) in every mode.
+
+Run:  python -m pytest -q backend/test_hybrid.py
+"""
+import asyncio
+
+import faiss
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+
+from backend.catalog import Catalog
+from backend.fakes import FakeEmbeddings
+from backend.hybrid import BM25Index, HybridSearcher, build_bm25_index, reciprocal_rank_fusion, vector_search
+from backend.rebuild_vectorstore import _compose_doc_text
+
+PRODUCTS = [
+    {"product_id": "P1", "product_name": "Wireless Bluetooth Headphones", "category": "Audio", "price": "2999",
+     "about_product": "Over-ear headphones with noise cancellation"},
+    {"product_id": "P2", "product_name": "Wired Earphones", "category": "Audio", "price": "499",
+     "about_product": "In-ear earphones with mic"},
+    {"product_id": "P3", "product_name": "Bluetooth Speaker", "category": "Audio", "price": "1499",
+     "about_product": "Portable wireless speaker"},
+    {"product_id": "P4", "product_name": "USB-C Charging Cable", "category": "Cables", "price": "199",
+     "about_product": "Fast charging braided cable"},
+    {"product_id": "P5", "product_name": "Steel Electric Kettle", "category": "Kitchen", "price": "1299",
+     "about_product": "1.5 litre kettle with auto shut-off"},
+]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return Catalog(PRODUCTS)
+
+
+@pytest.fixture(scope="module")
+def searcher(catalog):
+    texts = [_compose_doc_text(p) for p in PRODUCTS]
+    vectorstore = FAISS.from_texts(texts, FakeEmbeddings(size=64),
+                                   metadatas=[{"product_id": p["product_id"]} for p in PRODUCTS])
+    return HybridSearcher(build_bm25_index(catalog), vectorstore)
+
+
+def test_bm25_ranks_by_term_matches():
+    index = BM25Index([("a", "red shoes"), ("b", "red red red hat"), ("c", "blue shoes")])
+    assert [key for key, _ in index.search("red", 5)] == ["b", "a"]
+    assert [key for key, _ in index.search("blue shoes", 5)][0] == "c"
+    assert index.search("purple", 5) == []
+
+
+def test_filter_mask(catalog):
+    assert catalog.filter_mask() is None
+    assert catalog.ids_where(catalog.filter_mask(category="AUDIO", max_price=1500)) == ["P2", "P3"]
+    assert catalog.ids_where(catalog.filter_mask(min_price=1299, max_price=1499)) == ["P3", "P5"]
+    assert catalog.ids_where(catalog.filter_mask(category="Garden")) == []
+
+
+def test_bm25_respects_the_filter_mask(catalog, searcher):
+    mask = catalog.filter_mask(max_price=1000)
+    keys = [key for key, _ in searcher.bm25.search("earphones cable", 5, mask)]
+    assert set(keys) == {"P2", "P4"}
+    assert searcher.bm25.search("kettle", 5, catalog.filter_mask(category="audio")) == []
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert [key for key, _ in fused] == ["a", "c", "b"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+
+def test_vector_search_returns_each_product_once():
+    # Three chunk vectors for "a", one for "b"
+    index = faiss.IndexFlatL2(2)
+    index.add(np.array([[0, 0], [0.1, 0], [0.2, 0], [5, 5]], dtype=np.float32))
+    row_ids = ["a", "a", "a", "b"]
+    assert vector_search(index, row_ids, [0, 0], 4) == ["a", "b"]
+    assert vector_search(index, row_ids, [0, 0], 4, rows=np.array([1, 3])) == ["a", "b"]
+
+
+def test_hybrid_modes_and_filters(catalog, searcher):
+    assert set(searcher.search("bluetooth", 5, mode="bm25")) == {"P1", "P3"}
+    assert searcher.search("Steel Electric Kettle", 1, mode="vector") == ["P5"]
+    assert searcher.search("kettle", 3)[0] == "P5"
+
+    audio = catalog.filter_mask(category="Audio", max_price=2000)
+    for mode in ("hybrid", "bm25", "vector"):
+        assert set(searcher.search("wireless", 5, audio, mode=mode)) <= {"P2", "P3"}
+    assert asyncio.run(searcher.asearch("kettle", 3)) == searcher.search("kettle", 3)
+
+    with pytest.raises(ValueError):
+        searcher.search("kettle", 3, mode="semantic")
@@ -0,0 +1,64 @@
+# backend/test_index_manager.py
+"""
+IndexManager hot reload (no Gemini calls: synthetic catalog from
+benchmark_app.py indexed with backend.fakes.FakeEmbeddings).
+
+Only the component whose files changed is reloaded, the other one is
+reused as-is, and a snapshot taken before the swap keeps serving its own
+version.
+
+Run:  python -m pytest -q backend/test_index_manager.py
+"""
+import json
+import os
+
+import pytest
+
+from backend.benchmark_app import prepare_dataset
+from backend.fakes import FakeEmbeddings
+from backend.index_manager import IndexManager
+
+DIM = 16
+
+
+@pytest.fixture
+def manager(tmp_path):
+    folder = prepare_dataset(30, tmp_path, dim=DIM)
+    return IndexManager(embeddings_provider=lambda: FakeEmbeddings(DIM), vectorstore_path=folder / "vectorstore",
+                        catalog_path=folder / "products.json", watch_interval=0)
+
+
+def _bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_reload_without_changes_keeps_the_snapshot(manager):
+    first = manager.load()
+    assert manager.reload() is first
+    assert manager.reload(force=True).version == first.version + 1
+
+
+def test_catalog_change_reuses_the_loaded_index(manager):
+    old = manager.load()
+    products = json.loads(manager.catalog_path.read_text(encoding="utf-8"))
+    manager.catalog_path.write_text(json.dumps(products[:10], ensure_ascii=False), encoding="utf-8")
+
+    new = manager.reload()
+    assert new is manager.current and new.version == old.version + 1
+    assert new.vectorstore is old.vectorstore and new.neighbors is old.neighbors
+    assert len(new.catalog) == 10 and new.catalog is not old.catalog
+    assert set(manager.load_times) == {"catalog", "fuzzy_index", "bm25_index"}
+    # A request holding the old snapshot still sees the old version
+    assert len(old.catalog) == 30 and old.searcher is not new.searcher
+
+
+def test_index_change_reuses_the_loaded_catalog(manager):
+    old = manager.load()
+    _bump_mtime(manager.vectorstore_path / "index.faiss")
+
+    new = manager.reload()
+    assert new.version == old.version + 1
+    assert new.vectorstore is not old.vectorstore
+    assert new.catalog is old.catalog and new.fuzzy_docs is old.fuzzy_docs and new.bm25 is old.bm25
+    assert set(manager.load_times) == {"vectorstore"}
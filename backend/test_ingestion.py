@@ -0,0 +1,112 @@
+# backend/test_ingestion.py
+"""
+Incremental index updates and chunk pooling (no Gemini calls:
+backend.fakes.FakeEmbeddings).
+
+An index built with id_key is updated with added, changed and removed
+products; only the new/changed ones may be embedded again, and the result
+(vectors, content-hash manifest) must match a fresh build. Pooled
+documents embed each distinct chunk once and get one length-preserving
+mean vector.
+
+Run:  python -m pytest -q backend/test_ingestion.py
+"""
+import numpy as np
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from backend.fakes import FakeEmbeddings
+from backend.ingestion import (Checkpoint, build_vectorstore, embed_pooled, load_hashes, pool_vectors,
+                               update_vectorstore)
+
+INDEX = "index"
+SIGNATURE = {"source": "test"}
+
+
+def _docs(texts):
+    return [Document(page_content=text, metadata={"product_id": pid}) for pid, text in texts.items()]
+
+
+def _catalog(n=40):
+    return {f"P{i}": f"product {i} colour {i % 7} size {i % 5} brand {i % 3}" for i in range(n)}
+
+
+def _vectors(vectorstore):
+    store = {}
+    for row in range(vectorstore.index.ntotal):
+        doc_id = vectorstore.index_to_docstore_id[row]
+        store[doc_id] = vectorstore.index.reconstruct(row)
+    return store
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(size=32)
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def test_update_embeds_only_added_and_changed(tmp_path):
+    texts = _catalog()
+    build_vectorstore(_docs(texts), CountingEmbeddings(), tmp_path, INDEX, SIGNATURE, batch_size=8,
+                      id_key="product_id")
+
+    updated = dict(texts)
+    updated["P3"] = "product 3 now in a new colour"
+    del updated["P7"], updated["P8"]
+    updated["P-new"] = "brand new product"
+    embeddings = CountingEmbeddings()
+    vectorstore, stats = update_vectorstore(_docs(updated), embeddings, tmp_path, INDEX, SIGNATURE,
+                                            id_key="product_id", batch_size=8)
+
+    assert stats == {"added": 1, "changed": 1, "removed": 2}
+    assert sorted(embeddings.embedded) == sorted([updated["P3"], updated["P-new"]])
+    assert set(load_hashes(tmp_path, INDEX)) == set(updated)
+
+    fresh = build_vectorstore(_docs(updated), CountingEmbeddings(), tmp_path / "fresh", INDEX, SIGNATURE,
+                              batch_size=8, id_key="product_id")
+    got, want = _vectors(vectorstore), _vectors(fresh)
+    assert set(got) == set(want)
+    for pid in want:
+        np.testing.assert_allclose(got[pid], want[pid], rtol=1e-6)
+
+
+def test_update_without_changes_is_a_no_op(tmp_path):
+    texts = _catalog(10)
+    build_vectorstore(_docs(texts), CountingEmbeddings(), tmp_path, INDEX, SIGNATURE, id_key="product_id")
+    embeddings = CountingEmbeddings()
+    _, stats = update_vectorstore(_docs(texts), embeddings, tmp_path, INDEX, SIGNATURE, id_key="product_id")
+    assert stats == {"added": 0, "changed": 0, "removed": 0}
+    assert embeddings.embedded == []
+
+
+def test_pool_vectors_keeps_single_chunks_and_mean_length():
+    matrix = np.array([[3, 0], [0, 1], [1, 1]], dtype=np.float32)
+    rows = {"a": 0, "b": 1, "c": 2}
+    pooled = pool_vectors([["a", "b"], ["c"]], rows, matrix)
+
+    np.testing.assert_allclose(pooled[1], matrix[2])
+    mean = (matrix[0] + matrix[1]) / 2
+    np.testing.assert_allclose(pooled[0], mean / np.linalg.norm(mean) * 2.0, rtol=1e-6)
+    assert pool_vectors([], rows, matrix).shape == (0, 2)
+
+
+def test_embed_pooled_embeds_repeated_chunks_once(tmp_path):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=20, chunk_overlap=0, separators=["|"])
+    docs = [
+        Document(page_content="shared warranty text|first product", metadata={"product_id": "P1"}),
+        Document(page_content="shared warranty text|second product", metadata={"product_id": "P2"}),
+        Document(page_content="short", metadata={"product_id": "P3"}),
+    ]
+    embeddings = CountingEmbeddings()
+    texts, metadatas, vectors = embed_pooled(docs, splitter, embeddings, Checkpoint(tmp_path / "ckpt", SIGNATURE),
+                                             batch_size=2, workers=1)
+
+    assert texts == [doc.page_content for doc in docs]
+    assert metadatas == [doc.metadata for doc in docs]
+    assert len(embeddings.embedded) == 4 == len(set(embeddings.embedded))
+    assert vectors.shape == (3, 32)
+    np.testing.assert_allclose(vectors[2], FakeEmbeddings(size=32).embed_query("short"), rtol=1e-6)
@@ -0,0 +1,84 @@
+# backend/test_limits.py
+"""
+Upstream call limiter: concurrency cap, timeouts (calls and streams) and
+slot release after success, failure and timeout.
+
+Run:  python -m pytest -q backend/test_limits.py
+"""
+import asyncio
+
+import pytest
+
+from backend.limits import CallLimiter
+
+
+def test_caps_concurrent_calls():
+    async def main():
+        limiter = CallLimiter("test", concurrency=2, timeout=5)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+            return limiter.in_flight
+
+        results = await asyncio.gather(*(limiter.run(call()) for _ in range(6)))
+        return peak, results, limiter.in_flight
+
+    peak, results, in_flight = asyncio.run(main())
+    assert peak == 2 and max(results) <= 2 and in_flight == 0
+
+
+def test_timeout_raises_and_releases_the_slot():
+    async def main():
+        limiter = CallLimiter("slow", concurrency=1, timeout=0.05)
+        with pytest.raises(TimeoutError, match="slow call timed out"):
+            await limiter.run(asyncio.sleep(1))
+        assert (limiter.timeouts, limiter.in_flight) == (1, 0)
+        # The only slot is free again
+        assert await limiter.run(asyncio.sleep(0, result="ok")) == "ok"
+
+    asyncio.run(main())
+
+
+def test_failed_call_releases_the_slot():
+    async def fail():
+        raise ValueError("boom")
+
+    async def main():
+        limiter = CallLimiter("test", concurrency=1, timeout=1)
+        with pytest.raises(ValueError):
+            await limiter.run(fail())
+        assert limiter.in_flight == 0 and limiter.timeouts == 0
+        assert await limiter.run(asyncio.sleep(0, result=1)) == 1
+
+    asyncio.run(main())
+
+
+def test_stream_yields_items_and_times_out_as_a_whole():
+    async def tokens(delay):
+        for token in ("a", "b", "c"):
+            await asyncio.sleep(delay)
+            yield token
+
+    async def main():
+        limiter = CallLimiter("llm", concurrency=1, timeout=0.5)
+        assert [t async for t in limiter.stream(tokens(0))] == ["a", "b", "c"]
+
+        received = []
+        with pytest.raises(TimeoutError):
+            async for token in limiter.stream(tokens(0.2)):
+                received.append(token)
+        assert received == ["a", "b"]  # each item is fast enough, the whole stream is not
+        assert (limiter.timeouts, limiter.in_flight) == (1, 0)
+
+    asyncio.run(main())
+
+
+def test_zero_timeout_means_no_limit():
+    async def main():
+        limiter = CallLimiter("test", concurrency=1, timeout=0)
+        return await limiter.run(asyncio.sleep(0.01, result="done"))
+
+    assert asyncio.run(main()) == "done"
@@ -0,0 +1,62 @@
+# backend/test_metrics.py
+"""
+Prometheus text rendering of the metrics registry and the Server-Timing
+header built from span() timings.
+
+Run:  python -m pytest -q backend/test_metrics.py
+"""
+from backend import metrics
+
+
+def test_render_counter_gauge_histogram_and_collectors():
+    registry = metrics.Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    in_flight = registry.gauge("in_flight", "In flight")
+    latency = registry.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1))
+    registry.collector("cache_size", "Cache size", "gauge", lambda: [("", {"cache": 'a"b'}, 3)])
+    registry.collector("broken", "Broken collector", "gauge", lambda: 1 / 0)
+
+    requests.inc(route="/x")
+    requests.inc(2, route="/x")
+    in_flight.inc()
+    in_flight.dec()
+    for value in (0.05, 0.5, 5):
+        latency.observe(value, stage="llm")
+
+    lines = registry.render().splitlines()
+    assert lines[:3] == ["# HELP requests_total Requests", "# TYPE requests_total counter",
+                         'requests_total{route="/x"} 3']
+    assert "in_flight 0" in lines
+    assert 'latency_seconds_bucket{stage="llm",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="llm",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="llm",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{stage="llm"} 5.55' in lines
+    assert 'latency_seconds_count{stage="llm"} 3' in lines
+    assert 'cache_size{cache="a\\"b"} 3' in lines
+    assert not any(line.startswith("# HELP broken") for line in lines)
+
+
+def test_server_timing_lists_spans_and_total(monkeypatch):
+    monkeypatch.setattr(metrics, "SERVER_TIMING", True)
+    started = metrics.start_request("/search")
+    with metrics.span("embedding"):
+        pass
+    with metrics.span("faiss"):
+        pass
+    header = metrics.finish_request("POST", "/search", 200, started)
+    assert [part.split(";")[0] for part in header.split(", ")] == ["embedding", "faiss", "total"]
+    assert all(part.split(";dur=")[1].replace(".", "").isdigit() for part in header.split(", "))
+
+    monkeypatch.setattr(metrics, "SERVER_TIMING", False)
+    assert metrics.finish_request("POST", "/search", 200, metrics.start_request("/search")) is None
+
+
+def test_app_metrics_use_route_templates(app_client, monkeypatch):
+    monkeypatch.setattr(metrics, "SERVER_TIMING", True)
+    response = app_client.get("/products/B000000001")
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].split(", ")[-1].startswith("total;dur=")
+
+    body = app_client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/products/{product_id}",status="200"}' in body
+    assert "B000000001" not in body
@@ -0,0 +1,76 @@
+# backend/test_neighbors.py
+"""
+Precomputed recommendation neighbours (no Gemini calls:
+backend.fakes.FakeEmbeddings): an incremental update of the neighbour
+table after added, changed and removed products must give the same
+neighbours as a full rebuild.
+
+Run:  python -m pytest -q backend/test_neighbors.py
+"""
+import numpy as np
+from langchain_core.documents import Document
+
+from backend.fakes import FakeEmbeddings
+from backend.ingestion import build_vectorstore, load_hashes, update_vectorstore
+from backend.neighbors import build_neighbor_table, load_neighbor_table, neighbor_paths, update_neighbor_table
+
+INDEX = "index"
+SIGNATURE = {"source": "test"}
+
+
+def _docs(texts):
+    return [Document(page_content=text, metadata={"product_id": pid}) for pid, text in texts.items()]
+
+
+def _catalog(n):
+    return {f"P{i}": f"product {i} colour {i % 7} size {i % 5} brand {i % 3}" for i in range(n)}
+
+
+def _build(folder, texts):
+    return build_vectorstore(_docs(texts), FakeEmbeddings(size=32), folder, INDEX, SIGNATURE, id_key="product_id")
+
+
+def test_lookup_returns_nearest_products_without_self(tmp_path):
+    texts = {"a": "red cotton shirt", "b": "red cotton shirt large", "c": "steel kettle", "d": "steel kettle 2l"}
+    vectorstore = _build(tmp_path, texts)
+    build_neighbor_table(vectorstore, tmp_path, INDEX, top_n=3)
+    table = load_neighbor_table(tmp_path, INDEX)
+    assert "a" in table and "zzz" not in table
+    assert table.lookup("a")[0] == "b" and "a" not in table.lookup("a")
+    assert table.lookup("c")[0] == "d"
+    assert table.lookup("zzz") == []
+    assert len(table.lookup("a", 2)) == 2 and len(table.lookup("a", 10)) == 3
+
+
+def test_incremental_neighbor_table_matches_full_build(tmp_path):
+    texts = _catalog(120)
+    vectorstore = build_vectorstore(_docs(texts), FakeEmbeddings(size=32), tmp_path, INDEX, SIGNATURE,
+                                    id_key="product_id")
+    build_neighbor_table(vectorstore, tmp_path, INDEX, top_n=8)
+
+    updated = dict(texts)
+    for pid in ("P1", "P40", "P99"):
+        updated[pid] = f"{pid} rewritten brand {pid}"
+    for pid in ("P5", "P60"):
+        del updated[pid]
+    updated["P-new"] = "product new colour 2 size 1"
+    old_hashes = load_hashes(tmp_path, INDEX)
+    vectorstore, _ = update_vectorstore(_docs(updated), FakeEmbeddings(size=32), tmp_path, INDEX, SIGNATURE,
+                                        id_key="product_id")
+    new_hashes = load_hashes(tmp_path, INDEX)
+    changed = [pid for pid, h in new_hashes.items() if old_hashes.get(pid) != h]
+    removed = [pid for pid in old_hashes if pid not in new_hashes]
+    update_neighbor_table(vectorstore, tmp_path, INDEX, changed, removed, top_n=8)
+    table, ids = (np.load(p) for p in neighbor_paths(tmp_path, INDEX))
+
+    (tmp_path / "full").mkdir()
+    build_neighbor_table(vectorstore, tmp_path / "full", INDEX, top_n=8)
+    full_table, full_ids = (np.load(p) for p in neighbor_paths(tmp_path / "full", INDEX))
+
+    assert list(ids) == list(full_ids)
+    # Same neighbour distances per row (equidistant neighbours may come in another order)
+    vectors = vectorstore.index.reconstruct_n(0, vectorstore.index.ntotal)
+    for row in range(len(ids)):
+        def distances(neighbours):
+            return np.sort(((vectors[neighbours] - vectors[row]) ** 2).sum(axis=1))
+        np.testing.assert_allclose(distances(table[row]), distances(full_table[row]), atol=1e-5)
@@ -0,0 +1,91 @@
+# backend/test_product_listing.py
+"""
+GET /products listing: offset / cursor pagination, filters, field
+projection, cached bodies with strong ETags and 304 on If-None-Match.
+
+Run:  python -m pytest -q backend/test_product_listing.py
+"""
+from typing import Optional
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend import product_listing
+from backend.catalog import Catalog
+
+PRODUCTS = [
+    {"product_id": f"P{i}", "product_name": f"Product {i}", "category": "Even" if i % 2 == 0 else "Odd",
+     "price": str(i * 100), "about_product": f"Long enough description of product {i}. " * 4}
+    for i in range(10)
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(product_listing, "listing_cache", product_listing.ListingCache())
+    catalog = Catalog(PRODUCTS)
+    app = FastAPI()
+
+    @app.get("/products")
+    def products(request: Request, offset: int = 0, limit: Optional[int] = None, cursor: Optional[str] = None,
+                 category: Optional[str] = None, fields: Optional[str] = None):
+        return product_listing.listing_response(request, 1, catalog, offset=offset, limit=limit, cursor=cursor,
+                                                category=category, fields=product_listing.parse_fields(fields))
+
+    return TestClient(app)
+
+
+def _ids(response):
+    return [p["product_id"] for p in response.json()["data"]]
+
+
+def test_offset_and_cursor_pages(client):
+    first = client.get("/products", params={"limit": 4}).json()
+    assert [p["product_id"] for p in first["data"]] == ["P0", "P1", "P2", "P3"]
+    assert first["page"] == {"offset": 0, "limit": 4, "total": 10, "next_cursor": "P3"}
+
+    second = client.get("/products", params={"limit": 4, "cursor": "P3"})
+    assert _ids(second) == ["P4", "P5", "P6", "P7"]
+    last = client.get("/products", params={"limit": 4, "offset": 8}).json()
+    assert [p["product_id"] for p in last["data"]] == ["P8", "P9"]
+    assert last["page"]["next_cursor"] is None
+
+
+def test_filter_and_projection(client):
+    response = client.get("/products", params={"category": "odd", "limit": 2, "fields": "product_id"})
+    assert response.json()["data"] == [{"product_id": "P1"}, {"product_id": "P3"}]
+    assert response.json()["page"]["total"] == 5
+    assert _ids(client.get("/products", params={"category": "odd", "cursor": "P7"})) == ["P9"]
+
+
+def test_etag_and_not_modified(client):
+    first = client.get("/products", params={"limit": 3}, headers={"Accept-Encoding": "identity"})
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag.startswith('"')
+
+    again = client.get("/products", params={"limit": 3}, headers={"Accept-Encoding": "identity"})
+    assert again.headers["ETag"] == etag and again.content == first.content
+
+    cached = client.get("/products", params={"limit": 3}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+
+    other = client.get("/products", params={"limit": 4}, headers={"If-None-Match": etag})
+    assert other.status_code == 200 and other.headers["ETag"] != etag
+
+
+def test_compressed_variant_shares_the_etag(client):
+    plain = client.get("/products", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/products", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.content == plain.content  # decoded by the client
+    assert gzipped.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    revalidated = client.get("/products", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_listing_cache_ignores_superseded_versions():
+    cache = product_listing.ListingCache()
+    cache.get(2, ("q",))
+    cache.put(1, ("q",), product_listing.CachedBody(b"[]"))
+    assert cache.get(2, ("q",)) is None
@@ -0,0 +1,76 @@
+# backend/test_serialization.py
+"""
+Fast JSON path: orjson output must match the stdlib fallback byte for
+byte, Mapping records (catalog_store.ProductView) and numpy values are
+encoded natively, other types fall back to jsonable_encoder.
+
+Run:  python -m pytest -q backend/test_serialization.py
+"""
+import json
+from collections.abc import Mapping
+
+import numpy as np
+import pytest
+from pydantic import BaseModel
+
+from backend import serialization
+from backend.serialization import FastJSONResponse, dumps, fast_response
+
+needs_orjson = pytest.mark.skipif(serialization.orjson is None, reason="orjson not installed")
+
+
+class Record(Mapping):
+    """Read-only dict-like record, like a columnar catalog row."""
+
+    def __init__(self, **fields):
+        self._fields = fields
+
+    def __getitem__(self, key):
+        return self._fields[key]
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+
+class Model(BaseModel):
+    name: str
+
+
+PAYLOAD = {
+    "status": "success",
+    "data": [Record(product_id="B1", product_name="Kettle – 1.5L", price=1299.5, rating=None)],
+    "model": Model(name="x"),
+    "count": 3,
+}
+
+
+@pytest.mark.parametrize("fast", [pytest.param(True, marks=needs_orjson), False])
+def test_both_paths_encode_the_same_bytes(fast, monkeypatch):
+    monkeypatch.setattr(serialization, "FAST_JSON", fast)
+    body = dumps(PAYLOAD)
+    assert body == (b'{"status":"success","data":[{"product_id":"B1","product_name":"Kettle \xe2\x80\x93 1.5L",'
+                    b'"price":1299.5,"rating":null}],"model":{"name":"x"},"count":3}')
+
+
+@needs_orjson
+def test_numpy_values_and_int_keys(monkeypatch):
+    monkeypatch.setattr(serialization, "FAST_JSON", True)
+    payload = {1: np.float32(0.5), "ids": np.arange(3, dtype=np.int64), "n": np.int64(7)}
+    assert json.loads(dumps(payload)) == {"1": 0.5, "ids": [0, 1, 2], "n": 7}
+
+
+@needs_orjson
+def test_fast_response_renders_with_orjson(monkeypatch):
+    monkeypatch.setattr(serialization, "FAST_JSON", True)
+    response = fast_response({"data": Record(a=1)}, status_code=201)
+    assert isinstance(response, FastJSONResponse)
+    assert response.status_code == 201 and response.body == b'{"data":{"a":1}}'
+
+
+def test_fast_response_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setattr(serialization, "FAST_JSON", False)
+    payload = {"data": [1, 2]}
+    assert fast_response(payload) is payload
@@ -1,18 +1,122 @@
-import pandas as pd
+"""
+data_clean.py
+
+Amazon product CSV -> backend/data/products.json (the catalog the backend serves).
+
+The CSV is streamed in chunks with explicit dtypes, so memory stays flat no
+matter how large the feed is:
+  - every column is read as text; prices ("₹1,299"), discount ("64%"),
+    rating and rating_count ("24,269") are then parsed into numbers per chunk
+    (null when unparseable) and `price` is set to the selling price
+  - rows without a product_id are skipped; duplicate product_ids (the Amazon
+    dataset has one row per review) keep their first row
+  - each cleaned chunk is appended to the JSON array straight away, into a
+    temp file that replaces the output only once the whole CSV is done
+  - progress (rows/s) is logged after every chunk
+
+  python data_clean.py amazon.csv [--output backend/data/products.json] [--chunk-size 50000]
+
+Afterwards rebuild the index (and columnar catalog):
+  python -m backend.rebuild_vectorstore
+"""
+
+import argparse
 import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+OUTPUT_FILE = Path(__file__).parent / "backend" / "data" / "products.json"
+CHUNK_SIZE = 50_000
+
+# Text columns that hold numbers once the currency / % / thousands separators are stripped
+FLOAT_COLUMNS = ("discounted_price", "actual_price", "discount_percentage", "rating")
+INT_COLUMNS = ("rating_count",)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+
+def _to_number(column: pd.Series) -> pd.Series:
+    """"₹1,299" / "64%" / "4.1" -> float, NaN if nothing numeric is left."""
+    cleaned = column.str.replace(r"[^0-9.]", "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce")
+
+
+def clean_chunk(chunk: pd.DataFrame, seen: set) -> pd.DataFrame:
+    """Normalize one chunk and drop rows without an id or already seen; updates `seen`."""
+    # 1. product_id wale rows hi rakho, aur har product sirf ek baar
+    chunk["product_id"] = chunk["product_id"].str.strip()
+    chunk = chunk[chunk["product_id"].notna() & (chunk["product_id"] != "")]
+    chunk = chunk.drop_duplicates("product_id")
+    chunk = chunk[~chunk["product_id"].isin(seen)]
+    seen.update(chunk["product_id"])
+
+    # 2. Price / rating strings ko numbers me badlo
+    chunk = chunk.copy()
+    for name in FLOAT_COLUMNS:
+        if name in chunk:
+            chunk[name] = _to_number(chunk[name]).astype("float64")
+    for name in INT_COLUMNS:
+        if name in chunk:
+            chunk[name] = _to_number(chunk[name]).round().astype("Int64")
+    if "price" not in chunk:
+        selling = chunk.get("discounted_price", chunk.get("actual_price"))
+        if selling is not None:
+            chunk["price"] = selling
+    return chunk
+
+
+def _records(chunk: pd.DataFrame):
+    """Rows as plain dicts of Python values, None where missing (NaN is not valid JSON)."""
+    names = list(chunk.columns)
+    columns = [chunk[name].astype(object).where(chunk[name].notna(), None).tolist() for name in names]
+    return (dict(zip(names, row)) for row in zip(*columns))
+
+
+def convert(csv_file: Path, json_file: Path = OUTPUT_FILE, chunk_size: int = CHUNK_SIZE) -> dict:
+    """Stream `csv_file` into the catalog JSON at `json_file`; returns the run statistics."""
+    started = time.perf_counter()
+    seen: set = set()
+    rows = written = 0
+    tmp = json_file.with_name(json_file.name + ".tmp")
+    json_file.parent.mkdir(parents=True, exist_ok=True)
+
+    # Sab columns text ki tarah padho (dtype=str); sirf khaali cells missing maane jaayenge
+    reader = pd.read_csv(csv_file, dtype=str, keep_default_na=False, na_values=[""],
+                         chunksize=chunk_size, encoding="utf-8")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for chunk in reader:
+            rows += len(chunk)
+            for record in _records(clean_chunk(chunk, seen)):
+                if written:
+                    f.write(",\n")
+                f.write(json.dumps(record, ensure_ascii=False))
+                written += 1
+            elapsed = time.perf_counter() - started
+            logging.info(f"{rows:,} rows -> {written:,} products ({rows / elapsed:,.0f} rows/s)")
+        f.write("\n]\n")
+    os.replace(tmp, json_file)
 
-# 1. CSV file ka path
-csv_file = "E:\\7th Sem\\ai-shopping-asistant\\amazon.csv"   # apna CSV file ka naam yaha daalo
-json_file = "dataset.json" # output JSON file
+    elapsed = time.perf_counter() - started
+    return {"rows": rows, "products": written, "dropped": rows - written,
+            "seconds": round(elapsed, 2), "rows_per_second": round(rows / elapsed) if elapsed else 0}
 
-# 2. CSV read karo
-df = pd.read_csv(csv_file)
 
-# 3. DataFrame ko JSON me convert karo
-json_data = df.to_dict(orient="records")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the Amazon products CSV into the catalog JSON")
+    parser.add_argument("csv_file", type=Path, help="input CSV (e.g. amazon.csv)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_FILE, help="catalog JSON to write")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="CSV rows per chunk")
+    return parser.parse_args(argv)
 
-# 4. JSON file save karo
-with open(json_file, "w", encoding="utf-8") as f:
-    json.dump(json_data, f, indent=4, ensure_ascii=False)
 
-print(f"✅ CSV se JSON conversion complete! File saved as: {json_file}")
+if __name__ == "__main__":
+    args = parse_args()
+    stats = convert(args.csv_file, args.output, args.chunk_size)
+    print(f"✅ CSV se JSON conversion complete! {stats['products']:,} products "
+          f"({stats['dropped']:,} duplicate/invalid rows dropped) saved to {args.output} "
+          f"at {stats['rows_per_second']:,} rows/s.")
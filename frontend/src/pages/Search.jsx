@@ -16,7 +16,7 @@ export default function Search() {
 
   useEffect(() => {
     // Fetch all product names and categories for suggestions/filters (once)
-    fetch("http://127.0.0.1:8000/products")
+    fetch("http://127.0.0.1:8000/products?fields=product_name,category")
       .then((res) => res.json())
       .then((data) => {
         if (data.data) {